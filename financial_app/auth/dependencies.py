@@ -0,0 +1,89 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import Depends, Request
+from fastapi.security import OAuth2PasswordBearer
+
+from financial_app.users.enums import UserRole
+
+from .responses import Forbidden, InvalidToken
+from .schemas import Principal
+from .tokens import get_token_service
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl='/auth/token', auto_error=False)
+
+
+async def get_optional_principal(
+    token: Annotated[str | None, Depends(oauth2_scheme)],
+) -> Principal | None:
+    """Caller from the bearer token, verified from its signature alone"""
+
+    if token is None:
+        return None
+
+    return get_token_service().verify(token)
+
+
+def peek_principal(request: Request) -> Principal | None:
+    """Verified caller of `request`, None when anonymous or invalid
+
+    For routing decisions, which must leave rejecting to the route.
+    """
+
+    scheme, _, token = request.headers.get('authorization', '').partition(' ')
+
+    if scheme.lower() != 'bearer' or not token:
+        return None
+
+    try:
+        return get_token_service().verify(token)
+
+    except InvalidToken:
+        return None
+
+
+async def get_principal(
+    principal: Annotated[Principal | None, Depends(get_optional_principal)],
+) -> Principal:
+    if principal is None:
+        raise InvalidToken()
+
+    return principal
+
+
+T_Principal = Annotated[Principal, Depends(get_principal)]
+T_OptionalPrincipal = Annotated[
+    Principal | None, Depends(get_optional_principal)
+]
+
+
+async def require_admin(principal: T_Principal) -> Principal:
+    if principal.role != UserRole.admin:
+        raise Forbidden()
+
+    return principal
+
+
+async def require_self_or_admin(
+    user_id: str, principal: T_Principal
+) -> Principal:
+    if principal.role == UserRole.admin:
+        return principal
+
+    try:
+        if UUID(user_id) == principal.user_id:
+            return principal
+
+    except ValueError:
+        pass
+
+    raise Forbidden()
+
+
+def authorize_role(principal: Principal | None, role: UserRole):
+    """Only admins may hand out the admin role"""
+
+    if role == UserRole.admin and (
+        principal is None or principal.role != UserRole.admin
+    ):
+        raise Forbidden()
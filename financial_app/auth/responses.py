@@ -0,0 +1,38 @@
+from http import HTTPStatus
+from math import ceil
+
+from fastapi.exceptions import HTTPException
+
+BEARER_CHALLENGE = {'WWW-Authenticate': 'Bearer'}
+
+
+class InvalidCredentials(HTTPException):
+    def __init__(self):
+        super().__init__(
+            HTTPStatus.UNAUTHORIZED,
+            'Incorrect username or password',
+            headers=BEARER_CHALLENGE,
+        )
+
+
+class InvalidToken(HTTPException):
+    def __init__(self):
+        super().__init__(
+            HTTPStatus.UNAUTHORIZED,
+            'Could not validate credentials',
+            headers=BEARER_CHALLENGE,
+        )
+
+
+class Forbidden(HTTPException):
+    def __init__(self):
+        super().__init__(HTTPStatus.FORBIDDEN, 'Not enough permissions')
+
+
+class RevocationListFull(HTTPException):
+    def __init__(self, retry_after: float):
+        super().__init__(
+            HTTPStatus.SERVICE_UNAVAILABLE,
+            'Too many revoked tokens, try again later',
+            headers={'Retry-After': str(max(ceil(retry_after), 1))},
+        )
@@ -0,0 +1,59 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.orm import Session
+
+from financial_app.common.database import get_read_session
+from financial_app.common.ratelimit import rate_limit
+from financial_app.common.schemas import Message
+from financial_app.common.security import verify_password_async
+from financial_app.users import repositories
+
+from .dependencies import T_Principal
+from .responses import InvalidCredentials
+from .schemas import Token
+from .tokens import get_token_service
+
+router = APIRouter(
+    prefix='/auth', tags=['Auth'], dependencies=[Depends(rate_limit)]
+)
+
+T_ReadSession = Annotated[Session, Depends(get_read_session)]
+T_PasswordForm = Annotated[OAuth2PasswordRequestForm, Depends()]
+
+
+@router.post('/token', status_code=HTTPStatus.OK)
+async def create_token(session: T_ReadSession, form: T_PasswordForm) -> Token:
+    """Exchange a username and password for a bearer token
+
+    The Argon2 check runs in the hashing pool, off the event loop.
+    """
+
+    credentials = await run_in_threadpool(
+        repositories.get_credentials, session, form.username
+    )
+
+    password_hash = None if credentials is None else credentials.password
+
+    if not await verify_password_async(form.password, password_hash):
+        raise InvalidCredentials()
+
+    token_service = get_token_service()
+
+    return {
+        'access_token': token_service.issue(credentials.id, credentials.role),
+        'token_type': 'bearer',
+        'expires_in': token_service.ttl,
+    }
+
+
+@router.post('/revoke', status_code=HTTPStatus.OK)
+def revoke_token(principal: T_Principal) -> Message:
+    """Revoke the bearer token of this request"""
+
+    get_token_service().revoke(principal)
+
+    return {'message': 'Token revoked'}
@@ -0,0 +1,18 @@
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from financial_app.users.enums import UserRole
+
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str
+    expires_in: int
+
+
+class Principal(BaseModel):
+    user_id: UUID
+    role: UserRole
+    jti: str
+    expires_at: int
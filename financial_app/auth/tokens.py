@@ -0,0 +1,177 @@
+from heapq import heappop, heappush
+from threading import Lock
+from time import time
+from typing import Protocol
+from uuid import UUID, uuid4
+
+import jwt
+
+from financial_app.common.settings import Settings, get_settings
+from financial_app.users.enums import UserRole
+
+from .responses import InvalidToken, RevocationListFull
+from .schemas import Principal
+
+REQUIRED_CLAIMS = ['exp', 'sub', 'role', 'jti']
+
+
+class RevocationList(Protocol):
+    def revoke(self, jti: str, expires_at: float): ...
+
+    def is_revoked(self, jti: str) -> bool: ...
+
+
+class LocalRevocationList:
+    """Revoked token ids, kept only until those tokens expire anyway
+
+    Forgetting a live entry would un-revoke its token, so once max_size
+    live entries are held further revocations fail instead.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._revoked: dict[str, float] = {}
+        self._expiries: list[tuple[float, str]] = []
+        self._lock = Lock()
+
+    def _forget_expired(self, now: float):
+        while self._expiries and self._expiries[0][0] <= now:
+            _, jti = heappop(self._expiries)
+            del self._revoked[jti]
+
+    def revoke(self, jti: str, expires_at: float):
+        now = time()
+
+        with self._lock:
+            self._forget_expired(now)
+
+            if expires_at <= now or jti in self._revoked:
+                return
+
+            if len(self._revoked) >= self.max_size:
+                raise RevocationListFull(self._expiries[0][0] - now)
+
+            self._revoked[jti] = expires_at
+            heappush(self._expiries, (expires_at, jti))
+
+    def is_revoked(self, jti: str) -> bool:
+        with self._lock:
+            return jti in self._revoked
+
+
+class TokenService:
+    """Issues and verifies signed tokens without touching the database
+
+    Keys are looked up by the `kid` header. To rotate, add the new key to
+    AUTH_SECRET_KEYS everywhere, then point AUTH_ACTIVE_KEY_ID at it, and
+    drop the old key once AUTH_TOKEN_TTL has passed.
+    """
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        keys: dict[str, str],
+        active_key_id: str,
+        algorithm: str,
+        ttl: int,
+        revocations: RevocationList,
+    ):
+        if active_key_id not in keys:
+            raise ValueError(
+                'AUTH_ACTIVE_KEY_ID must name one of AUTH_SECRET_KEYS'
+            )
+
+        self.keys = keys
+        self.active_key_id = active_key_id
+        self.algorithms = [algorithm]
+        self.ttl = ttl
+        self.revocations = revocations
+
+    def issue(self, user_id: UUID, role: UserRole) -> str:
+        now = int(time())
+
+        return jwt.encode(
+            {
+                'sub': str(user_id),
+                'role': role.value,
+                'jti': uuid4().hex,
+                'iat': now,
+                'exp': now + self.ttl,
+            },
+            self.keys[self.active_key_id],
+            algorithm=self.algorithms[0],
+            headers={'kid': self.active_key_id},
+        )
+
+    def verify(self, token: str) -> Principal:
+        try:
+            key = self.keys.get(jwt.get_unverified_header(token).get('kid'))
+
+            if key is None:
+                raise InvalidToken()
+
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=self.algorithms,
+                options={'require': REQUIRED_CLAIMS},
+            )
+
+            principal = Principal.model_construct(
+                user_id=UUID(claims['sub']),
+                role=UserRole(claims['role']),
+                jti=claims['jti'],
+                expires_at=claims['exp'],
+            )
+
+        except (jwt.InvalidTokenError, ValueError):
+            raise InvalidToken()
+
+        if self.revocations.is_revoked(principal.jti):
+            raise InvalidToken()
+
+        return principal
+
+    def revoke(self, principal: Principal):
+        self.revocations.revoke(principal.jti, principal.expires_at)
+
+
+_token_service: TokenService | None = None
+_token_service_lock = Lock()
+
+
+def _create_token_service(settings: Settings) -> TokenService:
+    return TokenService(
+        settings.AUTH_SECRET_KEYS,
+        settings.AUTH_ACTIVE_KEY_ID,
+        settings.AUTH_ALGORITHM,
+        settings.AUTH_TOKEN_TTL,
+        LocalRevocationList(settings.AUTH_REVOCATION_MAX_SIZE),
+    )
+
+
+def init_token_service(settings: Settings) -> TokenService:
+    """Replace the token service with one built from `settings`"""
+
+    global _token_service  # noqa: PLW0603
+
+    with _token_service_lock:
+        _token_service = _create_token_service(settings)
+
+        return _token_service
+
+
+def get_token_service() -> TokenService:
+    global _token_service  # noqa: PLW0603
+
+    with _token_service_lock:
+        if _token_service is None:
+            _token_service = _create_token_service(get_settings())
+
+        return _token_service
+
+
+def reset_token_service():
+    global _token_service  # noqa: PLW0603
+
+    with _token_service_lock:
+        _token_service = None
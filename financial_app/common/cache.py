@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Protocol
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str, ttl: float): ...
+
+    def delete(self, *keys: str): ...
+
+    def clear(self): ...
+
+    def stats(self) -> dict: ...
+
+
+class NullCache:
+    def get(self, key: str) -> str | None:  # noqa: PLR6301
+        return None
+
+    def set(self, key: str, value: str, ttl: float):
+        pass
+
+    def delete(self, *keys: str):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self) -> dict:  # noqa: PLR6301
+        return {'size': 0, 'evictions': 0}
+
+
+class LocalCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+
+            if expires_at <= monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+
+            return value
+
+    def set(self, key: str, value: str, ttl: float):
+        with self._lock:
+            self._entries[key] = (monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'size': len(self._entries), 'evictions': self.evictions}
+
+
+class SharedCacheClient(Protocol):
+    """Subset of the redis-py client used by SharedCache"""
+
+    def get(self, name: str) -> bytes | str | None: ...
+
+    def set(self, name: str, value: str, ex: int = None): ...
+
+    def delete(self, *names: str): ...
+
+
+class SharedCache:
+    def __init__(self, client: SharedCacheClient, prefix: str):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> str | None:
+        value = self.client.get(self.prefix + key)
+
+        if isinstance(value, bytes):
+            return value.decode()
+
+        return value
+
+    def set(self, key: str, value: str, ttl: float):
+        self.client.set(self.prefix + key, value, ex=max(int(ttl), 1))
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def clear(self):
+        pass
+
+    def stats(self) -> dict:  # noqa: PLR6301
+        return {'size': None, 'evictions': None}
@@ -0,0 +1,51 @@
+from datetime import UTC, datetime
+from email.utils import format_datetime
+from http import HTTPStatus
+
+from fastapi import Response
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+
+    return format_datetime(value.astimezone(UTC), usegmt=True)
+
+
+def parse_etags(header: str) -> list[str]:
+    return [etag.strip() for etag in header.split(',') if etag.strip()]
+
+
+def strip_weak(etag: str) -> str:
+    return etag.removeprefix('W/')
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """Weak comparison used by If-None-Match"""
+
+    if header is None:
+        return False
+
+    return any(
+        candidate == '*' or strip_weak(candidate) == strip_weak(etag)
+        for candidate in parse_etags(header)
+    )
+
+
+def conditional_response(
+    response: Response,
+    if_none_match: str | None,
+    etag: str,
+    last_modified: datetime | None,
+) -> Response | None:
+    headers = {'ETag': etag}
+
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+
+    return None
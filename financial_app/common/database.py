@@ -1,13 +1,290 @@
-from sqlalchemy import create_engine
+from datetime import UTC, datetime
+from threading import Lock
+from time import perf_counter
+
+from fastapi import Request
+from sqlalchemy import (
+    DateTime,
+    Engine,
+    String,
+    create_engine,
+    event,
+    make_url,
+)
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Session, registry
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from sqlalchemy.sql.functions import FunctionElement
+
+from .metrics import instrument_engine
+from .profiling import instrument_profiling
+from .ratelimit import SAFE_METHODS, caller_key
+from .replicas import RecentWrites, ReplicaSet
+from .settings import Settings, T_Settings
+
+# SQLite stores CURRENT_TIMESTAMP without microseconds, so bound datetimes
+# must use the same format to compare correctly against server defaults.
+Timestamp = DateTime().with_variant(
+    sqlite.DATETIME(truncate_microseconds=True), 'sqlite'
+)
+
+tables_registry = registry(type_annotation_map={datetime: Timestamp})
+
+
+class CodePointOrder(FunctionElement):
+    """Its argument, compared by code point whatever the collation
+
+    Prefix ranges only match "starts with" under such an order, and the
+    index must be built on the same expression to serve them.
+    """
+
+    inherit_cache = True
+    type = String()
+
+
+@compiles(CodePointOrder)
+def _compile_code_point_order(element, compiler, **kw):
+    # SQLite's default BINARY collation already compares code points
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(CodePointOrder, 'postgresql')
+def _compile_code_point_order_postgresql(element, compiler, **kw):
+    return f'{compiler.process(element.clauses, **kw)} COLLATE "C"'
+
+
+def utcnow() -> datetime:
+    """Naive UTC now, matching what CURRENT_TIMESTAMP stores"""
+
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+engine: Engine | None = None
+
+async_engine: AsyncEngine | None = None
+
+replicas: ReplicaSet | None = None
+
+recent_writes: RecentWrites | None = None
+
+
+class MonitoredPoolMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def connect(self):
+        started = perf_counter()
+
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+
+        waited = perf_counter() - started
+
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+
+        return connection
+
+
+class MonitoredQueuePool(MonitoredPoolMixin, QueuePool):
+    pass
+
+
+class MonitoredAsyncQueuePool(MonitoredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _uses_queue_pool(database_url: str) -> bool:
+    url = make_url(database_url)
+
+    if url.get_backend_name() != 'sqlite':
+        return True
+
+    return url.database not in {None, '', ':memory:'}
+
+
+def _engine_options(database_url: str, settings: Settings) -> dict:
+    if not _uses_queue_pool(database_url):
+        return {}
+
+    return {
+        'pool_size': settings.DATABASE_POOL_SIZE,
+        'max_overflow': settings.DATABASE_MAX_OVERFLOW,
+        'pool_timeout': settings.DATABASE_POOL_TIMEOUT,
+        'pool_recycle': settings.DATABASE_POOL_RECYCLE,
+        'pool_pre_ping': settings.DATABASE_POOL_PRE_PING,
+    }
+
+
+def _set_statement_timeout(engine: Engine, settings: Settings):
+    timeout = settings.DATABASE_STATEMENT_TIMEOUT
+
+    if timeout is None or engine.dialect.name != 'postgresql':
+        return
 
-from .settings import Settings
+    @event.listens_for(engine, 'connect')
+    def set_statement_timeout(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'SET statement_timeout = {int(timeout)}')
+        cursor.close()
+        dbapi_connection.commit()
 
-engine = create_engine(Settings().DATABASE_URL)
 
-tables_registry = registry()
+def create_database_engine(
+    settings: Settings, database_url: str = None
+) -> Engine:
+    database_url = database_url or settings.DATABASE_URL
+    options = _engine_options(database_url, settings)
 
+    if options:
+        options['poolclass'] = MonitoredQueuePool
+
+    database_engine = create_engine(database_url, **options)
+    _set_statement_timeout(database_engine, settings)
+    instrument_engine(database_engine)
+
+    if settings.QUERY_PROFILING:
+        instrument_profiling(database_engine)
+
+    return database_engine
+
+
+def create_async_database_engine(settings: Settings) -> AsyncEngine:
+    database_url = settings.ASYNC_DATABASE_URL or settings.DATABASE_URL
+    options = _engine_options(database_url, settings)
+
+    if options:
+        options['poolclass'] = MonitoredAsyncQueuePool
+
+    database_engine = create_async_engine(database_url, **options)
+    _set_statement_timeout(database_engine.sync_engine, settings)
+    instrument_engine(database_engine.sync_engine)
+
+    if settings.QUERY_PROFILING:
+        instrument_profiling(database_engine.sync_engine)
+
+    return database_engine
+
+
+def init_engines(settings: Settings):
+    global engine, async_engine, replicas, recent_writes  # noqa: PLW0603
+
+    engine = create_database_engine(settings)
+
+    if settings.DATABASE_REPLICA_URLS:
+        replicas = ReplicaSet(
+            [
+                create_database_engine(settings, replica_url)
+                for replica_url in settings.DATABASE_REPLICA_URLS
+            ],
+            settings.DATABASE_REPLICA_STRATEGY,
+            settings.DATABASE_REPLICA_RETRY_INTERVAL,
+        )
+        recent_writes = RecentWrites(settings.READ_YOUR_WRITES_WINDOW)
+
+    if settings.ASYNC_MODE:  # pragma: no cover
+        async_engine = create_async_database_engine(settings)
+
+
+async def dispose_engines():
+    global engine, async_engine, replicas, recent_writes  # noqa: PLW0603
+
+    if engine is not None:
+        engine.dispose()
+        engine = None
+
+    if replicas is not None:
+        replicas.dispose()
+        replicas = recent_writes = None
+
+    if async_engine is not None:  # pragma: no cover
+        await async_engine.dispose()
+        async_engine = None
+
+
+def get_pool_status(pool: Pool) -> dict:
+    status = {'status': pool.status()}
+
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+        })
+
+    if isinstance(pool, MonitoredPoolMixin):
+        status.update({
+            'checkouts': pool.checkouts,
+            'timeouts': pool.timeouts,
+            'wait_time_total': pool.wait_time_total,
+            'wait_time_max': pool.wait_time_max,
+        })
+
+    return status
+
+
+class ReadOnlySession(Session):
+    def flush(self, objects=None):
+        if self.new or self.dirty or self.deleted:
+            raise InvalidRequestError('Replica sessions are read-only')
+
+        super().flush(objects)
+
+
+def get_session(request: Request, settings: T_Settings):  # pragma: no cover
+    """Primary session; marks writing clients for read-your-writes"""
+
+    # Marked up front because exit code runs after the response is sent,
+    # when the client may already be reading again.
+    if recent_writes is not None and request.method not in SAFE_METHODS:
+        recent_writes.record(caller_key(request, settings))
 
-def get_session():  # pragma: no cover
     with Session(engine) as session:
         yield session
+
+
+def get_read_session(
+    request: Request, settings: T_Settings
+):  # pragma: no cover
+    """Replica session for reads, the primary after a recent write"""
+
+    replica = None
+
+    if replicas is not None and not recent_writes.is_recent(
+        caller_key(request, settings)
+    ):
+        replica = replicas.choose()
+
+    if replica is None:
+        with Session(engine) as session:
+            yield session
+
+        return
+
+    with ReadOnlySession(replica) as session:
+        yield session
+
+
+async def get_async_session():  # pragma: no cover
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
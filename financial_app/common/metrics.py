@@ -0,0 +1,301 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from threading import Lock
+from time import perf_counter
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import Engine, event
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ''
+
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('"', r'\"'))
+        for name, value in zip(names, values)
+    )
+
+    return '{' + pairs + '}'
+
+
+class Metric:
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = Lock()
+        self._values = {}
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            return [
+                f'{self.name}{_format_labels(self.label_names, labels)} '
+                f'{value}'
+                for labels, value in self._values.items()
+            ]
+
+    def render(self) -> str:
+        return '\n'.join([
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type}',
+            *self.samples(),
+        ])
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels=(),
+        buckets=DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value: float):
+        with self._lock:
+            counts, total = self._values.get(
+                labels, ([0] * (len(self.buckets) + 1), 0.0)
+            )
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[labels] = (counts, total + value)
+
+    def samples(self) -> list[str]:
+        names = (*self.label_names, 'le')
+        samples = []
+
+        with self._lock:
+            for labels, (counts, total) in self._values.items():
+                cumulative = 0
+
+                for bound, count in zip((*self.buckets, '+Inf'), counts):
+                    cumulative += count
+                    bucket_labels = _format_labels(names, (*labels, bound))
+                    samples.append(
+                        f'{self.name}_bucket{bucket_labels} {cumulative}'
+                    )
+
+                label_text = _format_labels(self.label_names, labels)
+                samples.extend([
+                    f'{self.name}_sum{label_text} {total}',
+                    f'{self.name}_count{label_text} {cumulative}',
+                ])
+
+        return samples
+
+
+REQUESTS = Counter(
+    'http_requests_total',
+    'HTTP requests by method, route and status code',
+    ('method', 'route', 'status'),
+)
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by method and route',
+    ('method', 'route'),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'HTTP requests currently being handled'
+)
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Database statements issued per HTTP request',
+    ('method', 'route'),
+    QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    'http_request_db_duration_seconds',
+    'Database time spent per HTTP request',
+    ('method', 'route'),
+)
+
+METRICS = [
+    REQUESTS,
+    REQUEST_DURATION,
+    REQUESTS_IN_FLIGHT,
+    REQUEST_DB_QUERIES,
+    REQUEST_DB_DURATION,
+]
+
+
+@dataclass
+class RequestTimings:
+    db: float = 0.0
+    db_queries: int = 0
+    hashing: float = 0.0
+    # Encoding the response body only; FastAPI's response model
+    # validation and jsonable_encoder pass count toward `total`
+    rendering: float = 0.0
+
+    def server_timing(self, total: float) -> str:
+        return ', '.join([
+            f'db;dur={self.db * 1000:.2f};desc="{self.db_queries} queries"',
+            f'hash;dur={self.hashing * 1000:.2f}',
+            f'render;dur={self.rendering * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+
+_request_timings: ContextVar[RequestTimings | None] = ContextVar(
+    'request_timings', default=None
+)
+
+
+def current_timings() -> RequestTimings | None:
+    return _request_timings.get()
+
+
+def record_hashing(elapsed: float):
+    timings = current_timings()
+
+    if timings is not None:
+        timings.hashing += elapsed
+
+
+def _before_cursor_execute(conn, **kw):
+    conn.info.setdefault('query_started', []).append(perf_counter())
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    connection = context.connection
+
+    if (
+        context.execution_context is not None
+        and connection is not None
+        and connection.info.get('query_started')
+    ):
+        connection.info['query_started'].pop()
+
+
+def _after_cursor_execute(conn, **kw):
+    elapsed = perf_counter() - conn.info['query_started'].pop()
+    timings = current_timings()
+
+    if timings is not None:
+        timings.db += elapsed
+        timings.db_queries += 1
+
+
+def instrument_engine(engine: Engine):
+    event.listen(
+        engine, 'before_cursor_execute', _before_cursor_execute, named=True
+    )
+    event.listen(
+        engine, 'after_cursor_execute', _after_cursor_execute, named=True
+    )
+    event.listen(engine, 'handle_error', _handle_error)
+
+
+class TimedJSONResponse(JSONResponse):
+    def serialize(self, content) -> bytes:
+        return super().render(content)
+
+    def render(self, content) -> bytes:
+        started = perf_counter()
+        body = self.serialize(content)
+        timings = current_timings()
+
+        if timings is not None:
+            timings.rendering += perf_counter() - started
+
+        return body
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+        started = perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                headers = list(message.get('headers', []))
+                headers.append((
+                    b'server-timing',
+                    timings.server_timing(perf_counter() - started).encode(),
+                ))
+                message = {**message, 'headers': headers}
+
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            _request_timings.reset(token)
+
+            route = scope.get('route')
+            labels = (scope['method'], getattr(route, 'path', 'unmatched'))
+
+            REQUESTS.inc(*labels, str(status))
+            REQUEST_DURATION.observe(*labels, value=perf_counter() - started)
+            REQUEST_DB_QUERIES.observe(*labels, value=timings.db_queries)
+            REQUEST_DB_DURATION.observe(*labels, value=timings.db)
+
+
+def render_metrics(extra: list[Metric] = ()) -> str:
+    return '\n'.join(metric.render() for metric in [*METRICS, *extra]) + '\n'
@@ -0,0 +1,21 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from uuid import UUID
+
+from .responses import InvalidCursor
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    payload = json.dumps([created_at.isoformat(), str(id)])
+
+    return urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_at, id = json.loads(urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), UUID(id)
+
+    except (TypeError, ValueError):
+        raise InvalidCursor()
@@ -0,0 +1,231 @@
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from threading import Lock
+from time import perf_counter
+
+from sqlalchemy import Engine, event
+
+from .settings import Settings
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_PREFIXES = {'sqlite': 'EXPLAIN QUERY PLAN '}
+
+# A failed statement leaves SQLite transactions usable, and pysqlite
+# needs driver workarounds for savepoints
+SAVEPOINT_FREE_DIALECTS = {'sqlite'}
+
+# Password hashes and stored idempotency requests and responses, under
+# their column names or the numbered names of WHERE clause binds
+REDACTED_PARAMETER = re.compile(r'(password|fingerprint|response)(_\d+)*')
+
+REDACTED = '<redacted>'
+
+
+@dataclass
+class ProfiledQuery:
+    statement: str
+    parameters: object
+    duration: float
+
+
+@dataclass
+class QueryProfile:
+    queries: list[ProfiledQuery] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        counts = Counter(query.statement for query in self.queries)
+
+        return {
+            statement: count
+            for statement, count in counts.items()
+            if count >= threshold
+        }
+
+
+@dataclass
+class ProfilerConfig:
+    enabled: bool = False
+    slow_query_threshold: float = 0.1
+    repeated_query_threshold: int = 3
+
+
+config = ProfilerConfig()
+
+_request_profile: ContextVar[QueryProfile | None] = ContextVar(
+    'request_profile', default=None
+)
+_captures: list[QueryProfile] = []
+_captures_lock = Lock()
+
+
+def configure(settings: Settings):
+    config.enabled = settings.QUERY_PROFILING
+    config.slow_query_threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+    config.repeated_query_threshold = settings.REPEATED_QUERY_THRESHOLD
+
+
+@contextmanager
+def capture_queries():
+    """Collect every statement run on a profiled engine, from any thread"""
+
+    profile = QueryProfile()
+
+    with _captures_lock:
+        _captures.append(profile)
+
+    try:
+        yield profile
+    finally:
+        with _captures_lock:
+            _captures.remove(profile)
+
+
+def _redact_row(parameters, names: list[str] | None):
+    if isinstance(parameters, dict):
+        return {
+            name: REDACTED if REDACTED_PARAMETER.fullmatch(name) else value
+            for name, value in parameters.items()
+        }
+
+    # Raw driver SQL has no bind names to tell secrets apart
+    if names is None:
+        return tuple(REDACTED for _ in parameters)
+
+    return tuple(
+        REDACTED if REDACTED_PARAMETER.fullmatch(name) else value
+        for name, value in zip(names, parameters)
+    )
+
+
+def redact_parameters(parameters, context, executemany: bool):
+    """Parameters fit for a log, with secret values replaced"""
+
+    compiled = getattr(context, 'compiled', None)
+    names = getattr(compiled, 'positiontup', None)
+
+    if executemany:
+        return [_redact_row(row, names) for row in parameters]
+
+    return _redact_row(parameters, names)
+
+
+def _run_explain(conn, statement: str, parameters) -> str:
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name, 'EXPLAIN ')
+    rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+
+    return '\n'.join(' '.join(map(str, row)) for row in rows)
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    conn.info['explaining'] = True
+
+    try:
+        if conn.dialect.name in SAVEPOINT_FREE_DIALECTS:
+            return _run_explain(conn, statement, parameters)
+
+        # A failed EXPLAIN would otherwise abort the request's transaction
+        with conn.begin_nested():
+            return _run_explain(conn, statement, parameters)
+
+    except Exception as error:  # noqa: BLE001
+        return f'EXPLAIN failed: {error}'
+
+    finally:
+        conn.info['explaining'] = False
+
+
+def _before_cursor_execute(conn, **kw):
+    if not conn.info.get('explaining'):
+        conn.info.setdefault('profile_started', []).append(perf_counter())
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    connection = context.connection
+
+    if (
+        context.execution_context is not None
+        and connection is not None
+        and not connection.info.get('explaining')
+        and connection.info.get('profile_started')
+    ):
+        connection.info['profile_started'].pop()
+
+
+def _after_cursor_execute(  # noqa: PLR0913, PLR0917
+    conn, statement, parameters, context, executemany, **kw
+):
+    if conn.info.get('explaining'):
+        return
+
+    duration = perf_counter() - conn.info['profile_started'].pop()
+    query = ProfiledQuery(statement, parameters, duration)
+    request_profile = _request_profile.get()
+
+    if request_profile is not None:
+        request_profile.queries.append(query)
+
+    with _captures_lock:
+        for profile in _captures:
+            profile.queries.append(query)
+
+    if config.enabled and duration >= config.slow_query_threshold:
+        plan = '' if executemany else _explain(conn, statement, parameters)
+        logger.warning(
+            'Slow query (%.1f ms): %s\nParameters: %r\nPlan:\n%s',
+            duration * 1000,
+            statement,
+            redact_parameters(parameters, context, executemany),
+            plan,
+        )
+
+
+def instrument_profiling(engine: Engine):
+    event.listen(
+        engine, 'before_cursor_execute', _before_cursor_execute, named=True
+    )
+    event.listen(
+        engine, 'after_cursor_execute', _after_cursor_execute, named=True
+    )
+    event.listen(engine, 'handle_error', _handle_error)
+
+
+def report_repeated_queries(profile: QueryProfile, route: str):
+    for statement, count in profile.repeated(
+        config.repeated_query_threshold
+    ).items():
+        logger.warning(
+            'Possible N+1 on %s: statement ran %d times: %s',
+            route,
+            count,
+            statement,
+        )
+
+
+class QueryProfilerMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not config.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+        token = _request_profile.set(profile)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_profile.reset(token)
+
+            route = getattr(scope.get('route'), 'path', scope['path'])
+            report_repeated_queries(profile, f'{scope["method"]} {route}')
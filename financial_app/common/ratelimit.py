@@ -0,0 +1,302 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Protocol
+
+from fastapi import Request
+
+from financial_app.auth.dependencies import peek_principal
+
+from .responses import ServerBusy, TooManyRequests
+from .settings import Settings, T_Settings, get_settings
+
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+class BucketStore(Protocol):
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Take a token, returning 0 or the seconds until one is free"""
+
+    def stats(self) -> dict: ...
+
+
+class NullBucketStore:
+    def take(self, key: str, rate: float, burst: int) -> float:  # noqa: PLR6301
+        return 0.0
+
+    def stats(self) -> dict:  # noqa: PLR6301
+        return {'keys': None}
+
+
+class LocalBucketStore:
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = Lock()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        now = monotonic()
+
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            retry_after = 0.0
+
+            if tokens < 1:
+                retry_after = (1 - tokens) / rate
+            else:
+                tokens -= 1
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+
+            # A dropped bucket comes back full, which only forgives idle
+            # clients since busy ones stay at the recent end.
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+            return retry_after
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'keys': len(self._buckets)}
+
+
+class SharedBucketClient(Protocol):
+    """Subset of the redis-py client used by SharedBucketStore"""
+
+    def eval(self, script: str, numkeys: int, *keys_and_args): ...
+
+
+# Refill and take in one round trip, on the Redis clock so that every
+# app server sees the same time.
+TAKE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or burst
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + (now - updated_at) * rate)
+local retry_after = 0
+if tokens < 1 then
+    retry_after = (1 - tokens) / rate
+else
+    tokens = tokens - 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class SharedBucketStore:
+    def __init__(self, client: SharedBucketClient, prefix: str):
+        self.client = client
+        self.prefix = prefix
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        retry_after = self.client.eval(
+            TAKE_TOKEN_SCRIPT, 1, self.prefix + key, rate, burst
+        )
+
+        return float(retry_after)
+
+    def stats(self) -> dict:  # noqa: PLR6301
+        return {'keys': None}
+
+
+class ConcurrencyLimiter:
+    """Admits up to `limit` requests at once and rejects the rest"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.rejected = 0
+        self._lock = Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.limit and self.active >= self.limit:
+                self.rejected += 1
+                return False
+
+            self.active += 1
+
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+
+class RateLimiter:
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        store: BucketStore,
+        read_rate: float,
+        read_burst: int,
+        write_rate: float,
+        write_burst: int,
+        write_concurrency: int,
+    ):
+        self.store = store
+        self.read_limit = (read_rate, read_burst)
+        self.write_limit = (write_rate, write_burst)
+        self.writes = ConcurrencyLimiter(write_concurrency)
+        self.limited = 0
+        self._stats_lock = Lock()
+
+    def take(self, key: str, write: bool) -> float:
+        rate, burst = self.write_limit if write else self.read_limit
+        retry_after = self.store.take(key, rate, burst)
+
+        if retry_after:
+            with self._stats_lock:
+                self.limited += 1
+
+        return retry_after
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            limited = self.limited
+
+        return {
+            'backend': type(self.store).__name__,
+            'limited': limited,
+            'write_limit': self.writes.limit,
+            'write_active': self.writes.active,
+            'write_rejected': self.writes.rejected,
+            **self.store.stats(),
+        }
+
+
+def create_bucket_store(settings: Settings) -> BucketStore:
+    if settings.RATE_LIMIT_BACKEND == 'local':
+        return LocalBucketStore(settings.RATE_LIMIT_MAX_KEYS)
+
+    if settings.RATE_LIMIT_BACKEND == 'redis':  # pragma: no cover
+        from redis import Redis  # noqa: PLC0415
+
+        return SharedBucketStore(
+            Redis.from_url(settings.RATE_LIMIT_URL), 'financial_app:rate:'
+        )
+
+    return NullBucketStore()
+
+
+_rate_limiter: RateLimiter | None = None
+_rate_limiter_lock = Lock()
+
+
+def _create_rate_limiter(settings: Settings) -> RateLimiter:
+    return RateLimiter(
+        create_bucket_store(settings),
+        settings.RATE_LIMIT_READ_RATE,
+        settings.RATE_LIMIT_READ_BURST,
+        settings.RATE_LIMIT_WRITE_RATE,
+        settings.RATE_LIMIT_WRITE_BURST,
+        settings.WRITE_CONCURRENCY_LIMIT,
+    )
+
+
+def init_rate_limiter(settings: Settings) -> RateLimiter:
+    """Replace the rate limiter with one built from `settings`"""
+
+    global _rate_limiter  # noqa: PLW0603
+
+    with _rate_limiter_lock:
+        _rate_limiter = _create_rate_limiter(settings)
+
+        return _rate_limiter
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter  # noqa: PLW0603
+
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = _create_rate_limiter(get_settings())
+
+        return _rate_limiter
+
+
+def reset_rate_limiter():
+    global _rate_limiter  # noqa: PLW0603
+
+    with _rate_limiter_lock:
+        _rate_limiter = None
+
+
+def client_host(request: Request) -> str:
+    return request.client.host if request.client else 'unknown'
+
+
+def forwarded_client_host(request: Request, trusted_proxies: list[str]) -> str:
+    """Client address, taken from X-Forwarded-For behind trusted proxies
+
+    Hops are read from the right and the first untrusted one wins, since
+    anything left of it was written by the client itself.
+    """
+
+    host = client_host(request)
+
+    if host not in trusted_proxies:
+        return host
+
+    hops = request.headers.get('x-forwarded-for', '').split(',')
+
+    for hop in reversed([hop.strip() for hop in hops if hop.strip()]):
+        if hop not in trusted_proxies:
+            return hop
+
+    return host
+
+
+def caller_key(request: Request, settings: Settings) -> str:
+    """Who is calling: the user, else the client address
+
+    Users behind one NAT or proxy would otherwise share everything keyed
+    on the caller.
+    """
+
+    principal = peek_principal(request)
+
+    if principal is not None:
+        return f'user:{principal.user_id}'
+
+    return forwarded_client_host(request, settings.TRUSTED_PROXIES)
+
+
+def client_key(request: Request, settings: Settings) -> str:
+    route = request.scope.get('route')
+    path = route.path if route is not None else request.url.path
+
+    return f'{caller_key(request, settings)}:{request.method}:{path}'
+
+
+def rate_limit(request: Request, settings: T_Settings):
+    """Dependency enforcing the per caller and route token bucket"""
+
+    retry_after = get_rate_limiter().take(
+        client_key(request, settings), request.method not in SAFE_METHODS
+    )
+
+    if retry_after:
+        raise TooManyRequests(retry_after)
+
+
+async def limit_write_concurrency():
+    """Dependency shedding expensive writes above the concurrency limit"""
+
+    writes = get_rate_limiter().writes
+
+    if not writes.try_acquire():
+        raise ServerBusy()
+
+    try:
+        yield
+
+    finally:
+        writes.release()
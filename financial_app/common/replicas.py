@@ -0,0 +1,147 @@
+from collections import OrderedDict
+from itertools import count
+from threading import Lock
+from time import monotonic
+
+from sqlalchemy import Engine, event, text
+from sqlalchemy.exc import DBAPIError
+
+
+def _checked_out(engine: Engine) -> int:
+    checkedout = getattr(engine.pool, 'checkedout', None)
+
+    return checkedout() if checkedout is not None else 0
+
+
+class ReplicaSet:
+    """Read replicas picked by round robin or least connections
+
+    A replica is evicted when connecting to it fails or a connection is
+    lost, and probed again with `SELECT 1` once `retry_interval` has passed.
+    """
+
+    def __init__(
+        self, engines: list[Engine], strategy: str, retry_interval: float
+    ):
+        self.engines = engines
+        self.strategy = strategy
+        self.retry_interval = retry_interval
+        self.evictions = 0
+        self._evicted: dict[Engine, float] = {}
+        self._turns = count()
+        self._lock = Lock()
+
+        for engine in engines:
+            event.listen(engine, 'handle_error', self._on_error)
+
+    def _on_error(self, context):
+        # No connection means the error came from connecting
+        if context.is_disconnect or context.connection is None:
+            self.evict(context.engine)
+
+    def evict(self, engine: Engine):
+        with self._lock:
+            if engine not in self._evicted:
+                self.evictions += 1
+
+            self._evicted[engine] = monotonic() + self.retry_interval
+
+    def probe(self, engine: Engine) -> bool:
+        try:
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+
+        except DBAPIError:
+            self.evict(engine)
+            return False
+
+        with self._lock:
+            self._evicted.pop(engine, None)
+
+        return True
+
+    def healthy(self) -> list[Engine]:
+        now = monotonic()
+
+        with self._lock:
+            due = [
+                engine
+                for engine, retry_at in self._evicted.items()
+                if retry_at <= now
+            ]
+            # Push the next probe out so concurrent requests don't pile on
+            for engine in due:
+                self._evicted[engine] = now + self.retry_interval
+
+        for engine in due:
+            self.probe(engine)
+
+        with self._lock:
+            return [
+                engine
+                for engine in self.engines
+                if engine not in self._evicted
+            ]
+
+    def choose(self) -> Engine | None:
+        """Replica for the next read, None when every replica is evicted"""
+
+        healthy = self.healthy()
+
+        if not healthy:
+            return None
+
+        if self.strategy == 'least_connections':
+            return min(healthy, key=_checked_out)
+
+        return healthy[next(self._turns) % len(healthy)]
+
+    def dispose(self):
+        for engine in self.engines:
+            engine.dispose()
+
+    def stats(self) -> dict:
+        with self._lock:
+            evicted = len(self._evicted)
+
+        return {
+            'strategy': self.strategy,
+            'replicas': len(self.engines),
+            'evicted': evicted,
+            'evictions': self.evictions,
+        }
+
+
+class RecentWrites:
+    """Clients that wrote within `window` seconds, for read-your-writes
+
+    Tracked per process, so stickiness only holds on the instance that
+    served the write.
+    """
+
+    def __init__(self, window: float, max_clients: int = 100000):
+        self.window = window
+        self.max_clients = max_clients
+        self._writes: OrderedDict[str, float] = OrderedDict()
+        self._lock = Lock()
+
+    def record(self, client: str):
+        with self._lock:
+            self._writes[client] = monotonic() + self.window
+            self._writes.move_to_end(client)
+
+            while len(self._writes) > self.max_clients:
+                self._writes.popitem(last=False)
+
+    def is_recent(self, client: str) -> bool:
+        with self._lock:
+            sticky_until = self._writes.get(client)
+
+            if sticky_until is None:
+                return False
+
+            if sticky_until <= monotonic():
+                del self._writes[client]
+                return False
+
+            return True
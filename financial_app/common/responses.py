@@ -0,0 +1,44 @@
+from http import HTTPStatus
+from math import ceil
+
+from fastapi.exceptions import HTTPException
+
+
+class InvalidCursor(HTTPException):
+    def __init__(self):
+        super().__init__(HTTPStatus.BAD_REQUEST, 'Cursor is not valid')
+
+
+class HashingUnavailable(HTTPException):
+    def __init__(self):
+        super().__init__(
+            HTTPStatus.SERVICE_UNAVAILABLE,
+            'Password hashing is busy, try again later',
+            headers={'Retry-After': '1'},
+        )
+
+
+class UnsupportedMediaType(HTTPException):
+    def __init__(self):
+        super().__init__(
+            HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+            'Content type must be application/x-ndjson or text/csv',
+        )
+
+
+class TooManyRequests(HTTPException):
+    def __init__(self, retry_after: float):
+        super().__init__(
+            HTTPStatus.TOO_MANY_REQUESTS,
+            'Rate limit exceeded, try again later',
+            headers={'Retry-After': str(max(ceil(retry_after), 1))},
+        )
+
+
+class ServerBusy(HTTPException):
+    def __init__(self):
+        super().__init__(
+            HTTPStatus.SERVICE_UNAVAILABLE,
+            'Too many concurrent writes, try again later',
+            headers={'Retry-After': '1'},
+        )
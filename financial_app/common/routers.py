@@ -0,0 +1,144 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from financial_app.common import database, security
+from financial_app.common.metrics import Gauge, render_metrics
+from financial_app.common.ratelimit import get_rate_limiter
+from financial_app.common.singleflight import get_coalescing_stats
+from financial_app.users.cache import get_user_cache
+
+from .schemas import (
+    CacheStatus,
+    CoalescingStatus,
+    HashingStatus,
+    PrimaryPoolStatus,
+    RateLimitStatus,
+    ReplicaStatus,
+)
+
+router = APIRouter(prefix='/admin', tags=['Admin'])
+
+metrics_router = APIRouter(tags=['Metrics'])
+
+
+@router.get('/pool', status_code=HTTPStatus.OK)
+def get_pool_status() -> PrimaryPoolStatus:
+    """Get connection pool usage of the primary database engines
+
+    `async_pool` reports the engine serving requests in ASYNC_MODE; the
+    sync pool still serves the background jobs.
+    """
+
+    status = database.get_pool_status(database.engine.pool)
+
+    if database.async_engine is not None:
+        status['async_pool'] = database.get_pool_status(
+            database.async_engine.sync_engine.pool
+        )
+
+    return status
+
+
+@router.get('/replicas', status_code=HTTPStatus.OK)
+def get_replica_status() -> ReplicaStatus:
+    """Get read replica health, probing evicted replicas that are due"""
+
+    if database.replicas is None:
+        return ReplicaStatus()
+
+    database.replicas.healthy()
+
+    return database.replicas.stats()
+
+
+@router.get('/hashing', status_code=HTTPStatus.OK)
+def get_hashing_status() -> HashingStatus:
+    """Get queue depth and latency of the password hashing pool"""
+
+    return security.get_password_hasher().stats()
+
+
+@router.get('/cache', status_code=HTTPStatus.OK)
+def get_cache_status() -> CacheStatus:
+    """Get hit, miss and eviction counters of the user cache"""
+
+    return get_user_cache().stats()
+
+
+@router.get('/coalescing', status_code=HTTPStatus.OK)
+def get_coalescing_status() -> CoalescingStatus:
+    """Get coalesced reads; `shared` counts the queries saved"""
+
+    return get_coalescing_stats()
+
+
+@router.get('/ratelimit', status_code=HTTPStatus.OK)
+def get_rate_limit_status() -> RateLimitStatus:
+    """Get rate limited requests and write concurrency usage"""
+
+    return get_rate_limiter().stats()
+
+
+def _status_gauge(name: str, documentation: str, status: dict) -> Gauge:
+    gauge = Gauge(name, documentation, ('stat',))
+
+    for stat, value in status.items():
+        if isinstance(value, (int, float)):
+            gauge.set(stat, value=value)
+
+    return gauge
+
+
+@metrics_router.get(
+    '/metrics', status_code=HTTPStatus.OK, response_class=PlainTextResponse
+)
+def get_metrics() -> str:
+    """Expose metrics in the Prometheus text format"""
+
+    gauges = [
+        _status_gauge(
+            'db_pool',
+            'Primary database pool status',
+            database.get_pool_status(database.engine.pool),
+        ),
+        _status_gauge(
+            'user_cache', 'User cache status', get_user_cache().stats()
+        ),
+        _status_gauge(
+            'rate_limit',
+            'Rate limiting and write admission status',
+            get_rate_limiter().stats(),
+        ),
+        _status_gauge(
+            'read_coalescing',
+            'Coalesced identical reads',
+            get_coalescing_stats(),
+        ),
+    ]
+
+    if database.async_engine is not None:
+        gauges.append(
+            _status_gauge(
+                'db_async_pool',
+                'Primary async database pool status',
+                database.get_pool_status(
+                    database.async_engine.sync_engine.pool
+                ),
+            )
+        )
+
+    # Scrapes must not spawn the hashing pool before anyone logs in
+    hasher = security.peek_password_hasher()
+
+    if hasher is not None:
+        gauges.append(
+            _status_gauge(
+                'password_hashing',
+                'Password hashing pool status',
+                hasher.stats(),
+            )
+        )
+
+    return render_metrics(gauges)
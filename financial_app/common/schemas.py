@@ -3,3 +3,58 @@ from pydantic import BaseModel
 
 class Message(BaseModel):
     message: str
+
+
+class PoolStatus(BaseModel):
+    status: str
+    size: int | None = None
+    checked_in: int | None = None
+    checked_out: int | None = None
+    overflow: int | None = None
+    checkouts: int | None = None
+    timeouts: int | None = None
+    wait_time_total: float | None = None
+    wait_time_max: float | None = None
+
+
+class PrimaryPoolStatus(PoolStatus):
+    async_pool: PoolStatus | None = None
+
+
+class HashingStatus(BaseModel):
+    workers: int
+    capacity: int
+    in_flight: int
+    queue_depth: int
+    hashes: int
+    rejected: int
+    latency_total: float
+    latency_max: float
+
+
+class CacheStatus(BaseModel):
+    hits: int
+    misses: int
+    size: int | None = None
+    evictions: int | None = None
+
+
+class CoalescingStatus(BaseModel):
+    calls: int
+    shared: int
+
+
+class RateLimitStatus(BaseModel):
+    backend: str
+    keys: int | None = None
+    limited: int
+    write_limit: int
+    write_active: int
+    write_rejected: int
+
+
+class ReplicaStatus(BaseModel):
+    strategy: str | None = None
+    replicas: int = 0
+    evicted: int = 0
+    evictions: int = 0
@@ -1,7 +1,278 @@
-from pwdlib import PasswordHash
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from threading import BoundedSemaphore, Lock
+from time import perf_counter
 
-pwd_context = PasswordHash.recommended()
+from .metrics import record_hashing
+from .responses import HashingUnavailable
+from .settings import Settings, get_settings
+
+SLOT_WAIT_INTERVAL = 0.01
+
+DUMMY_PASSWORD = 'dummy-password'
+
+_worker_context = None
+
+
+def _init_worker(time_cost: int, memory_cost: int, parallelism: int):
+    global _worker_context  # noqa: PLW0603
+
+    # Only the hashing processes need pwdlib and Argon2
+    from pwdlib import PasswordHash  # noqa: PLC0415
+    from pwdlib.hashers.argon2 import Argon2Hasher  # noqa: PLC0415
+
+    _worker_context = PasswordHash((
+        Argon2Hasher(
+            time_cost=time_cost,
+            memory_cost=memory_cost,
+            parallelism=parallelism,
+        ),
+    ))
+
+
+def _hash_in_worker(password: str) -> str:
+    return _worker_context.hash(password)
+
+
+def _verify_in_worker(password: str, password_hash: str) -> bool:
+    return _worker_context.verify(password, password_hash)
+
+
+class PasswordHasher:
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        workers: int,
+        max_queue: int,
+        time_cost: int,
+        memory_cost: int,
+        parallelism: int,
+    ):
+        self.workers = workers
+        self.capacity = workers + max_queue
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(time_cost, memory_cost, parallelism),
+        )
+        self._slots = BoundedSemaphore(self.capacity)
+        self._stats_lock = Lock()
+        self.in_flight = 0
+        self.hashes = 0
+        self.rejected = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._dummy_hash: str | None = None
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise HashingUnavailable()
+
+        with self._stats_lock:
+            self.in_flight += 1
+
+    def _release(self, started: float):
+        elapsed = perf_counter() - started
+        record_hashing(elapsed)
+
+        with self._stats_lock:
+            self.in_flight -= 1
+            self.hashes += 1
+            self.latency_total += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+
+        self._slots.release()
+
+    def hash(self, password: str) -> str:
+        self._acquire()
+        started = perf_counter()
+
+        try:
+            return self._executor.submit(_hash_in_worker, password).result()
+        finally:
+            self._release(started)
+
+    async def hash_async(self, password: str) -> str:
+        self._acquire()
+        started = perf_counter()
+
+        try:
+            return await asyncio.wrap_future(
+                self._executor.submit(_hash_in_worker, password)
+            )
+        finally:
+            self._release(started)
+
+    def _acquire_free(self, wanted: int) -> int:
+        # Takes up to `wanted` free slots without blocking
+        acquired = 0
+
+        while acquired < wanted and self._slots.acquire(blocking=False):
+            acquired += 1
+
+        with self._stats_lock:
+            self.in_flight += acquired
+
+        return acquired
+
+    async def _hash_in_slot(self, password: str) -> str:
+        started = perf_counter()
+
+        try:
+            return await asyncio.wrap_future(
+                self._executor.submit(_hash_in_worker, password)
+            )
+        finally:
+            self._release(started)
+
+    async def hash_many_async(self, passwords: list[str]) -> list[str]:
+        """Hash a batch through the queue, one slot per password
+
+        Each round takes only the free slots, so the queue depth counts
+        every pending hash, and a full queue is waited on, not rejected.
+        """
+
+        password_hashes = []
+
+        while len(password_hashes) < len(passwords):
+            acquired = self._acquire_free(
+                len(passwords) - len(password_hashes)
+            )
+
+            if not acquired:
+                await asyncio.sleep(SLOT_WAIT_INTERVAL)
+                continue
+
+            chunk = passwords[
+                len(password_hashes) : len(password_hashes) + acquired
+            ]
+            password_hashes.extend(
+                await asyncio.gather(
+                    *(self._hash_in_slot(password) for password in chunk)
+                )
+            )
+
+        return password_hashes
+
+    async def verify_async(self, password: str, password_hash: str) -> bool:
+        self._acquire()
+        started = perf_counter()
+
+        try:
+            return await asyncio.wrap_future(
+                self._executor.submit(
+                    _verify_in_worker, password, password_hash
+                )
+            )
+        finally:
+            self._release(started)
+
+    async def dummy_hash_async(self) -> str:
+        """Hash made with this hasher's costs, to check against no user"""
+
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash_async(DUMMY_PASSWORD)
+
+        return self._dummy_hash
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                'workers': self.workers,
+                'capacity': self.capacity,
+                'in_flight': self.in_flight,
+                'queue_depth': max(self.in_flight - self.workers, 0),
+                'hashes': self.hashes,
+                'rejected': self.rejected,
+                'latency_total': self.latency_total,
+                'latency_max': self.latency_max,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+_hasher: PasswordHasher | None = None
+_hasher_lock = Lock()
+
+
+def _create_password_hasher(settings: Settings) -> PasswordHasher:
+    return PasswordHasher(
+        workers=settings.PASSWORD_HASH_WORKERS,
+        max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+        time_cost=settings.ARGON2_TIME_COST,
+        memory_cost=settings.ARGON2_MEMORY_COST,
+        parallelism=settings.ARGON2_PARALLELISM,
+    )
+
+
+def init_password_hasher(settings: Settings) -> PasswordHasher:
+    """Replace the hasher with one built from `settings`
+
+    Worker processes still spawn on the first hash.
+    """
+
+    global _hasher  # noqa: PLW0603
+
+    with _hasher_lock:
+        if _hasher is not None:
+            _hasher.shutdown()
+
+        _hasher = _create_password_hasher(settings)
+
+        return _hasher
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _hasher  # noqa: PLW0603
+
+    with _hasher_lock:
+        if _hasher is None:
+            _hasher = _create_password_hasher(get_settings())
+
+        return _hasher
+
+
+def peek_password_hasher() -> PasswordHasher | None:
+    """The running hasher, without spawning one for a read-only caller"""
+
+    with _hasher_lock:
+        return _hasher
+
+
+def shutdown_password_hasher():
+    global _hasher  # noqa: PLW0603
+
+    with _hasher_lock:
+        if _hasher is not None:
+            _hasher.shutdown()
+            _hasher = None
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_password_hasher().hash(password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await get_password_hasher().hash_async(password)
+
+
+async def verify_password_async(
+    password: str, password_hash: str | None
+) -> bool:
+    """Check `password`, failing after a dummy check when there is no hash
+
+    Unknown usernames then cost as much as wrong passwords, so response
+    times do not reveal which usernames exist.
+    """
+
+    hasher = get_password_hasher()
+
+    if password_hash is None:
+        await hasher.verify_async(password, await hasher.dummy_hash_async())
+        return False
+
+    return await hasher.verify_async(password, password_hash)
@@ -0,0 +1,35 @@
+from fastapi import Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+from financial_app.common.metrics import TimedJSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+
+    return to_json(content)
+
+
+class FastJSONResponse(TimedJSONResponse):
+    """JSON response encoded with orjson, or pydantic-core without it"""
+
+    def serialize(self, content) -> bytes:  # noqa: PLR6301
+        return dumps(content)
+
+
+def fast_json_response(
+    adapter: TypeAdapter, content, response: Response = None
+) -> FastJSONResponse:
+    """Render trusted content through its response model, skipping the
+    validation and `jsonable_encoder` passes FastAPI would run"""
+
+    headers = response.headers if response is not None else None
+
+    return FastJSONResponse(adapter.dump_python(content), headers=headers)
@@ -1,3 +1,7 @@
+from functools import cache
+from typing import Annotated, Literal
+
+from fastapi import Depends, Request
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,3 +13,87 @@ class Settings(BaseSettings):
     )
 
     DATABASE_URL: str
+    ASYNC_MODE: bool = False
+    # Needs an async driver, e.g. postgresql+asyncpg:// from the `async`
+    # extra; defaults to DATABASE_URL
+    ASYNC_DATABASE_URL: str | None = None
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_STATEMENT_TIMEOUT: int | None = None
+    DATABASE_REPLICA_URLS: list[str] = []
+    DATABASE_REPLICA_STRATEGY: Literal['round_robin', 'least_connections'] = (
+        'round_robin'
+    )
+    DATABASE_REPLICA_RETRY_INTERVAL: float = 10
+    READ_YOUR_WRITES_WINDOW: float = 5
+    TRUSTED_PROXIES: list[str] = []
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    BULK_IMPORT_BATCH_SIZE: int = 500
+    BULK_IMPORT_MAX_LINE_BYTES: int = 65536
+    EXPORT_BATCH_SIZE: int = 1000
+    USER_CACHE_BACKEND: Literal['none', 'local', 'redis'] = 'local'
+    USER_CACHE_URL: str | None = None
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL: float = 30
+    USER_CACHE_NEGATIVE_TTL: float = 5
+    QUERY_PROFILING: bool = False
+    SLOW_QUERY_THRESHOLD_MS: float = 100
+    REPEATED_QUERY_THRESHOLD: int = 3
+    # Uses orjson from the `fast-json` extra when installed
+    FAST_JSON_RESPONSES: bool = False
+    OUTBOX_WORKER_ENABLED: bool = True
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_CONCURRENCY: int = 4
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_POLL_INTERVAL: float = 1
+    OUTBOX_LEASE: float = 60
+    USER_PURGE_ENABLED: bool = True
+    USER_RETENTION_DAYS: float = 30
+    USER_PURGE_INTERVAL: float = 3600
+    USER_PURGE_BATCH_SIZE: int = 500
+    IDEMPOTENCY_TTL: float = 86400
+    IDEMPOTENCY_LOCK_TIMEOUT: float = 60
+    IDEMPOTENCY_WAIT_TIMEOUT: float = 10
+    IDEMPOTENCY_POLL_INTERVAL: float = 0.05
+    IDEMPOTENCY_PURGE_ENABLED: bool = True
+    IDEMPOTENCY_PURGE_INTERVAL: float = 600
+    IDEMPOTENCY_PURGE_BATCH_SIZE: int = 1000
+    # Keys request fingerprints; defaults to the active auth signing key,
+    # so set it to keep in-flight retries valid across key rotation
+    IDEMPOTENCY_SECRET_KEY: str | None = None
+    RATE_LIMIT_BACKEND: Literal['none', 'local', 'redis'] = 'local'
+    RATE_LIMIT_URL: str | None = None
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_READ_RATE: float = 50
+    RATE_LIMIT_READ_BURST: int = 100
+    RATE_LIMIT_WRITE_RATE: float = 5
+    RATE_LIMIT_WRITE_BURST: int = 20
+    WRITE_CONCURRENCY_LIMIT: int = 16
+    AUTH_SECRET_KEYS: dict[str, str] = {}
+    AUTH_ACTIVE_KEY_ID: str | None = None
+    AUTH_ALGORITHM: str = 'HS256'
+    AUTH_TOKEN_TTL: int = 1800
+    AUTH_REVOCATION_MAX_SIZE: int = 100000
+
+
+@cache
+def get_settings() -> Settings:
+    """Settings read once per process; tests call `cache_clear` to reload"""
+
+    return Settings()
+
+
+def get_app_settings(request: Request) -> Settings:
+    """Settings the app was created with, else those of the environment"""
+
+    return getattr(request.app.state, 'settings', None) or get_settings()
+
+
+T_Settings = Annotated[Settings, Depends(get_app_settings)]
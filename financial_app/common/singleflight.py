@@ -0,0 +1,173 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from concurrent.futures import Future
+from threading import Lock
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+
+class SingleFlight:
+    """Runs one call per key at a time for threads
+
+    Callers arriving while the key is in flight block until the first
+    caller is done and share its result or exception.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, Future] = {}
+        self._lock = Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, function: Callable, *args):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+
+            if leader:
+                future = self._calls[key] = Future()
+                self.calls += 1
+
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = function(*args)
+
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+        future.set_result(result)
+
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'calls': self.calls, 'shared': self.shared}
+
+
+class AsyncSingleFlight:
+    """Runs one call per key at a time for coroutines on one event loop"""
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(
+        self, key: Hashable, function: Callable[..., Awaitable], *args
+    ):
+        while True:
+            future = self._calls.get(key)
+
+            if future is None:
+                return await self._lead(key, function, *args)
+
+            self.shared += 1
+
+            try:
+                return await asyncio.shield(future)
+
+            except asyncio.CancelledError:
+                # A cancelled leader has no result to share, so its
+                # followers run the call again instead of failing too.
+                if not future.cancelled():
+                    raise
+
+    async def _lead(
+        self, key: Hashable, function: Callable[..., Awaitable], *args
+    ):
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        self.calls += 1
+
+        try:
+            result = await function(*args)
+
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+        except BaseException as error:
+            future.set_exception(error)
+            # Retrieved here so a call nobody joined does not log a warning
+            future.exception()
+            raise
+
+        finally:
+            del self._calls[key]
+
+        future.set_result(result)
+
+        return result
+
+    def stats(self) -> dict:
+        return {'calls': self.calls, 'shared': self.shared}
+
+
+class WriteEpoch:
+    """Number of commits this process has made"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = Lock()
+
+    def bump(self, *args):
+        with self._lock:
+            self.value += 1
+
+
+read_flights = SingleFlight()
+
+async_read_flights = AsyncSingleFlight()
+
+write_epoch = WriteEpoch()
+
+# Async sessions commit through a sync Session too
+event.listen(Session, 'after_commit', write_epoch.bump)
+
+
+def coalesce_read(session: Session, function: Callable, *args):
+    """Share one run of `function(session, *args)` among identical calls
+
+    The engine is part of the key, so reads routed to the primary never
+    receive a result read from a replica. So is the write epoch, so a
+    read after a commit never joins a flight started before it.
+    """
+
+    return read_flights.do(
+        (session.bind, write_epoch.value, function, *args),
+        function,
+        session,
+        *args,
+    )
+
+
+async def coalesce_read_async(
+    session: AsyncSession, function: Callable[..., Awaitable], *args
+):
+    return await async_read_flights.do(
+        (session.bind, write_epoch.value, function, *args),
+        function,
+        session,
+        *args,
+    )
+
+
+def get_coalescing_stats() -> dict:
+    sync_stats = read_flights.stats()
+    async_stats = async_read_flights.stats()
+
+    return {
+        'calls': sync_stats['calls'] + async_stats['calls'],
+        'shared': sync_stats['shared'] + async_stats['shared'],
+    }
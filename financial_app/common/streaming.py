@@ -0,0 +1,164 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Iterator
+from enum import Enum
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+CSV_MEDIA_TYPE = 'text/csv'
+MAX_LINE_BYTES = 64 * 1024
+
+
+class ExportFormat(str, Enum):
+    ndjson = 'ndjson'
+    csv = 'csv'
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: NDJSON_MEDIA_TYPE,
+    ExportFormat.csv: CSV_MEDIA_TYPE,
+}
+
+
+def format_ndjson(batch: list[dict], header: bool = False) -> str:
+    return ''.join(json.dumps(row) + '\n' for row in batch)
+
+
+def format_csv(batch: list[dict], header: bool = False) -> str:
+    if not batch:
+        return ''
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(batch[0]))
+
+    if header:
+        writer.writeheader()
+
+    writer.writerows(batch)
+
+    return buffer.getvalue()
+
+
+BATCH_FORMATTERS = {
+    ExportFormat.ndjson: format_ndjson,
+    ExportFormat.csv: format_csv,
+}
+
+
+def iter_formatted(
+    batches: Iterator[list[dict]], export_format: ExportFormat
+) -> Iterator[str]:
+    formatter = BATCH_FORMATTERS[export_format]
+
+    for number, batch in enumerate(batches):
+        yield formatter(batch, header=number == 0)
+
+
+async def aiter_formatted(
+    batches: AsyncIterator[list[dict]], export_format: ExportFormat
+) -> AsyncIterator[str]:
+    formatter = BATCH_FORMATTERS[export_format]
+    number = 0
+
+    async for batch in batches:
+        yield formatter(batch, header=number == 0)
+        number += 1
+
+
+def _line_too_long(max_line_bytes: int) -> ValueError:
+    return ValueError(f'Line longer than {max_line_bytes} bytes')
+
+
+async def iter_lines(
+    stream: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES
+) -> AsyncIterator[bytes | ValueError]:
+    """Split a stream into lines, buffering at most `max_line_bytes`
+
+    A longer line is dropped and a ValueError takes its place.
+    """
+
+    buffer = b''
+    skipping = False
+
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+
+        for line in lines:
+            if skipping:
+                # Tail of a line already reported as too long
+                skipping = False
+            elif len(line) > max_line_bytes:
+                yield _line_too_long(max_line_bytes)
+            else:
+                yield line
+
+        if len(buffer) > max_line_bytes:
+            if not skipping:
+                yield _line_too_long(max_line_bytes)
+
+            skipping = True
+            buffer = b''
+
+    if buffer and not skipping:
+        yield buffer
+
+
+async def iter_ndjson(
+    stream: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES
+) -> AsyncIterator[tuple[int, dict | ValueError]]:
+    row_number = 0
+
+    async for line in iter_lines(stream, max_line_bytes):
+        if isinstance(line, ValueError):
+            row_number += 1
+            yield row_number, line
+            continue
+
+        if not line.strip():
+            continue
+
+        row_number += 1
+
+        try:
+            yield row_number, json.loads(line)
+
+        except ValueError as error:
+            yield row_number, error
+
+
+async def iter_csv(
+    stream: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES
+) -> AsyncIterator[tuple[int, dict | ValueError]]:
+    header = None
+    row_number = 0
+
+    async for line in iter_lines(stream, max_line_bytes):
+        if isinstance(line, ValueError):
+            values = line
+
+        elif not line.strip():
+            continue
+
+        else:
+            try:
+                values = next(csv.reader([line.decode().rstrip('\r')]))
+
+            except (csv.Error, ValueError) as error:
+                values = ValueError(str(error))
+
+        if header is None:
+            header = [] if isinstance(values, ValueError) else values
+            continue
+
+        row_number += 1
+
+        if isinstance(values, ValueError):
+            yield row_number, values
+        elif len(values) != len(header):
+            yield row_number, ValueError('Wrong number of columns')
+        else:
+            yield row_number, dict(zip(header, values))
+
+
+ROW_PARSERS = {NDJSON_MEDIA_TYPE: iter_ndjson, CSV_MEDIA_TYPE: iter_csv}
@@ -0,0 +1,240 @@
+import asyncio
+import hmac
+from collections.abc import Awaitable, Callable
+from hashlib import sha256
+from http import HTTPStatus
+from time import monotonic, sleep
+from typing import Annotated
+
+from fastapi import Depends, Header, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from financial_app.common.metrics import TimedJSONResponse
+from financial_app.common.ratelimit import caller_key
+from financial_app.common.settings import Settings, T_Settings
+
+from .repositories import (
+    claim_key,
+    complete_key,
+    release_key,
+    store_response,
+)
+from .responses import IdempotencyKeyReused, RequestInProgress
+
+# Called by an action with its session and response right before it
+# commits, so the key completes in the same transaction as the write.
+BeforeCommit = Callable[[Session, object], None]
+
+
+def scoped_idempotency_key(
+    request: Request,
+    settings: T_Settings,
+    idempotency_key: Annotated[str | None, Header(max_length=255)] = None,
+) -> str | None:
+    """Idempotency-Key of the request, scoped to its caller
+
+    Keys are chosen by clients, so two callers may well pick the same one.
+    """
+
+    if idempotency_key is None:
+        return None
+
+    return f'{caller_key(request, settings)} {idempotency_key}'
+
+
+T_IdempotencyKey = Annotated[str | None, Depends(scoped_idempotency_key)]
+
+
+def _fingerprint_key(settings: Settings) -> bytes:
+    secret = settings.IDEMPOTENCY_SECRET_KEY or settings.AUTH_SECRET_KEYS.get(
+        settings.AUTH_ACTIVE_KEY_ID
+    )
+
+    if not secret:
+        raise ValueError(
+            'IDEMPOTENCY_SECRET_KEY or AUTH_ACTIVE_KEY_ID must be set'
+        )
+
+    return secret.encode()
+
+
+def request_fingerprint(
+    settings: Settings, route: str, body: BaseModel
+) -> str:
+    """Digest telling a retry from a different request under the same key
+
+    The whole body is covered, secrets included, so the digest is keyed
+    with a server secret rather than stored plain.
+    """
+
+    payload = body.model_dump_json()
+
+    return hmac.new(
+        _fingerprint_key(settings), f'{route}\n{payload}'.encode(), sha256
+    ).hexdigest()
+
+
+def _check_holder(record: Row, fingerprint: str, deadline: float):
+    """Stored response of a finished holder, None while it is running"""
+
+    if record.fingerprint != fingerprint:
+        raise IdempotencyKeyReused()
+
+    if record.status is not None:
+        return TimedJSONResponse(
+            record.response,
+            status_code=record.status,
+            headers={'Idempotent-Replayed': 'true'},
+        )
+
+    if monotonic() >= deadline:
+        raise RequestInProgress()
+
+    return None
+
+
+def _response_store(key: str, status_code: int, stored: list) -> BeforeCommit:
+    def store(session: Session, response):
+        store_response(session, key, status_code, jsonable_encoder(response))
+        stored.append(True)
+
+    return store
+
+
+def _stored_error(error: HTTPException) -> dict | None:
+    # Client errors are final and replayed; server errors may pass, so
+    # the claim is released and a retry runs again.
+    if error.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+        return None
+
+    return {'detail': error.detail}
+
+
+def run_once(  # noqa: PLR0913, PLR0917
+    settings: Settings,
+    session: Session,
+    key: str | None,
+    fingerprint: str,
+    status_code: int,
+    action: Callable[[BeforeCommit | None], object],
+):
+    """Run `action` once per Idempotency-Key, replaying its response
+
+    Duplicates arriving while the first request runs wait for it. An
+    action that commits its own write calls the hook it is given first;
+    otherwise the key completes in a transaction of its own.
+    """
+
+    if key is None:
+        return action(None)
+
+    deadline = monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+
+    while True:
+        record = claim_key(
+            session,
+            key,
+            fingerprint,
+            settings.IDEMPOTENCY_TTL,
+            settings.IDEMPOTENCY_LOCK_TIMEOUT,
+        )
+
+        if record is None:
+            break
+
+        stored = _check_holder(record, fingerprint, deadline)
+
+        if stored is not None:
+            return stored
+
+        sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+
+    stored = []
+
+    try:
+        result = action(_response_store(key, status_code, stored))
+
+    except HTTPException as error:
+        stored_error = _stored_error(error)
+
+        if stored_error is None:
+            release_key(session, key)
+        else:
+            complete_key(session, key, error.status_code, stored_error)
+
+        raise
+
+    except BaseException:
+        release_key(session, key)
+        raise
+
+    if not stored:
+        complete_key(session, key, status_code, jsonable_encoder(result))
+
+    return result
+
+
+async def run_once_async(  # noqa: PLR0913, PLR0917
+    settings: Settings,
+    session: AsyncSession,
+    key: str | None,
+    fingerprint: str,
+    status_code: int,
+    action: Callable[[BeforeCommit | None], Awaitable],
+):
+    if key is None:
+        return await action(None)
+
+    deadline = monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+
+    while True:
+        record = await session.run_sync(
+            claim_key,
+            key,
+            fingerprint,
+            settings.IDEMPOTENCY_TTL,
+            settings.IDEMPOTENCY_LOCK_TIMEOUT,
+        )
+
+        if record is None:
+            break
+
+        stored = _check_holder(record, fingerprint, deadline)
+
+        if stored is not None:
+            return stored
+
+        await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+
+    stored = []
+
+    try:
+        result = await action(_response_store(key, status_code, stored))
+
+    except HTTPException as error:
+        stored_error = _stored_error(error)
+
+        if stored_error is None:
+            await session.run_sync(release_key, key)
+        else:
+            await session.run_sync(
+                complete_key, key, error.status_code, stored_error
+            )
+
+        raise
+
+    except BaseException:
+        await session.run_sync(release_key, key)
+        raise
+
+    if not stored:
+        await session.run_sync(
+            complete_key, key, status_code, jsonable_encoder(result)
+        )
+
+    return result
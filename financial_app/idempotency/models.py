@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import JSON
+from sqlalchemy.orm import Mapped, mapped_column
+
+from financial_app.common.database import tables_registry, utcnow
+
+
+@tables_registry.mapped_as_dataclass
+class IdempotencyKey:
+    """Claim on an Idempotency-Key, holding the response once it is done"""
+
+    __tablename__ = 'idempotency_keys'
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    fingerprint: Mapped[str]
+    lockedUntil: Mapped[datetime]
+    expiresAt: Mapped[datetime] = mapped_column(index=True)
+    status: Mapped[int | None] = mapped_column(default=None)
+    response: Mapped[dict | None] = mapped_column(
+        JSON(none_as_null=True), default=None
+    )
+    createdAt: Mapped[datetime] = mapped_column(
+        init=False, insert_default=utcnow
+    )
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from collections.abc import Callable
+from contextlib import suppress
+
+from sqlalchemy.orm import Session
+
+from financial_app.common import database
+from financial_app.common.database import utcnow
+from financial_app.common.settings import Settings
+
+from .repositories import purge_expired_keys
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyKeyPurger:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        batch_size: int,
+        interval: float,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def purge(self) -> int:
+        with self.session_factory() as session:
+            return purge_expired_keys(session, utcnow(), self.batch_size)
+
+    async def run(self):
+        while not self._stopping.is_set():
+            try:
+                purged = await asyncio.to_thread(self.purge)
+
+                if purged:
+                    logger.info('Purged %d expired idempotency keys', purged)
+
+            except Exception:
+                logger.exception('Idempotency key purge failed')
+
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+
+    def start(self):
+        self._stopping.clear()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self._stopping.set()
+
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+_key_purger: IdempotencyKeyPurger | None = None
+
+
+def start_key_purger(settings: Settings):
+    global _key_purger  # noqa: PLW0603
+
+    if not settings.IDEMPOTENCY_PURGE_ENABLED or _key_purger is not None:
+        return
+
+    _key_purger = IdempotencyKeyPurger(
+        lambda: Session(database.engine),
+        settings.IDEMPOTENCY_PURGE_BATCH_SIZE,
+        settings.IDEMPOTENCY_PURGE_INTERVAL,
+    )
+    _key_purger.start()
+
+
+async def stop_key_purger():
+    global _key_purger  # noqa: PLW0603
+
+    if _key_purger is not None:
+        await _key_purger.stop()
+        _key_purger = None
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import Row, and_, delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from financial_app.common.database import utcnow
+
+from .models import IdempotencyKey
+
+
+def claim_key(
+    session: Session,
+    key: str,
+    fingerprint: str,
+    ttl: float,
+    lock_timeout: float,
+) -> Row | None:
+    """Claim `key` for this request, or return the row of its holder"""
+
+    while True:
+        now = utcnow()
+        values = {
+            'fingerprint': fingerprint,
+            'lockedUntil': now + timedelta(seconds=lock_timeout),
+            'expiresAt': now + timedelta(seconds=ttl),
+            'status': None,
+            'response': None,
+        }
+
+        try:
+            session.execute(insert(IdempotencyKey).values(key=key, **values))
+            session.commit()
+            return None
+
+        except IntegrityError:
+            session.rollback()
+
+        # Expired keys, and claims left behind by a crashed request, are
+        # taken over in place.
+        taken = session.execute(
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.key == key,
+                or_(
+                    IdempotencyKey.expiresAt <= now,
+                    and_(
+                        IdempotencyKey.status.is_(None),
+                        IdempotencyKey.lockedUntil <= now,
+                    ),
+                ),
+            )
+            .values(**values)
+        ).rowcount
+        session.commit()
+
+        if taken:
+            return None
+
+        record = session.execute(
+            select(
+                IdempotencyKey.fingerprint,
+                IdempotencyKey.status,
+                IdempotencyKey.response,
+            ).where(IdempotencyKey.key == key)
+        ).one_or_none()
+
+        # A row purged in between is simply claimed again
+        if record is not None:
+            return record
+
+
+def store_response(session: Session, key: str, status: int, response):
+    """Stage the response of `key` in the caller's transaction"""
+
+    session.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key)
+        .values(status=status, response=response)
+    )
+
+
+def complete_key(session: Session, key: str, status: int, response):
+    store_response(session, key, status, response)
+    session.commit()
+
+
+def release_key(session: Session, key: str):
+    """Drop an unfinished claim so that a retry runs the request again"""
+
+    session.rollback()
+    session.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.key == key, IdempotencyKey.status.is_(None)
+        )
+    )
+    session.commit()
+
+
+def purge_expired_keys(
+    session: Session, expired_before: datetime, batch_size: int
+) -> int:
+    """Delete expired keys in chunks, one short transaction per chunk"""
+
+    purged = 0
+
+    while True:
+        keys = session.scalars(
+            select(IdempotencyKey.key)
+            .where(IdempotencyKey.expiresAt < expired_before)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+
+        if not keys:
+            return purged
+
+        session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.key.in_(keys))
+        )
+        session.commit()
+
+        purged += len(keys)
+
+        if len(keys) < batch_size:
+            return purged
@@ -0,0 +1,20 @@
+from http import HTTPStatus
+
+from fastapi.exceptions import HTTPException
+
+
+class IdempotencyKeyReused(HTTPException):
+    def __init__(self):
+        super().__init__(
+            HTTPStatus.UNPROCESSABLE_ENTITY,
+            'Idempotency-Key was already used for a different request',
+        )
+
+
+class RequestInProgress(HTTPException):
+    def __init__(self):
+        super().__init__(
+            HTTPStatus.CONFLICT,
+            'A request with this Idempotency-Key is still in progress',
+            headers={'Retry-After': '1'},
+        )
@@ -1,7 +1,68 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
 
-from financial_app.users.service import user_service
+from fastapi import Depends, FastAPI
 
-app = FastAPI()
+from financial_app.auth import routers as auth_routers
+from financial_app.auth.dependencies import require_admin
+from financial_app.auth.tokens import init_token_service, reset_token_service
+from financial_app.common import database, profiling, security
+from financial_app.common.metrics import MetricsMiddleware, TimedJSONResponse
+from financial_app.common.ratelimit import (
+    init_rate_limiter,
+    reset_rate_limiter,
+)
+from financial_app.common.routers import metrics_router
+from financial_app.common.routers import router as admin_router
+from financial_app.common.settings import Settings, get_settings
+from financial_app.idempotency.purge import start_key_purger, stop_key_purger
+from financial_app.outbox.worker import start_outbox_worker, stop_outbox_worker
+from financial_app.users import service as user_service
+from financial_app.users.cache import init_user_cache, reset_user_cache
+from financial_app.users.purge import start_user_purger, stop_user_purger
 
-app.include_router(user_service.router)
+
+def create_app(settings: Settings = None) -> FastAPI:
+    """Build the application from `settings`, the environment by default
+
+    Engines, the hasher, caches and background jobs are set up from them
+    at startup; requests read them through `get_app_settings`.
+    """
+
+    settings = settings or get_settings()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        profiling.configure(settings)
+        database.init_engines(settings)
+        security.init_password_hasher(settings)
+        init_user_cache(settings)
+        init_rate_limiter(settings)
+        init_token_service(settings)
+        start_outbox_worker(settings)
+        start_user_purger(settings)
+        start_key_purger(settings)
+        yield
+        await stop_key_purger()
+        await stop_user_purger()
+        await stop_outbox_worker()
+        await database.dispose_engines()
+        security.shutdown_password_hasher()
+        reset_user_cache()
+        reset_rate_limiter()
+        reset_token_service()
+
+    app = FastAPI(lifespan=lifespan, default_response_class=TimedJSONResponse)
+    app.state.settings = settings
+
+    app.add_middleware(profiling.QueryProfilerMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+    app.include_router(auth_routers.router)
+    app.include_router(user_service.get_router(settings))
+    app.include_router(admin_router, dependencies=[Depends(require_admin)])
+    app.include_router(metrics_router)
+
+    return app
+
+
+app = create_app()
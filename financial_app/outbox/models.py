@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from financial_app.common.database import tables_registry, utcnow
+
+
+@tables_registry.mapped_as_dataclass
+class OutboxEvent:
+    __tablename__ = 'outbox'
+    __table_args__ = (
+        Index(
+            'ix_outbox_processedAt_availableAt', 'processedAt', 'availableAt'
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    topic: Mapped[str]
+    payload: Mapped[dict] = mapped_column(JSON)
+    attempts: Mapped[int] = mapped_column(init=False, default=0)
+    lastError: Mapped[str | None] = mapped_column(init=False, default=None)
+    createdAt: Mapped[datetime] = mapped_column(
+        init=False, insert_default=utcnow
+    )
+    availableAt: Mapped[datetime] = mapped_column(
+        init=False, insert_default=utcnow
+    )
+    processedAt: Mapped[datetime | None] = mapped_column(
+        init=False, default=None
+    )
@@ -0,0 +1,39 @@
+from collections import defaultdict
+from collections.abc import Sequence
+from typing import Protocol
+
+from sqlalchemy import Row
+
+USER_CREATED = 'user.created'
+
+
+class Sink(Protocol):
+    """Destination for outbox events, called with a batch of one topic
+
+    Delivery is at least once: a batch is retried as a whole when any sink
+    subscribed to its topic fails, so sinks must tolerate duplicates.
+    """
+
+    async def send(self, events: Sequence[Row]) -> None: ...
+
+
+class FakeSink:
+    """In-memory sink that records deliveries, failing the first calls"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.events: list[Row] = []
+
+    async def send(self, events: Sequence[Row]) -> None:
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError('Fake sink failure')
+
+        self.events.extend(events)
+
+
+sinks: dict[str, list[Sink]] = defaultdict(list)
+
+
+def register_sink(topic: str, sink: Sink):
+    sinks[topic].append(sink)
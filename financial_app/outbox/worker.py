@@ -0,0 +1,231 @@
+import asyncio
+import logging
+from collections import defaultdict
+from collections.abc import Callable, Mapping, Sequence
+from contextlib import suppress
+from datetime import timedelta
+
+from sqlalchemy import Row, select, update
+from sqlalchemy.orm import Session
+
+from financial_app.common import database
+from financial_app.common.database import utcnow
+from financial_app.common.settings import Settings
+
+from .models import OutboxEvent
+from .sinks import Sink, sinks
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF = 300
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(2**attempts, MAX_BACKOFF))
+
+
+def claim_events(
+    session: Session, batch_size: int, max_attempts: int, lease: float
+) -> list[Row]:
+    now = utcnow()
+
+    events = session.execute(
+        select(
+            OutboxEvent.id,
+            OutboxEvent.topic,
+            OutboxEvent.payload,
+            OutboxEvent.attempts,
+        )
+        .where(
+            OutboxEvent.processedAt.is_(None),
+            OutboxEvent.attempts < max_attempts,
+            OutboxEvent.availableAt <= now,
+        )
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+    # Pushing availableAt past the lease hides the rows from other workers
+    # once the row locks are released, and hands them back if this one dies.
+    if events:
+        session.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_([event.id for event in events]))
+            .values(availableAt=now + timedelta(seconds=lease))
+        )
+
+    session.commit()
+
+    return events
+
+
+def record_results(
+    session: Session, events: Sequence[Row], errors: Mapping[str, str]
+):
+    now = utcnow()
+
+    delivered = [event.id for event in events if event.topic not in errors]
+    failed = defaultdict(list)
+
+    for event in events:
+        if event.topic in errors:
+            failed[event.topic, event.attempts].append(event.id)
+
+    if delivered:
+        session.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(delivered))
+            .values(processedAt=now)
+        )
+
+    for (topic, attempts), ids in failed.items():
+        session.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(ids))
+            .values(
+                attempts=attempts + 1,
+                lastError=errors[topic],
+                availableAt=now + retry_delay(attempts + 1),
+            )
+        )
+
+    session.commit()
+
+
+class OutboxWorker:
+    """Drains the outbox table, fanning each topic batch out to its sinks"""
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        session_factory: Callable[[], Session],
+        topic_sinks: Mapping[str, Sequence[Sink]],
+        batch_size: int = 100,
+        concurrency: int = 4,
+        max_attempts: int = 5,
+        poll_interval: float = 1,
+        lease: float = 60,
+    ):
+        self.session_factory = session_factory
+        self.topic_sinks = topic_sinks
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._deliveries = asyncio.Semaphore(concurrency)
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def _claim(self) -> list[Row]:
+        with self.session_factory() as session:
+            return claim_events(
+                session, self.batch_size, self.max_attempts, self.lease
+            )
+
+    def _record(self, events: list[Row], errors: dict[str, str]):
+        with self.session_factory() as session:
+            record_results(session, events, errors)
+
+    async def _deliver(self, sink: Sink, events: list[Row]) -> str | None:
+        async with self._deliveries:
+            try:
+                await sink.send(events)
+
+            except Exception as error:
+                logger.warning('Outbox delivery to %r failed: %s', sink, error)
+                return str(error) or type(error).__name__
+
+        return None
+
+    async def _deliver_topic(self, topic: str, events: list[Row]):
+        errors = await asyncio.gather(
+            *(
+                self._deliver(sink, events)
+                for sink in self.topic_sinks.get(topic, ())
+            )
+        )
+
+        return next((error for error in errors if error is not None), None)
+
+    async def run_once(self) -> int:
+        events = await asyncio.to_thread(self._claim)
+
+        if not events:
+            return 0
+
+        batches = defaultdict(list)
+
+        for event in events:
+            batches[event.topic].append(event)
+
+        results = await asyncio.gather(
+            *(
+                self._deliver_topic(topic, batch)
+                for topic, batch in batches.items()
+            )
+        )
+        errors = {
+            topic: error
+            for topic, error in zip(batches, results)
+            if error is not None
+        }
+
+        await asyncio.to_thread(self._record, events, errors)
+
+        return len(events)
+
+    async def run(self):
+        while not self._stopping.is_set():
+            try:
+                processed = await self.run_once()
+
+            except Exception:
+                logger.exception('Outbox worker iteration failed')
+                processed = 0
+
+            # A full batch means more rows are probably waiting
+            if processed < self.batch_size:
+                with suppress(TimeoutError):
+                    await asyncio.wait_for(
+                        self._stopping.wait(), self.poll_interval
+                    )
+
+    def start(self):
+        self._stopping.clear()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self._stopping.set()
+
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+_outbox_worker: OutboxWorker | None = None
+
+
+def start_outbox_worker(settings: Settings):
+    global _outbox_worker  # noqa: PLW0603
+
+    if not settings.OUTBOX_WORKER_ENABLED or _outbox_worker is not None:
+        return
+
+    _outbox_worker = OutboxWorker(
+        lambda: Session(database.engine),
+        sinks,
+        batch_size=settings.OUTBOX_BATCH_SIZE,
+        concurrency=settings.OUTBOX_CONCURRENCY,
+        max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+        poll_interval=settings.OUTBOX_POLL_INTERVAL,
+        lease=settings.OUTBOX_LEASE,
+    )
+    _outbox_worker.start()
+
+
+async def stop_outbox_worker():
+    global _outbox_worker  # noqa: PLW0603
+
+    if _outbox_worker is not None:
+        await _outbox_worker.stop()
+        _outbox_worker = None
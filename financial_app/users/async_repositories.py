@@ -0,0 +1,211 @@
+from collections.abc import AsyncIterator, Callable
+from time import time
+from uuid import UUID
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from financial_app.common.schemas import Message
+from financial_app.common.security import get_password_hash_async
+
+from . import repositories
+from .cache import NOT_FOUND, get_user_cache
+from .models import User
+from .responses import UserNotFound
+from .schemas import (
+    BulkDeleteReport,
+    UserList,
+    UserLookup,
+    UserPatch,
+    UserPublic,
+    UserRecord,
+    UserSchema,
+    UserSearch,
+)
+
+
+def _invalidate_all(invalidations: list[tuple]):
+    user_cache = get_user_cache()
+
+    for invalidation in invalidations:
+        user_cache.invalidate(*invalidation)
+
+
+async def _run_write(session: AsyncSession, function: Callable, *args):
+    """Run a sync write, then invalidate the cache from a thread
+
+    Cache backends may block on the network, so the event loop only ever
+    reaches them through a thread.
+    """
+
+    invalidations = []
+    session.info[repositories.DEFERRED_INVALIDATIONS] = invalidations
+
+    try:
+        return await session.run_sync(function, *args)
+
+    finally:
+        del session.info[repositories.DEFERRED_INVALIDATIONS]
+
+        if invalidations:
+            await run_in_threadpool(_invalidate_all, invalidations)
+
+
+async def _get_user(
+    session: AsyncSession, cached, condition, set_not_found
+) -> UserRecord:
+    if cached == NOT_FOUND:
+        raise UserNotFound()
+
+    if cached is not None:
+        return cached
+
+    read_at = time()
+    user = await session.run_sync(repositories.find_user, condition)
+
+    if user is None:
+        await run_in_threadpool(set_not_found, read_at)
+        raise UserNotFound()
+
+    await run_in_threadpool(get_user_cache().set_user, user, read_at)
+
+    return user
+
+
+async def get_all_users(
+    session: AsyncSession, limit: int, offset: int = 0, cursor: str = None
+) -> UserList:
+    return await session.run_sync(
+        repositories.get_all_users, limit, offset, cursor
+    )
+
+
+async def _iter_export_batches(
+    session: AsyncSession, query: Select
+) -> AsyncIterator[list[dict]]:
+    result = await session.stream(query)
+
+    async for partition in result.partitions():
+        yield [repositories.export_row(row) for row in partition]
+
+
+def export_users(
+    session: AsyncSession, batch_size: int, cursor: str = None
+) -> AsyncIterator[list[dict]]:
+    return _iter_export_batches(
+        session, repositories.export_query(batch_size, cursor)
+    )
+
+
+async def search_users(session: AsyncSession, search: UserSearch) -> UserList:
+    return await session.run_sync(repositories.search_users, search)
+
+
+async def get_user_by_id(session: AsyncSession, user_uuid: str) -> UserRecord:
+    user_id = repositories.validate_uuid(user_uuid)
+    user_cache = get_user_cache()
+
+    return await _get_user(
+        session,
+        await run_in_threadpool(user_cache.get_by_id, user_id),
+        User.id == user_id,
+        lambda read_at: user_cache.set_id_not_found(user_id, read_at),
+    )
+
+
+async def get_user_by_username(
+    session: AsyncSession, username: str
+) -> UserRecord:
+    user_cache = get_user_cache()
+
+    return await _get_user(
+        session,
+        await run_in_threadpool(user_cache.get_by_username, username),
+        User.username == username,
+        lambda read_at: user_cache.set_username_not_found(username, read_at),
+    )
+
+
+async def lookup_users(
+    session: AsyncSession, user_ids: list[str], usernames: list[str]
+) -> UserLookup:
+    return await session.run_sync(
+        repositories.lookup_users, user_ids, usernames
+    )
+
+
+async def create_user(
+    session: AsyncSession,
+    user_schema: UserSchema,
+    before_commit: Callable[[Session, UserPublic], None] = None,
+) -> UserPublic:
+    password_hash = await get_password_hash_async(user_schema.password)
+
+    return await _run_write(
+        session,
+        repositories.create_user,
+        user_schema,
+        password_hash,
+        before_commit,
+    )
+
+
+async def insert_users(
+    session: AsyncSession, rows: list[tuple[int, dict]]
+) -> list[dict]:
+    return await _run_write(session, repositories.insert_users, rows)
+
+
+async def delete_user(
+    session: AsyncSession, user_uuid: str, expected_version: int = None
+) -> Message:
+    return await _run_write(
+        session, repositories.delete_user, user_uuid, expected_version
+    )
+
+
+async def delete_users(
+    session: AsyncSession, user_ids: list[UUID]
+) -> BulkDeleteReport:
+    return await _run_write(session, repositories.delete_users, user_ids)
+
+
+async def update_user(
+    session: AsyncSession,
+    user_id: str,
+    user_schema: UserSchema,
+    expected_version: int = None,
+) -> UserRecord:
+    password_hash = await get_password_hash_async(user_schema.password)
+
+    return await _run_write(
+        session,
+        repositories.update_user,
+        user_id,
+        user_schema,
+        password_hash,
+        expected_version,
+    )
+
+
+async def patch_user(
+    session: AsyncSession,
+    user_id: str,
+    user_patch: UserPatch,
+    expected_version: int = None,
+) -> UserRecord:
+    password_hash = None
+
+    if user_patch.password is not None:
+        password_hash = await get_password_hash_async(user_patch.password)
+
+    return await _run_write(
+        session,
+        repositories.patch_user,
+        user_id,
+        user_patch,
+        password_hash,
+        expected_version,
+    )
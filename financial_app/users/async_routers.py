@@ -0,0 +1,291 @@
+from http import HTTPStatus
+from typing import Annotated, Union
+
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from financial_app.auth.dependencies import (
+    T_OptionalPrincipal,
+    T_Principal,
+    authorize_role,
+    get_principal,
+    require_admin,
+    require_self_or_admin,
+)
+from financial_app.common.database import get_async_session
+from financial_app.common.ratelimit import limit_write_concurrency, rate_limit
+from financial_app.common.schemas import Message
+from financial_app.common.settings import T_Settings
+from financial_app.common.singleflight import coalesce_read_async
+from financial_app.common.streaming import (
+    EXPORT_MEDIA_TYPES,
+    ExportFormat,
+    aiter_formatted,
+)
+from financial_app.idempotency.guard import (
+    T_IdempotencyKey,
+    request_fingerprint,
+    run_once_async,
+)
+from financial_app.users import async_repositories, bulk, etags, rendering
+
+from .schemas import (
+    BulkDeleteReport,
+    BulkImportReport,
+    UserIds,
+    UserList,
+    UserLookup,
+    UserLookupQuery,
+    UserPatch,
+    UserPublic,
+    UserQuery,
+    UserSchema,
+    UserSearch,
+)
+
+router = APIRouter(
+    prefix='/users', tags=['Users'], dependencies=[Depends(rate_limit)]
+)
+
+T_AsyncSession = Annotated[AsyncSession, Depends(get_async_session)]
+T_IfMatch = Annotated[str | None, Header()]
+T_IfNoneMatch = Annotated[str | None, Header()]
+
+
+@router.get(
+    '/',
+    status_code=HTTPStatus.OK,
+    dependencies=[Depends(get_principal)],
+)
+async def get_users(
+    session: T_AsyncSession,
+    response: Response,
+    query: Annotated[UserQuery, Query()],
+    settings: T_Settings,
+    if_none_match: T_IfNoneMatch = None,
+) -> Union[UserList, UserPublic]:
+    """Get all users or especific user by username or user id
+
+    Pages are ordered by creation date; pass the returned `next_cursor`
+    as `cursor` to fetch the next page. `offset` is kept for legacy clients.
+    Send the returned `ETag` as `If-None-Match` to get a 304 when unchanged.
+    """
+
+    # Concurrent identical reads share one query
+    if query.user_id is not None:
+        result = await coalesce_read_async(
+            session, async_repositories.get_user_by_id, query.user_id
+        )
+    elif query.username is not None:
+        result = await coalesce_read_async(
+            session, async_repositories.get_user_by_username, query.username
+        )
+    else:
+        result = await coalesce_read_async(
+            session,
+            async_repositories.get_all_users,
+            query.limit,
+            query.offset,
+            query.cursor,
+        )
+
+    return rendering.render_users(response, if_none_match, result, settings)
+
+
+@router.get(
+    '/search',
+    status_code=HTTPStatus.OK,
+    dependencies=[Depends(get_principal)],
+)
+async def search_users(
+    session: T_AsyncSession,
+    response: Response,
+    search: Annotated[UserSearch, Query()],
+    settings: T_Settings,
+    if_none_match: T_IfNoneMatch = None,
+) -> UserList:
+    """Search users by name, email or username prefix"""
+
+    result = await async_repositories.search_users(session, search)
+
+    return rendering.render_users(response, if_none_match, result, settings)
+
+
+@router.get(
+    '/lookup',
+    status_code=HTTPStatus.OK,
+    dependencies=[Depends(get_principal)],
+)
+async def lookup_users(
+    session: T_AsyncSession, query: Annotated[UserLookupQuery, Query()]
+) -> UserLookup:
+    """Get up to 100 users by id and 100 by username in one request
+
+    Repeat `user_id` and `username` as needed; misses map to null.
+    """
+
+    return await async_repositories.lookup_users(
+        session, query.user_id, query.username
+    )
+
+
+@router.get(
+    '/export',
+    status_code=HTTPStatus.OK,
+    dependencies=[Depends(get_principal)],
+)
+async def export_users(
+    session: T_AsyncSession,
+    settings: T_Settings,
+    format: ExportFormat = ExportFormat.ndjson,
+    cursor: str = None,
+) -> StreamingResponse:
+    """Stream every user as NDJSON or CSV
+
+    Each row carries a `cursor` that resumes the export after that row.
+    """
+
+    batches = async_repositories.export_users(
+        session, settings.EXPORT_BATCH_SIZE, cursor
+    )
+
+    return StreamingResponse(
+        aiter_formatted(batches, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+    )
+
+
+@router.post(
+    '/',
+    status_code=HTTPStatus.CREATED,
+    dependencies=[Depends(limit_write_concurrency)],
+)
+async def create_user(
+    session: T_AsyncSession,
+    user_schema: UserSchema,
+    principal: T_OptionalPrincipal,
+    settings: T_Settings,
+    idempotency_key: T_IdempotencyKey,
+) -> UserPublic:
+    """Sign up a user; only admins may create other admins
+
+    Retries sending the same `Idempotency-Key` get the stored response.
+    """
+
+    authorize_role(principal, user_schema.role)
+
+    return await run_once_async(
+        settings,
+        session,
+        idempotency_key,
+        request_fingerprint(settings, 'POST /users', user_schema),
+        HTTPStatus.CREATED,
+        lambda store: async_repositories.create_user(
+            session, user_schema, store
+        ),
+    )
+
+
+@router.post(
+    '/bulk',
+    status_code=HTTPStatus.OK,
+    dependencies=[Depends(require_admin), Depends(limit_write_concurrency)],
+)
+async def import_users(
+    session: T_AsyncSession, request: Request
+) -> BulkImportReport:
+    """Import users from a streamed NDJSON or CSV body"""
+
+    async def insert_batch(rows):
+        return await async_repositories.insert_users(session, rows)
+
+    return await bulk.import_users(request, insert_batch)
+
+
+@router.post(
+    '/bulk-delete',
+    status_code=HTTPStatus.OK,
+    dependencies=[Depends(require_admin), Depends(limit_write_concurrency)],
+)
+async def delete_users(
+    session: T_AsyncSession, user_ids: UserIds
+) -> BulkDeleteReport:
+    """Soft delete every listed user in one statement"""
+
+    return await async_repositories.delete_users(session, user_ids.ids)
+
+
+@router.delete(
+    '/{user_id}',
+    status_code=HTTPStatus.OK,
+    dependencies=[Depends(require_self_or_admin)],
+)
+async def delete_user(
+    session: T_AsyncSession, user_id: str, if_match: T_IfMatch = None
+) -> Message:
+    """Delete a user, failing with 412 when `If-Match` is stale"""
+
+    expected_version = etags.expected_version(if_match, user_id)
+
+    return await async_repositories.delete_user(
+        session, user_id, expected_version
+    )
+
+
+@router.put(
+    '/{user_id}',
+    status_code=HTTPStatus.OK,
+    dependencies=[
+        Depends(require_self_or_admin),
+        Depends(limit_write_concurrency),
+    ],
+)
+async def update_user(  # noqa: PLR0913, PLR0917
+    session: T_AsyncSession,
+    response: Response,
+    user_id: str,
+    user_schema: UserSchema,
+    principal: T_Principal,
+    if_match: T_IfMatch = None,
+) -> UserPublic:
+    """Replace a user, failing with 412 when `If-Match` is stale"""
+
+    authorize_role(principal, user_schema.role)
+    expected_version = etags.expected_version(if_match, user_id)
+
+    user = await async_repositories.update_user(
+        session, user_id, user_schema, expected_version
+    )
+    etags.set_user_headers(response, user)
+
+    return user
+
+
+@router.patch(
+    '/{user_id}',
+    status_code=HTTPStatus.OK,
+    dependencies=[
+        Depends(require_self_or_admin),
+        Depends(limit_write_concurrency),
+    ],
+)
+async def patch_user(  # noqa: PLR0913, PLR0917
+    session: T_AsyncSession,
+    response: Response,
+    user_id: str,
+    user_patch: UserPatch,
+    principal: T_Principal,
+    if_match: T_IfMatch = None,
+) -> UserPublic:
+    """Change only the given fields; the password is rehashed if given"""
+
+    authorize_role(principal, user_patch.role)
+    expected_version = etags.expected_version(if_match, user_id)
+
+    user = await async_repositories.patch_user(
+        session, user_id, user_patch, expected_version
+    )
+    etags.set_user_headers(response, user)
+
+    return user
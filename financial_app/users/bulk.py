@@ -0,0 +1,80 @@
+from collections.abc import Awaitable, Callable
+
+from fastapi import Request
+from pydantic import ValidationError
+
+from financial_app.common.responses import UnsupportedMediaType
+from financial_app.common.security import get_password_hasher
+from financial_app.common.settings import get_app_settings
+from financial_app.common.streaming import ROW_PARSERS
+
+from .schemas import BulkImportReport, UserSchema
+
+InsertBatch = Callable[[list[tuple[int, dict]]], Awaitable[list[dict]]]
+
+
+def _validation_detail(error: ValidationError) -> str:
+    return '; '.join(
+        f'{".".join(map(str, detail["loc"]))}: {detail["msg"]}'
+        for detail in error.errors()
+    )
+
+
+async def _insert_batch(
+    batch: list[tuple[int, UserSchema]], insert_batch: InsertBatch
+) -> list[dict]:
+    password_hashes = await get_password_hasher().hash_many_async([
+        user_schema.password for _, user_schema in batch
+    ])
+
+    return await insert_batch([
+        (row_number, {**user_schema.model_dump(), 'password': password_hash})
+        for (row_number, user_schema), password_hash in zip(
+            batch, password_hashes
+        )
+    ])
+
+
+async def import_users(
+    request: Request, insert_batch: InsertBatch
+) -> BulkImportReport:
+    content_type = request.headers.get('content-type', '').split(';')[0]
+    parse_rows = ROW_PARSERS.get(content_type.strip())
+
+    if parse_rows is None:
+        raise UnsupportedMediaType()
+
+    settings = get_app_settings(request)
+    rows = 0
+    errors = []
+    batch = []
+
+    async for row_number, data in parse_rows(
+        request.stream(), settings.BULK_IMPORT_MAX_LINE_BYTES
+    ):
+        rows += 1
+
+        if isinstance(data, ValueError):
+            errors.append({'row': row_number, 'detail': str(data)})
+            continue
+
+        try:
+            batch.append((row_number, UserSchema.model_validate(data)))
+
+        except ValidationError as error:
+            errors.append({
+                'row': row_number,
+                'detail': _validation_detail(error),
+            })
+
+        if len(batch) >= settings.BULK_IMPORT_BATCH_SIZE:
+            errors.extend(await _insert_batch(batch, insert_batch))
+            batch = []
+
+    if batch:
+        errors.extend(await _insert_batch(batch, insert_batch))
+
+    return {
+        'imported': rows - len(errors),
+        'errors': sorted(errors, key=lambda error: error['row']),
+    }
@@ -0,0 +1,196 @@
+from threading import Lock
+from time import time
+from uuid import UUID
+
+from financial_app.common.cache import (
+    CacheBackend,
+    LocalCache,
+    NullCache,
+    SharedCache,
+)
+from financial_app.common.settings import Settings, get_settings
+
+from .schemas import UserRecord
+
+NOT_FOUND = '-'
+
+
+def _id_key(user_id: UUID) -> str:
+    return f'user:id:{user_id}'
+
+
+def _username_key(username: str) -> str:
+    return f'user:username:{username}'
+
+
+def _invalidated_key(key: str) -> str:
+    return f'{key}:invalidated'
+
+
+class UserCache:
+    """Read-through cache of UserRecord lookups
+
+    Username entries only point to an id, so invalidating the id entry is
+    enough when a user is updated or deleted.
+
+    Invalidation leaves a timestamp behind for a TTL, and a value read
+    from the database before it is dropped again instead of outliving
+    the write that invalidated it.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, negative_ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._stats_lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get_by_id(self, user_id: UUID) -> UserRecord | str | None:
+        value = self.backend.get(_id_key(user_id))
+        self._count(value is not None)
+
+        if value is None or value == NOT_FOUND:
+            return value
+
+        return UserRecord.model_validate_json(value)
+
+    def get_by_username(self, username: str) -> UserRecord | str | None:
+        user_id = self.backend.get(_username_key(username))
+
+        if user_id is None or user_id == NOT_FOUND:
+            self._count(user_id is not None)
+            return user_id
+
+        user = self.get_by_id(UUID(user_id))
+
+        if isinstance(user, UserRecord) and user.username == username:
+            return user
+
+        return None
+
+    def _set_read(self, read_at: float, entries: dict[str, str], ttl: float):
+        # Checked after storing, so an invalidation racing the set still
+        # removes the value either way.
+        for key, value in entries.items():
+            self.backend.set(key, value, ttl)
+
+        for key in entries:
+            invalidated_at = self.backend.get(_invalidated_key(key))
+
+            if invalidated_at is not None and float(invalidated_at) >= read_at:
+                self.backend.delete(*entries)
+                return
+
+    def set_user(self, user, read_at: float):
+        """Cache `user` as read from the database at `read_at`"""
+
+        user_record = UserRecord.model_validate(user)
+
+        self._set_read(
+            read_at,
+            {
+                _id_key(user_record.id): user_record.model_dump_json(),
+                _username_key(user_record.username): str(user_record.id),
+            },
+            self.ttl,
+        )
+
+    def set_id_not_found(self, user_id: UUID, read_at: float):
+        self._set_read(
+            read_at, {_id_key(user_id): NOT_FOUND}, self.negative_ttl
+        )
+
+    def set_username_not_found(self, username: str, read_at: float):
+        self._set_read(
+            read_at, {_username_key(username): NOT_FOUND}, self.negative_ttl
+        )
+
+    def invalidate(self, user_id: UUID = None, *usernames: str):
+        keys = [_username_key(username) for username in usernames]
+
+        if user_id is not None:
+            keys.append(_id_key(user_id))
+
+        self.backend.delete(*keys)
+        invalidated_at = str(time())
+
+        for key in keys:
+            self.backend.set(_invalidated_key(key), invalidated_at, self.ttl)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                **self.backend.stats(),
+            }
+
+
+def create_cache_backend(settings: Settings) -> CacheBackend:
+    if settings.USER_CACHE_BACKEND == 'local':
+        return LocalCache(settings.USER_CACHE_MAX_SIZE)
+
+    if settings.USER_CACHE_BACKEND == 'redis':  # pragma: no cover
+        from redis import Redis  # noqa: PLC0415
+
+        return SharedCache(
+            Redis.from_url(settings.USER_CACHE_URL), 'financial_app:'
+        )
+
+    return NullCache()
+
+
+_user_cache: UserCache | None = None
+_user_cache_lock = Lock()
+
+
+def _create_user_cache(settings: Settings) -> UserCache:
+    return UserCache(
+        create_cache_backend(settings),
+        settings.USER_CACHE_TTL,
+        settings.USER_CACHE_NEGATIVE_TTL,
+    )
+
+
+def init_user_cache(settings: Settings) -> UserCache:
+    """Replace the user cache with one built from `settings`"""
+
+    global _user_cache  # noqa: PLW0603
+
+    with _user_cache_lock:
+        if _user_cache is not None:
+            _user_cache.clear()
+
+        _user_cache = _create_user_cache(settings)
+
+        return _user_cache
+
+
+def get_user_cache() -> UserCache:
+    global _user_cache  # noqa: PLW0603
+
+    with _user_cache_lock:
+        if _user_cache is None:
+            _user_cache = _create_user_cache(get_settings())
+
+        return _user_cache
+
+
+def reset_user_cache():
+    global _user_cache  # noqa: PLW0603
+
+    with _user_cache_lock:
+        if _user_cache is not None:
+            _user_cache.clear()
+            _user_cache = None
@@ -4,3 +4,9 @@ from enum import Enum
 class UserRole(str, Enum):
     user = 'user'
     admin = 'admin'
+
+
+class SearchField(str, Enum):
+    name = 'name'
+    email = 'email'
+    username = 'username'
@@ -0,0 +1,63 @@
+from hashlib import sha1
+
+from fastapi import Response
+
+from financial_app.common.conditional import (
+    conditional_response,
+    http_date,
+    parse_etags,
+    strip_weak,
+)
+
+from .responses import UserModified
+
+
+def user_etag(user) -> str:
+    return f'"{user.id}-{user.version}"'
+
+
+def page_etag(users: list, next_cursor: str | None) -> str:
+    digest = sha1(usedforsecurity=False)
+
+    for user in users:
+        digest.update(f'{user.id}-{user.version};'.encode())
+
+    digest.update(str(next_cursor).encode())
+
+    return f'W/"{digest.hexdigest()}"'
+
+
+def expected_version(if_match: str | None, user_id: str) -> int | None:
+    """Version required by an If-Match header, None when unconditional"""
+
+    if if_match is None or if_match.strip() == '*':
+        return None
+
+    for etag in parse_etags(if_match):
+        etag_user_id, _, version = strip_weak(etag).strip('"').rpartition('-')
+
+        if etag_user_id == user_id.lower() and version.isdigit():
+            return int(version)
+
+    raise UserModified()
+
+
+def set_user_headers(response: Response, user):
+    response.headers['ETag'] = user_etag(user)
+    response.headers['Last-Modified'] = http_date(user.updatedAt)
+
+
+def conditional_users(
+    response: Response, if_none_match: str | None, result
+) -> Response | None:
+    """304 response when the client copy of a user or page is current"""
+
+    if isinstance(result, dict):
+        users = result['users']
+        etag = page_etag(users, result['next_cursor'])
+        last_modified = max((user.updatedAt for user in users), default=None)
+    else:
+        etag = user_etag(result)
+        last_modified = result.updatedAt
+
+    return conditional_response(response, if_none_match, etag, last_modified)
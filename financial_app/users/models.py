@@ -1,10 +1,10 @@
 from datetime import datetime
 from uuid import UUID, uuid4
 
-from sqlalchemy import func
+from sqlalchemy import DDL, Index, event, func
 from sqlalchemy.orm import Mapped, mapped_column
 
-from financial_app.common.database import tables_registry
+from financial_app.common.database import CodePointOrder, tables_registry
 
 from .enums import UserRole
 
@@ -17,13 +17,100 @@ class User:
         init=False, primary_key=True, default=uuid4
     )
     name: Mapped[str]
-    username: Mapped[str] = mapped_column(unique=True)
+    username: Mapped[str]
     password: Mapped[str]
-    email: Mapped[str] = mapped_column(unique=True)
+    email: Mapped[str]
     createdAt: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
     )
     updatedAt: Mapped[datetime] = mapped_column(
-        init=False, server_default=func.now()
+        init=False, server_default=func.now(), onupdate=func.now()
     )
     role: Mapped[UserRole]
+    version: Mapped[int] = mapped_column(init=False, server_default='1')
+    deletedAt: Mapped[datetime | None] = mapped_column(
+        init=False, default=None
+    )
+
+    __mapper_args__ = {'version_id_col': version}
+
+
+@tables_registry.mapped_as_dataclass
+class ArchivedUser:
+    """Purged user, keeping only what audits need"""
+
+    __tablename__ = 'users_archive'
+
+    id: Mapped[UUID] = mapped_column(primary_key=True)
+    username: Mapped[str]
+    email: Mapped[str]
+    role: Mapped[UserRole]
+    createdAt: Mapped[datetime]
+    deletedAt: Mapped[datetime]
+    archivedAt: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+
+
+# Soft deleted rows keep their username and email until purged, so
+# uniqueness and the page order index cover live users only
+LIVE_USERS = User.deletedAt.is_(None)
+
+Index(
+    'ix_users_username',
+    User.username,
+    unique=True,
+    sqlite_where=LIVE_USERS,
+    postgresql_where=LIVE_USERS,
+)
+Index(
+    'ix_users_email',
+    User.email,
+    unique=True,
+    sqlite_where=LIVE_USERS,
+    postgresql_where=LIVE_USERS,
+)
+Index(
+    'ix_users_createdAt_id',
+    User.createdAt,
+    User.id,
+    sqlite_where=LIVE_USERS,
+    postgresql_where=LIVE_USERS,
+)
+
+# The purge walks soft deleted users only, oldest deletion first
+Index(
+    'ix_users_deletedAt',
+    User.deletedAt,
+    sqlite_where=User.deletedAt.is_not(None),
+    postgresql_where=User.deletedAt.is_not(None),
+)
+
+Index('ix_users_lower_name', CodePointOrder(func.lower(User.name)))
+Index('ix_users_lower_email', CodePointOrder(func.lower(User.email)))
+Index('ix_users_lower_username', CodePointOrder(func.lower(User.username)))
+
+
+def _trigram_index(column) -> Index:
+    # Serves the `contains` search; pg_trgm exists on PostgreSQL only
+    label = f'lower_{column.key}'
+
+    return Index(
+        f'ix_users_lower_{column.key}_trgm',
+        func.lower(column).label(label),
+        postgresql_using='gin',
+        postgresql_ops={label: 'gin_trgm_ops'},
+    ).ddl_if(dialect='postgresql')
+
+
+_trigram_index(User.name)
+_trigram_index(User.email)
+_trigram_index(User.username)
+
+event.listen(
+    User.__table__,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(
+        dialect='postgresql'
+    ),
+)
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+from collections.abc import Callable
+from contextlib import suppress
+from datetime import datetime, timedelta
+
+from sqlalchemy import Select, delete, insert, select
+from sqlalchemy.orm import Session
+
+from financial_app.common import database
+from financial_app.common.database import utcnow
+from financial_app.common.settings import Settings
+
+from .models import ArchivedUser, User
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_COLUMNS = (
+    'id',
+    'username',
+    'email',
+    'role',
+    'createdAt',
+    'deletedAt',
+)
+
+
+def purge_query(deleted_before: datetime, batch_size: int) -> Select:
+    return (
+        select(User.id)
+        .where(User.deletedAt < deleted_before)
+        .order_by(User.deletedAt)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def purge_deleted_users(
+    session: Session, deleted_before: datetime, batch_size: int
+) -> int:
+    """Move users soft deleted before the cutoff to the archive table
+
+    Each chunk is its own short transaction, so row locks are held for a
+    single batch only.
+    """
+
+    purged = 0
+
+    while True:
+        user_ids = session.scalars(
+            purge_query(deleted_before, batch_size)
+        ).all()
+
+        if not user_ids:
+            return purged
+
+        session.execute(
+            insert(ArchivedUser).from_select(
+                ARCHIVED_COLUMNS,
+                select(
+                    *(getattr(User, name) for name in ARCHIVED_COLUMNS)
+                ).where(User.id.in_(user_ids)),
+            )
+        )
+        session.execute(delete(User).where(User.id.in_(user_ids)))
+        session.commit()
+
+        purged += len(user_ids)
+
+        if len(user_ids) < batch_size:
+            return purged
+
+
+class UserPurger:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        retention: timedelta,
+        batch_size: int,
+        interval: float,
+    ):
+        self.session_factory = session_factory
+        self.retention = retention
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def purge(self) -> int:
+        with self.session_factory() as session:
+            return purge_deleted_users(
+                session, utcnow() - self.retention, self.batch_size
+            )
+
+    async def run(self):
+        while not self._stopping.is_set():
+            try:
+                purged = await asyncio.to_thread(self.purge)
+
+                if purged:
+                    logger.info('Archived %d deleted users', purged)
+
+            except Exception:
+                logger.exception('User purge failed')
+
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+
+    def start(self):
+        self._stopping.clear()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self._stopping.set()
+
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+_user_purger: UserPurger | None = None
+
+
+def start_user_purger(settings: Settings):
+    global _user_purger  # noqa: PLW0603
+
+    if not settings.USER_PURGE_ENABLED or _user_purger is not None:
+        return
+
+    _user_purger = UserPurger(
+        lambda: Session(database.engine),
+        timedelta(days=settings.USER_RETENTION_DAYS),
+        settings.USER_PURGE_BATCH_SIZE,
+        settings.USER_PURGE_INTERVAL,
+    )
+    _user_purger.start()
+
+
+async def stop_user_purger():
+    global _user_purger  # noqa: PLW0603
+
+    if _user_purger is not None:
+        await _user_purger.stop()
+        _user_purger = None
@@ -0,0 +1,36 @@
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from financial_app.common.serialization import fast_json_response
+from financial_app.common.settings import Settings
+
+from . import etags
+from .schemas import UserList, UserPublic
+
+USER_LIST_ADAPTER = TypeAdapter(UserList)
+USER_ADAPTER = TypeAdapter(UserPublic)
+
+
+def render_users(
+    response: Response,
+    if_none_match: str | None,
+    result,
+    settings: Settings,
+):
+    """Conditional response for a user or page, encoded with orjson when
+    `FAST_JSON_RESPONSES` is enabled"""
+
+    not_modified = etags.conditional_users(response, if_none_match, result)
+
+    if not_modified is not None:
+        return not_modified
+
+    if not settings.FAST_JSON_RESPONSES:
+        return result
+
+    if isinstance(result, dict):
+        return fast_json_response(
+            USER_LIST_ADAPTER, UserList.model_construct(**result), response
+        )
+
+    return fast_json_response(USER_ADAPTER, result, response)
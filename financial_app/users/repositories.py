@@ -1,19 +1,77 @@
+import sys
+from collections.abc import Callable, Iterator
+from time import time
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import (
+    Row,
+    Select,
+    and_,
+    func,
+    insert,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from financial_app.common.database import CodePointOrder, utcnow
+from financial_app.common.pagination import decode_cursor, encode_cursor
 from financial_app.common.schemas import Message
 from financial_app.common.security import get_password_hash
+from financial_app.outbox.models import OutboxEvent
+from financial_app.outbox.sinks import USER_CREATED
 
+from .cache import NOT_FOUND, get_user_cache
+from .enums import SearchField
 from .models import User
 from .responses import (
     EmailAlreadyExists,
     InvalidUserId,
+    UserModified,
     UsernameAlreadyExists,
     UserNotFound,
 )
-from .schemas import UserList, UserPublic, UserSchema
+from .schemas import (
+    BulkDeleteReport,
+    UserList,
+    UserLookup,
+    UserPatch,
+    UserPublic,
+    UserRecord,
+    UserSchema,
+    UserSearch,
+)
+
+MAX_PAGE_LIMIT = 100
+
+RECORD_COLUMNS = (
+    User.id,
+    User.username,
+    User.email,
+    User.role,
+    User.version,
+    User.updatedAt,
+    User.createdAt,
+)
+
+# Soft deleted users are invisible to every read and write
+ACTIVE = User.deletedAt.is_(None)
+
+DEFERRED_INVALIDATIONS = 'deferred_cache_invalidations'
+
+SURROGATES_START = 0xD800
+SURROGATES_END = 0xDFFF
+
+UNIQUE_INDEX_FIELDS = {
+    'ix_users_username': 'username',
+    'ix_users_email': 'email',
+}
+SQLITE_UNIQUE_FIELDS = {
+    f'UNIQUE constraint failed: users.{field}': field
+    for field in UNIQUE_INDEX_FIELDS.values()
+}
 
 
 def validate_uuid(uuid: str) -> UUID:
@@ -25,94 +83,548 @@ def validate_uuid(uuid: str) -> UUID:
         raise InvalidUserId()
 
 
-def get_all_users(session: Session, limit: int, offset: int) -> UserList:
-    users = session.scalars(select(User).limit(limit).offset(offset))
+def _violated_field(error: IntegrityError) -> str | None:
+    """User field whose unique index `error` violated, if any
+
+    Decided from the index name, since PostgreSQL messages also quote the
+    conflicting value, which may well contain `username`.
+    """
+
+    # psycopg exposes the name on `diag`, asyncpg on the wrapped error
+    constraint = getattr(
+        getattr(error.orig, 'diag', None), 'constraint_name', None
+    ) or getattr(error.orig.__cause__, 'constraint_name', None)
+
+    if constraint is not None:
+        return UNIQUE_INDEX_FIELDS.get(constraint)
+
+    # SQLite names the columns instead, without their values
+    return SQLITE_UNIQUE_FIELDS.get(str(error.orig))
+
+
+def raise_unique_violation(
+    session: Session,
+    error: IntegrityError,
+    username: str,
+    user_uuid: UUID = None,
+):
+    field = _violated_field(error)
+
+    if field == 'username':
+        raise UsernameAlreadyExists()
+
+    if field != 'email':
+        raise error
+
+    # Backends report only the first violated constraint, so a username
+    # clash hidden behind an email clash is checked on the error path only.
+    query = select(User.id).where(User.username == username, ACTIVE)
+
+    if user_uuid is not None:
+        query = query.where(User.id != user_uuid)
+
+    if session.scalar(query) is not None:
+        raise UsernameAlreadyExists()
+
+    raise EmailAlreadyExists()
+
+
+def after_cursor(query: Select, cursor: str) -> Select:
+    created_at, user_id = decode_cursor(cursor)
+
+    return query.where(
+        or_(
+            User.createdAt > created_at,
+            and_(User.createdAt == created_at, User.id > user_id),
+        )
+    )
+
+
+def export_query(batch_size: int, cursor: str = None) -> Select:
+    query = (
+        select(User.id, User.username, User.email, User.role, User.createdAt)
+        .where(ACTIVE)
+        .order_by(User.createdAt, User.id)
+    )
+
+    if cursor is not None:
+        query = after_cursor(query, cursor)
+
+    return query.execution_options(yield_per=batch_size)
+
+
+def export_row(row: Row) -> dict:
+    return {
+        'id': str(row.id),
+        'username': row.username,
+        'email': row.email,
+        'role': row.role.value,
+        'cursor': encode_cursor(row.createdAt, row.id),
+    }
+
+
+def _iter_export_batches(
+    session: Session, query: Select
+) -> Iterator[list[dict]]:
+    for partition in session.execute(query).partitions():
+        yield [export_row(row) for row in partition]
+
+
+def export_users(
+    session: Session, batch_size: int, cursor: str = None
+) -> Iterator[list[dict]]:
+    return _iter_export_batches(session, export_query(batch_size, cursor))
+
+
+def record_from_row(row: Row) -> UserRecord:
+    # Rows come straight from typed columns, so validation is skipped.
+    return UserRecord.model_construct(
+        id=row.id,
+        username=row.username,
+        email=row.email,
+        role=row.role,
+        version=row.version,
+        updatedAt=row.updatedAt,
+    )
+
+
+def _fetch_page(session: Session, query: Select, limit: int) -> UserList:
+    rows = session.execute(query.limit(limit + 1)).all()
+
+    next_cursor = None
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].createdAt, rows[-1].id)
+
+    return {
+        'users': [record_from_row(row) for row in rows],
+        'next_cursor': next_cursor,
+    }
+
+
+def get_all_users(
+    session: Session, limit: int, offset: int = 0, cursor: str = None
+) -> UserList:
+    limit = min(max(limit, 1), MAX_PAGE_LIMIT)
+
+    query = (
+        select(*RECORD_COLUMNS).where(ACTIVE).order_by(User.createdAt, User.id)
+    )
+
+    if cursor is not None:
+        query = after_cursor(query, cursor)
+    else:
+        query = query.offset(offset)
+
+    return _fetch_page(session, query, limit)
+
+
+def _prefix_upper_bound(prefix: str) -> str | None:
+    """Smallest string above every string starting with `prefix`
+
+    None when the prefix is all U+10FFFF, which nothing sorts above.
+    """
+
+    stripped = prefix.rstrip(chr(sys.maxunicode))
+
+    if not stripped:
+        return None
+
+    following = ord(stripped[-1]) + 1
+
+    # Surrogates cannot be encoded for the database
+    if SURROGATES_START <= following <= SURROGATES_END:
+        following = SURROGATES_END + 1
+
+    return stripped[:-1] + chr(following)
+
+
+def _search_condition(column, search: UserSearch):
+    term = search.q.lower()
+    lowered = func.lower(column)
+
+    if search.contains:
+        return lowered.contains(term, autoescape=True)
+
+    # A range on lower(column) stays on the functional B-tree index on
+    # every backend, unlike a case-insensitive LIKE. It only means "starts
+    # with" in code point order, which the index is built in too.
+    ordered = CodePointOrder(lowered)
+    upper_bound = _prefix_upper_bound(term)
+
+    if upper_bound is None:
+        return ordered >= term
+
+    return and_(ordered >= term, ordered < upper_bound)
+
+
+def search_query(search: UserSearch) -> Select:
+    fields = [search.field] if search.field else list(SearchField)
+
+    query = (
+        select(*RECORD_COLUMNS)
+        .where(
+            ACTIVE,
+            or_(
+                *(
+                    _search_condition(getattr(User, field.value), search)
+                    for field in fields
+                )
+            ),
+        )
+        .order_by(User.createdAt, User.id)
+    )
+
+    if search.role is not None:
+        query = query.where(User.role == search.role)
+
+    if search.created_after is not None:
+        query = query.where(User.createdAt >= search.created_after)
+
+    if search.created_before is not None:
+        query = query.where(User.createdAt < search.created_before)
+
+    if search.cursor is not None:
+        query = after_cursor(query, search.cursor)
+
+    return query
+
+
+def search_users(session: Session, search: UserSearch) -> UserList:
+    limit = min(max(search.limit, 1), MAX_PAGE_LIMIT)
+
+    return _fetch_page(session, search_query(search), limit)
+
+
+def find_user(session: Session, condition) -> UserRecord | None:
+    """Active user matching `condition`, straight from the database"""
+
+    row = session.execute(
+        select(*RECORD_COLUMNS).where(condition, ACTIVE)
+    ).one_or_none()
+
+    return record_from_row(row) if row is not None else None
+
 
-    return {'users': users}
+def invalidate_cache(session: Session, user_id: UUID = None, *usernames: str):
+    """Drop cached lookups of a user, or leave it to an async caller
 
+    Async callers run these functions on the event loop, where a blocking
+    cache backend must not be called; they collect the invalidations in
+    `session.info` and apply them from a thread.
+    """
 
-def get_user_by_id(session: Session, user_uuid: str) -> UserPublic:
+    deferred = session.info.get(DEFERRED_INVALIDATIONS)
+
+    if deferred is None:
+        get_user_cache().invalidate(user_id, *usernames)
+    else:
+        deferred.append((user_id, *usernames))
+
+
+def get_user_by_id(session: Session, user_uuid: str) -> UserRecord:
     converted_uuid = validate_uuid(user_uuid)
 
-    db_user = session.scalar(select(User).where(User.id == converted_uuid))
+    user_cache = get_user_cache()
+    cached_user = user_cache.get_by_id(converted_uuid)
 
-    if db_user is None:
+    if cached_user == NOT_FOUND:
         raise UserNotFound()
 
-    return db_user
+    if cached_user is not None:
+        return cached_user
+
+    read_at = time()
+    user = find_user(session, User.id == converted_uuid)
+
+    if user is None:
+        user_cache.set_id_not_found(converted_uuid, read_at)
+        raise UserNotFound()
 
+    user_cache.set_user(user, read_at)
 
-def get_user_by_username(session: Session, username: str) -> UserPublic:
-    db_user = session.scalar(select(User).where(User.username == username))
+    return user
 
-    if db_user is None:
+
+def get_user_by_username(session: Session, username: str) -> UserRecord:
+    user_cache = get_user_cache()
+    cached_user = user_cache.get_by_username(username)
+
+    if cached_user == NOT_FOUND:
         raise UserNotFound()
 
-    return db_user
+    if cached_user is not None:
+        return cached_user
 
+    read_at = time()
+    user = find_user(session, User.username == username)
 
-def create_user(session: Session, user_schema: UserSchema) -> UserPublic:
-    db_user = session.scalar(
-        select(User).where(
-            (
-                user_schema.username == User.username
-                or user_schema.email == User.email
-            )
+    if user is None:
+        user_cache.set_username_not_found(username, read_at)
+        raise UserNotFound()
+
+    user_cache.set_user(user, read_at)
+
+    return user
+
+
+def get_credentials(session: Session, username: str) -> Row | None:
+    """Id, role and password hash for a login, never cached"""
+
+    return session.execute(
+        select(User.id, User.role, User.password).where(
+            User.username == username, ACTIVE
         )
-    )
+    ).one_or_none()
+
+
+def lookup_users(
+    session: Session, user_ids: list[str], usernames: list[str]
+) -> UserLookup:
+    """Resolve many ids and usernames with a single query
+
+    The cache is skipped, as checking it key by key would cost more round
+    trips than the one query it saves.
+    """
+
+    converted_uuids = [validate_uuid(user_id) for user_id in user_ids]
+    conditions = []
+
+    if converted_uuids:
+        conditions.append(User.id.in_(converted_uuids))
 
-    if db_user is not None:
-        if db_user.username == user_schema.username:
-            raise UsernameAlreadyExists()
+    if usernames:
+        conditions.append(User.username.in_(usernames))
 
-        raise EmailAlreadyExists()
+    rows = session.execute(
+        select(*RECORD_COLUMNS).where(ACTIVE, or_(*conditions))
+    ).all()
 
+    users = [record_from_row(row) for row in rows]
+    by_id = {user.id: user for user in users}
+    by_username = {user.username: user for user in users}
+
+    return {
+        'by_id': {
+            user_uuid: by_id.get(user_uuid) for user_uuid in converted_uuids
+        },
+        'by_username': {
+            username: by_username.get(username) for username in usernames
+        },
+    }
+
+
+def create_user(
+    session: Session,
+    user_schema: UserSchema,
+    password_hash: str = None,
+    before_commit: Callable[[Session, UserPublic], None] = None,
+) -> UserPublic:
     db_user = User(
         username=user_schema.username,
         name=user_schema.name,
         email=user_schema.email,
-        password=get_password_hash(user_schema.password),
+        password=password_hash or get_password_hash(user_schema.password),
         role=user_schema.role,
     )
 
     session.add(db_user)
+
+    try:
+        session.flush()
+
+    except IntegrityError as error:
+        session.rollback()
+        raise_unique_violation(session, error, user_schema.username)
+
+    user_public = UserPublic.model_validate(db_user)
+    # One row per signup, whatever the number of sinks, keeps the
+    # request cost flat; fan-out happens in the outbox worker.
+    session.add(
+        OutboxEvent(
+            topic=USER_CREATED,
+            payload=user_public.model_dump(mode='json'),
+        )
+    )
+
+    if before_commit is not None:
+        before_commit(session, user_public)
+
     session.commit()
-    session.refresh(db_user)
 
-    return db_user
+    invalidate_cache(session, user_public.id, user_public.username)
+
+    return user_public
+
+
+def _insert_rows(session: Session, rows: list[tuple[int, dict]]) -> list[dict]:
+    try:
+        session.execute(insert(User), [values for _, values in rows])
+        session.commit()
+        return []
+
+    except IntegrityError:
+        session.rollback()
+
+    errors = []
+
+    for row_number, values in rows:
+        try:
+            session.execute(insert(User), values)
+            session.commit()
+
+        except IntegrityError as error:
+            session.rollback()
+
+            try:
+                raise_unique_violation(session, error, values['username'])
+
+            except (UsernameAlreadyExists, EmailAlreadyExists) as conflict:
+                errors.append({'row': row_number, 'detail': conflict.detail})
 
+    return errors
 
-def delete_user(session: Session, user_uuid: str) -> Message:
+
+def insert_users(session: Session, rows: list[tuple[int, dict]]) -> list[dict]:
+    errors = _insert_rows(session, rows)
+
+    invalidate_cache(
+        session, None, *(values['username'] for _, values in rows)
+    )
+
+    return errors
+
+
+def _raise_missing_or_modified(session: Session, user_uuid: UUID):
+    # A guarded statement matches nothing both for a missing user and for
+    # a stale version; only the error path pays for telling them apart.
+    exists = session.scalar(
+        select(User.id).where(User.id == user_uuid, ACTIVE)
+    )
+
+    if exists is not None:
+        raise UserModified()
+
+    raise UserNotFound()
+
+
+def delete_user(
+    session: Session, user_uuid: str, expected_version: int = None
+) -> Message:
     converted_uuid = validate_uuid(user_uuid)
 
-    db_user = session.scalar(select(User).where(User.id == converted_uuid))
+    query = update(User).where(User.id == converted_uuid, ACTIVE)
 
-    if db_user is None:
-        raise UserNotFound()
+    if expected_version is not None:
+        query = query.where(User.version == expected_version)
 
-    session.delete(db_user)
+    deleted_id = session.scalar(
+        query.values(deletedAt=utcnow(), version=User.version + 1).returning(
+            User.id
+        )
+    )
     session.commit()
 
+    if deleted_id is None:
+        _raise_missing_or_modified(session, converted_uuid)
+
+    invalidate_cache(session, deleted_id)
+
     return {'message': 'User successfuly deleted'}
 
 
+def delete_users(session: Session, user_ids: list[UUID]) -> BulkDeleteReport:
+    deleted = session.execute(
+        update(User)
+        .where(User.id.in_(user_ids), ACTIVE)
+        .values(deletedAt=utcnow(), version=User.version + 1)
+        .returning(User.id)
+    ).all()
+    session.commit()
+
+    deleted_ids = {row.id for row in deleted}
+
+    for user_id in deleted_ids:
+        invalidate_cache(session, user_id)
+
+    return {
+        'deleted': sorted(deleted_ids),
+        'not_found': sorted(set(user_ids) - deleted_ids),
+    }
+
+
+def _update_user(
+    session: Session,
+    user_uuid: UUID,
+    values: dict,
+    expected_version: int = None,
+) -> UserRecord:
+    # One UPDATE ... RETURNING both writes and reads back the row, so no
+    # SELECT or refresh is needed around it.
+    query = update(User).where(User.id == user_uuid, ACTIVE)
+
+    if expected_version is not None:
+        query = query.where(User.version == expected_version)
+
+    try:
+        row = session.execute(
+            query.values(**values, version=User.version + 1).returning(
+                *RECORD_COLUMNS
+            )
+        ).one_or_none()
+        session.commit()
+
+    except IntegrityError as error:
+        session.rollback()
+        raise_unique_violation(
+            session, error, values.get('username'), user_uuid
+        )
+
+    if row is None:
+        _raise_missing_or_modified(session, user_uuid)
+
+    invalidate_cache(session, row.id, row.username)
+
+    return record_from_row(row)
+
+
 def update_user(
-    session: Session, user_id: str, user_schema: UserSchema
-) -> UserPublic:
+    session: Session,
+    user_id: str,
+    user_schema: UserSchema,
+    password_hash: str = None,
+    expected_version: int = None,
+) -> UserRecord:
     converted_uuid = validate_uuid(user_id)
 
-    db_user = session.scalar(select(User).where(User.id == converted_uuid))
+    values = {
+        'name': user_schema.name,
+        'email': user_schema.email,
+        'username': user_schema.username,
+        'password': password_hash or get_password_hash(user_schema.password),
+        'role': user_schema.role,
+    }
 
-    if db_user is None:
-        raise UserNotFound
+    return _update_user(session, converted_uuid, values, expected_version)
 
-    db_user.email = user_schema.email
-    db_user.username = user_schema.username
-    db_user.password = get_password_hash(user_schema.password)
-    db_user.role = user_schema.role
 
-    session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+def patch_user(
+    session: Session,
+    user_id: str,
+    user_patch: UserPatch,
+    password_hash: str = None,
+    expected_version: int = None,
+) -> UserRecord:
+    """Write only the supplied fields, hashing only a new password"""
+
+    converted_uuid = validate_uuid(user_id)
+
+    values = user_patch.model_dump(exclude_none=True)
+
+    if 'password' in values:
+        values['password'] = password_hash or get_password_hash(
+            values['password']
+        )
 
-    return db_user
+    return _update_user(session, converted_uuid, values, expected_version)
@@ -21,3 +21,11 @@ class EmailAlreadyExists(HTTPException):
 class UsernameAlreadyExists(HTTPException):
     def __init__(self):
         super().__init__(HTTPStatus.BAD_REQUEST, 'Username already exists')
+
+
+class UserModified(HTTPException):
+    def __init__(self):
+        super().__init__(
+            HTTPStatus.PRECONDITION_FAILED,
+            'User was modified by another request',
+        )
@@ -1,8 +1,15 @@
+from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    EmailStr,
+    Field,
+    model_validator,
+)
 
-from .enums import UserRole
+from .enums import SearchField, UserRole
 
 
 class UserSchema(BaseModel):
@@ -13,6 +20,21 @@ class UserSchema(BaseModel):
     role: UserRole
 
 
+class UserPatch(BaseModel):
+    name: str | None = None
+    email: EmailStr | None = None
+    username: str | None = None
+    password: str | None = None
+    role: UserRole | None = None
+
+    @model_validator(mode='after')
+    def check_not_empty(self):
+        if not self.model_dump(exclude_none=True):
+            raise ValueError('At least one field must be given')
+
+        return self
+
+
 class UserPublic(BaseModel):
     id: UUID
     username: str
@@ -21,9 +43,72 @@ class UserPublic(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UserRecord(UserPublic):
+    version: int
+    updatedAt: datetime
+
+
 class UserDB(UserSchema):
     id: UUID
 
 
+class UserQuery(BaseModel):
+    user_id: str | None = None
+    username: str | None = None
+    limit: int = 10
+    offset: int = 0
+    cursor: str | None = None
+
+
+class UserSearch(BaseModel):
+    q: str = Field(min_length=1)
+    field: SearchField | None = None
+    contains: bool = False
+    role: UserRole | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+    limit: int = 10
+    cursor: str | None = None
+
+
+class UserLookupQuery(BaseModel):
+    user_id: list[str] = Field([], max_length=100)
+    username: list[str] = Field([], max_length=100)
+
+    @model_validator(mode='after')
+    def check_not_empty(self):
+        if not self.user_id and not self.username:
+            raise ValueError('At least one user_id or username must be given')
+
+        return self
+
+
+class UserLookup(BaseModel):
+    """Requested keys mapped to their user, or null when not found"""
+
+    by_id: dict[UUID, UserPublic | None]
+    by_username: dict[str, UserPublic | None]
+
+
 class UserList(BaseModel):
     users: list[UserPublic]
+    next_cursor: str | None = None
+
+
+class BulkImportError(BaseModel):
+    row: int
+    detail: str
+
+
+class BulkImportReport(BaseModel):
+    imported: int
+    errors: list[BulkImportError]
+
+
+class UserIds(BaseModel):
+    ids: list[UUID] = Field(min_length=1, max_length=1000)
+
+
+class BulkDeleteReport(BaseModel):
+    deleted: list[UUID]
+    not_found: list[UUID]
@@ -1,7 +1,16 @@
-from fastapi import FastAPI
+from fastapi import APIRouter
 
-from financial_app.users.routers import router
+from financial_app.common.settings import Settings
 
-user_service = FastAPI()
 
-user_service.include_router(router)
+def get_router(settings: Settings) -> APIRouter:
+    """Users router for the configured mode, importing only that one"""
+
+    if settings.ASYNC_MODE:  # pragma: no cover
+        from financial_app.users import async_routers  # noqa: PLC0415
+
+        return async_routers.router
+
+    from financial_app.users import routers  # noqa: PLC0415
+
+    return routers.router
@@ -18,6 +18,8 @@ def import_models_from(package_name: str):
 
 # Importa todos os modelos antes de rodar migrations
 import_models_from("financial_app.users")
+import_models_from("financial_app.outbox")
+import_models_from("financial_app.idempotency")
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,40 @@
+"""order users search indexes by code point
+
+Revision ID: a1f6c3e8d240
+Revises: e5b9d1f3a624
+Create Date: 2026-10-18 23:12:05.391742
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1f6c3e8d240'
+down_revision: Union[str, Sequence[str], None] = 'e5b9d1f3a624'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = ('name', 'email', 'username')
+
+
+def _rebuild_search_indexes(collate: str):
+    # SQLite already orders text by code point
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for column in SEARCH_COLUMNS:
+        op.drop_index(f'ix_users_lower_{column}', table_name='users')
+        op.create_index(f'ix_users_lower_{column}', 'users', [sa.text(f'lower({column}){collate}')], unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rebuild_search_indexes(' COLLATE "C"')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rebuild_search_indexes('')
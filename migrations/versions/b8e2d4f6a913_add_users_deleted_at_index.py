@@ -0,0 +1,30 @@
+"""add users deletedAt index
+
+Revision ID: b8e2d4f6a913
+Revises: a1f6c3e8d240
+Create Date: 2026-10-18 23:41:17.508326
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e2d4f6a913'
+down_revision: Union[str, Sequence[str], None] = 'a1f6c3e8d240'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DELETED_USERS = sa.text('"deletedAt" IS NOT NULL')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_deletedAt', 'users', ['deletedAt'], unique=False, sqlite_where=DELETED_USERS, postgresql_where=DELETED_USERS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_deletedAt', table_name='users')
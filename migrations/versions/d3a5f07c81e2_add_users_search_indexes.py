@@ -0,0 +1,42 @@
+"""add users search indexes
+
+Revision ID: d3a5f07c81e2
+Revises: b7c1e94f2a3d
+Create Date: 2026-10-18 14:02:47.120385
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a5f07c81e2'
+down_revision: Union[str, Sequence[str], None] = 'b7c1e94f2a3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = ('name', 'email', 'username')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in SEARCH_COLUMNS:
+        op.create_index(f'ix_users_lower_{column}', 'users', [sa.text(f'lower({column})')], unique=False)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+        for column in SEARCH_COLUMNS:
+            op.create_index(f'ix_users_lower_{column}_trgm', 'users', [sa.text(f'lower({column}) gin_trgm_ops')], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        for column in SEARCH_COLUMNS:
+            op.drop_index(f'ix_users_lower_{column}_trgm', table_name='users')
+
+    for column in SEARCH_COLUMNS:
+        op.drop_index(f'ix_users_lower_{column}', table_name='users')
@@ -0,0 +1,80 @@
+"""make users unique indexes partial
+
+Revision ID: e5b9d1f3a624
+Revises: c4e8a2d6b715
+Create Date: 2026-10-18 21:04:52.618233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9d1f3a624'
+down_revision: Union[str, Sequence[str], None] = 'c4e8a2d6b715'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UNIQUE_COLUMNS = ('username', 'email')
+
+LIVE_USERS = sa.text('"deletedAt" IS NULL')
+
+# SQLite reflects the unnamed constraints of the users table under these
+NAMING_CONVENTION = {'uq': 'uq_%(table_name)s_%(column_0_name)s'}
+
+# Batch mode cannot reflect expression indexes, so they are rebuilt
+SEARCH_COLUMNS = ('name', 'email', 'username')
+
+
+def _alter_sqlite_users(alter):
+    for column in SEARCH_COLUMNS:
+        op.drop_index(f'ix_users_lower_{column}', table_name='users')
+
+    with op.batch_alter_table('users', naming_convention=NAMING_CONVENTION) as batch_op:
+        for column in UNIQUE_COLUMNS:
+            alter(batch_op, column)
+
+    for column in SEARCH_COLUMNS:
+        op.create_index(f'ix_users_lower_{column}', 'users', [sa.text(f'lower({column})')], unique=False)
+
+
+def _drop_unique_constraints():
+    if op.get_bind().dialect.name == 'postgresql':
+        for column in UNIQUE_COLUMNS:
+            op.drop_constraint(f'users_{column}_key', 'users', type_='unique')
+        return
+
+    _alter_sqlite_users(lambda batch_op, column: batch_op.drop_constraint(f'uq_users_{column}', type_='unique'))
+
+
+def _create_unique_constraints():
+    if op.get_bind().dialect.name == 'postgresql':
+        for column in UNIQUE_COLUMNS:
+            op.create_unique_constraint(f'users_{column}_key', 'users', [column])
+        return
+
+    _alter_sqlite_users(lambda batch_op, column: batch_op.create_unique_constraint(f'uq_users_{column}', [column]))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_users_createdAt_id', table_name='users')
+    _drop_unique_constraints()
+
+    for column in UNIQUE_COLUMNS:
+        op.create_index(f'ix_users_{column}', 'users', [column], unique=True, sqlite_where=LIVE_USERS, postgresql_where=LIVE_USERS)
+
+    op.create_index('ix_users_createdAt_id', 'users', ['createdAt', 'id'], unique=False, sqlite_where=LIVE_USERS, postgresql_where=LIVE_USERS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_createdAt_id', table_name='users')
+
+    for column in UNIQUE_COLUMNS:
+        op.drop_index(f'ix_users_{column}', table_name='users')
+
+    _create_unique_constraints()
+    op.create_index('ix_users_createdAt_id', 'users', ['createdAt', 'id'], unique=False)
@@ -0,0 +1,39 @@
+from statistics import quantiles
+from time import perf_counter
+from uuid import uuid4
+
+import pytest
+
+from financial_app.auth.tokens import LocalRevocationList, TokenService
+from financial_app.users.enums import UserRole
+
+ROUNDS = 10000
+
+
+@pytest.mark.benchmark
+def test_token_verify_overhead():
+    revocations = LocalRevocationList(max_size=ROUNDS)
+    service = TokenService(
+        {'benchmark': 'b' * 32}, 'benchmark', 'HS256', 60, revocations
+    )
+    token = service.issue(uuid4(), UserRole.user)
+
+    # A full revocation list shows the worst case lookup
+    for number in range(ROUNDS):
+        revocations.revoke(str(number), 2**31)
+
+    latencies = []
+
+    for _ in range(ROUNDS):
+        started = perf_counter()
+        service.verify(token)
+        latencies.append((perf_counter() - started) * 1_000_000)
+
+    percentiles = quantiles(latencies, n=100)
+
+    print(
+        f'\ntoken verify: '
+        f'p50={percentiles[49]:.1f}us p99={percentiles[98]:.1f}us'
+    )
+
+    assert percentiles[49] > 0
@@ -0,0 +1,45 @@
+from statistics import quantiles
+from time import perf_counter
+
+import pytest
+
+from financial_app.common.security import PasswordHasher
+
+ROUNDS = 50
+
+ARGON2_SETTINGS = [
+    {'time_cost': 1, 'memory_cost': 19456, 'parallelism': 1},
+    {'time_cost': 2, 'memory_cost': 19456, 'parallelism': 1},
+    {'time_cost': 3, 'memory_cost': 65536, 'parallelism': 4},
+]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    'argon2_settings',
+    ARGON2_SETTINGS,
+    ids=lambda value: 't{time_cost}-m{memory_cost}-p{parallelism}'.format(
+        **value
+    ),
+)
+def test_password_hashing_latency(argon2_settings: dict):
+    hasher = PasswordHasher(workers=1, max_queue=0, **argon2_settings)
+    hasher.hash('warm-up')
+
+    latencies = []
+
+    for _ in range(ROUNDS):
+        started = perf_counter()
+        hasher.hash('benchmark-password')
+        latencies.append((perf_counter() - started) * 1000)
+
+    hasher.shutdown()
+
+    percentiles = quantiles(latencies, n=100)
+
+    print(
+        f'\n{argon2_settings}: '
+        f'p50={percentiles[49]:.2f}ms p99={percentiles[98]:.2f}ms'
+    )
+
+    assert percentiles[49] > 0
@@ -0,0 +1,106 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from statistics import median
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine
+
+from financial_app.common.database import tables_registry
+
+RUNS = int(os.environ.get('BENCHMARK_STARTUP_RUNS', '5'))
+TOLERANCE = float(os.environ.get('BENCHMARK_TOLERANCE', '0.5'))
+
+BASELINE_PATH = Path(__file__).parent / 'baselines' / 'startup.json'
+
+SECRET_KEY = 's' * 32
+
+# The test client and the token are made before the clock starts, they
+# are not part of the application start.
+STARTUP_SCRIPT = """
+import json
+from time import perf_counter, time
+
+import jwt
+from fastapi.testclient import TestClient
+
+token = jwt.encode(
+    {'sub': '%s', 'role': 'admin', 'jti': 'startup', 'exp': time() + 60},
+    '%s',
+    headers={'kid': 'startup'},
+)
+
+started = perf_counter()
+
+from financial_app.main import app
+
+imported = perf_counter()
+
+with TestClient(app) as client:
+    client.get(
+        '/users',
+        params={'limit': 1},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    first_request = perf_counter()
+
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'first_request_ms': (first_request - imported) * 1000,
+}))
+""" % (uuid4(), SECRET_KEY)
+
+
+def measure_startup(database_path: Path) -> dict:
+    environment = {
+        **os.environ,
+        'DATABASE_URL': f'sqlite:///{database_path}',
+        'OUTBOX_WORKER_ENABLED': 'false',
+        'USER_PURGE_ENABLED': 'false',
+        'IDEMPOTENCY_PURGE_ENABLED': 'false',
+        'RATE_LIMIT_BACKEND': 'none',
+        'AUTH_SECRET_KEYS': json.dumps({'startup': SECRET_KEY}),
+        'AUTH_ACTIVE_KEY_ID': 'startup',
+    }
+    output = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT],
+        capture_output=True,
+        check=True,
+        env=environment,
+        text=True,
+    ).stdout
+
+    return json.loads(output.splitlines()[-1])
+
+
+@pytest.mark.benchmark
+def test_app_startup(tmp_path, request):
+    database_path = tmp_path / 'startup.db'
+    engine = create_engine(f'sqlite:///{database_path}')
+    tables_registry.metadata.create_all(engine)
+    engine.dispose()
+
+    runs = [measure_startup(database_path) for _ in range(RUNS)]
+    result = {
+        name: round(median(run[name] for run in runs), 2)
+        for name in ('import_ms', 'first_request_ms')
+    }
+
+    print(f'\nstartup (median of {RUNS}): {result}')
+
+    if request.config.getoption('--benchmark-update'):
+        BASELINE_PATH.write_text(json.dumps(result, indent=2) + '\n')
+        return
+
+    if not BASELINE_PATH.exists():
+        return
+
+    baseline = json.loads(BASELINE_PATH.read_text())
+
+    for name, value in result.items():
+        assert value <= baseline[name] * (1 + TOLERANCE), (
+            f'{name} regressed from {baseline[name]} to {value}'
+        )
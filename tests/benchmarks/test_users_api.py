@@ -0,0 +1,188 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from itertools import count
+from pathlib import Path
+from statistics import quantiles
+from time import perf_counter
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from financial_app.common.database import (
+    get_read_session,
+    get_session,
+    tables_registry,
+)
+from financial_app.common.settings import Settings
+from financial_app.main import create_app
+from tests.conftest import AUTH_SECRET_KEYS, UserFactory, bearer_headers
+
+SEED_USERS = int(os.environ.get('BENCHMARK_USERS', '1000'))
+REQUESTS = int(os.environ.get('BENCHMARK_REQUESTS', '200'))
+CONCURRENCY = int(os.environ.get('BENCHMARK_CONCURRENCY', '8'))
+TOLERANCE = float(os.environ.get('BENCHMARK_TOLERANCE', '0.5'))
+
+BASELINE_PATH = Path(__file__).parent / 'baselines' / 'users_api.json'
+
+PASSWORD = 'benchmark-password'
+
+
+def user_payload(number: int) -> dict:
+    return {
+        'name': f'Benchmark User {number}',
+        'username': f'benchmark.user{number}',
+        'email': f'benchmark{number}@user.com',
+        'password': PASSWORD,
+        'role': 'user',
+    }
+
+
+def list_users(client, users, number):
+    return client.get('/users', params={'limit': 50})
+
+
+def get_user_by_id(client, users, number):
+    return client.get('/users', params={'user_id': users[number].id})
+
+
+def get_user_by_username(client, users, number):
+    return client.get('/users', params={'username': users[number].username})
+
+
+def create_user(client, users, number):
+    return client.post('/users', json=user_payload(number))
+
+
+def update_user(client, users, number):
+    return client.put(
+        f'/users/{users[number].id}',
+        json={
+            **user_payload(number),
+            'username': f'updated{number}',
+            'email': f'updated{number}@user.com',
+        },
+    )
+
+
+def delete_user(client, users, number):
+    return client.delete(f'/users/{users[-number - 1].id}')
+
+
+ROUTES = {
+    'list_users': list_users,
+    'get_user_by_id': get_user_by_id,
+    'get_user_by_username': get_user_by_username,
+    'create_user': create_user,
+    'update_user': update_user,
+    'delete_user': delete_user,
+}
+
+
+@pytest.fixture(scope='module')
+def benchmark_client(tmp_path_factory):
+    database_path = tmp_path_factory.mktemp('benchmark') / 'users.db'
+    database_url = f'sqlite:///{database_path}'
+    engine = create_engine(database_url)
+    tables_registry.metadata.create_all(engine)
+
+    with Session(engine, expire_on_commit=False) as session:
+        users = UserFactory.build_batch(SEED_USERS + REQUESTS)
+        session.add_all(users)
+        session.commit()
+
+    def get_benchmark_session():
+        with Session(engine) as session:
+            yield session
+
+    app = create_app(
+        Settings(
+            DATABASE_URL=database_url,
+            AUTH_SECRET_KEYS=AUTH_SECRET_KEYS,
+            AUTH_ACTIVE_KEY_ID='test',
+            RATE_LIMIT_BACKEND='none',
+            OUTBOX_WORKER_ENABLED=False,
+            USER_PURGE_ENABLED=False,
+            IDEMPOTENCY_PURGE_ENABLED=False,
+        )
+    )
+    app.dependency_overrides[get_session] = get_benchmark_session
+    app.dependency_overrides[get_read_session] = get_benchmark_session
+
+    with TestClient(app) as client:
+        yield client, users
+
+    engine.dispose()
+
+
+@pytest.fixture(scope='module')
+def baselines(request):
+    current = {}
+
+    yield current
+
+    if request.config.getoption('--benchmark-update'):
+        BASELINE_PATH.write_text(json.dumps(current, indent=2) + '\n')
+
+
+def run_route(route, client, users) -> dict:
+    numbers = count()
+    latencies = []
+
+    def call(_):
+        number = next(numbers)
+        started = perf_counter()
+        response = route(client, users, number)
+        latencies.append(perf_counter() - started)
+
+        return response.status_code
+
+    started = perf_counter()
+
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        statuses = list(executor.map(call, range(REQUESTS)))
+
+    elapsed = perf_counter() - started
+    percentiles = quantiles(latencies, n=100)
+
+    assert all(status < HTTPStatus.BAD_REQUEST for status in statuses), set(
+        statuses
+    )
+
+    return {
+        'throughput': round(REQUESTS / elapsed, 2),
+        'p50_ms': round(percentiles[49] * 1000, 2),
+        'p95_ms': round(percentiles[94] * 1000, 2),
+        'p99_ms': round(percentiles[98] * 1000, 2),
+    }
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('route_name', list(ROUTES))
+def test_users_api_route(route_name, benchmark_client, baselines):
+    client, users = benchmark_client
+    client.headers.update(bearer_headers())
+
+    result = run_route(ROUTES[route_name], client, users)
+    baselines[route_name] = result
+
+    print(f'\n{route_name} (concurrency={CONCURRENCY}): {result}')
+
+    if not BASELINE_PATH.exists():
+        return
+
+    baseline = json.loads(BASELINE_PATH.read_text()).get(route_name)
+
+    if baseline is None:
+        return
+
+    assert result['p95_ms'] <= baseline['p95_ms'] * (1 + TOLERANCE), (
+        f'p95 regressed from {baseline["p95_ms"]}ms to {result["p95_ms"]}ms'
+    )
+    assert result['throughput'] >= baseline['throughput'] * (1 - TOLERANCE), (
+        f'throughput regressed from {baseline["throughput"]} '
+        f'to {result["throughput"]} req/s'
+    )
@@ -0,0 +1,78 @@
+import os
+import resource
+from time import perf_counter
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from financial_app.common.database import tables_registry
+from financial_app.common.settings import get_settings
+from financial_app.common.streaming import ExportFormat, iter_formatted
+from financial_app.users import repositories
+from financial_app.users.models import User
+
+EXPORT_ROWS = int(os.environ.get('BENCHMARK_EXPORT_ROWS', '1000000'))
+SEED_BATCH = 10_000
+
+
+@pytest.fixture
+def export_engine(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "export.db"}')
+    tables_registry.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        for start in range(0, EXPORT_ROWS, SEED_BATCH):
+            session.execute(
+                insert(User),
+                [
+                    {
+                        'id': uuid4(),
+                        'name': f'user{number}',
+                        'username': f'user{number}',
+                        'email': f'user{number}@test.com',
+                        'password': 'hash',
+                        'role': 'user',
+                    }
+                    for number in range(
+                        start, min(start + SEED_BATCH, EXPORT_ROWS)
+                    )
+                ],
+            )
+        session.commit()
+
+    yield engine
+
+    engine.dispose()
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('export_format', list(ExportFormat))
+def test_export_users_throughput(export_engine, export_format):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    exported_bytes = 0
+
+    with Session(export_engine) as session:
+        started = perf_counter()
+
+        for chunk in iter_formatted(
+            repositories.export_users(
+                session, get_settings().EXPORT_BATCH_SIZE
+            ),
+            export_format,
+        ):
+            exported_bytes += len(chunk)
+
+        elapsed = perf_counter() - started
+
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(
+        f'\n{export_format.value}: {EXPORT_ROWS / elapsed:,.0f} rows/s, '
+        f'{exported_bytes / 2**20:.1f} MiB exported, '
+        f'peak RSS {rss_after / 1024:.1f} MiB '
+        f'(+{(rss_after - rss_before) / 1024:.1f} MiB)'
+    )
+
+    assert exported_bytes > 0
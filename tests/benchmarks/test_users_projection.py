@@ -0,0 +1,84 @@
+import os
+import tracemalloc
+from time import perf_counter
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from financial_app.common.database import tables_registry
+from financial_app.users.models import User
+from financial_app.users.repositories import RECORD_COLUMNS, record_from_row
+from financial_app.users.schemas import UserPublic
+
+PAGE_SIZE = int(os.environ.get('BENCHMARK_PAGE_SIZE', '10000'))
+
+
+@pytest.fixture(scope='module')
+def projection_engine():
+    engine = create_engine(
+        'sqlite:///:memory:',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+    tables_registry.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.execute(
+            insert(User),
+            [
+                {
+                    'name': f'Projection User {number}',
+                    'username': f'projection{number}',
+                    'email': f'projection{number}@user.com',
+                    # Realistic Argon2 hash length
+                    'password': 'x' * 97,
+                    'role': 'user',
+                }
+                for number in range(PAGE_SIZE)
+            ],
+        )
+        session.commit()
+
+    yield engine
+
+    engine.dispose()
+
+
+def load_entities(session: Session) -> list:
+    users = session.scalars(select(User).limit(PAGE_SIZE)).all()
+
+    return [UserPublic.model_validate(user) for user in users]
+
+
+def load_projection(session: Session) -> list:
+    rows = session.execute(select(*RECORD_COLUMNS).limit(PAGE_SIZE)).all()
+
+    return [record_from_row(row) for row in rows]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('loader', [load_entities, load_projection])
+def test_users_page_projection(projection_engine, loader):
+    with Session(projection_engine) as session:
+        loader(session)
+        session.expunge_all()
+
+        started = perf_counter()
+        loader(session)
+        elapsed = perf_counter() - started
+        session.expunge_all()
+
+        # Traced separately, tracemalloc slows allocation-heavy code a lot
+        tracemalloc.start()
+        users = loader(session)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(
+        f'\n{loader.__name__}: {PAGE_SIZE} users in {elapsed * 1000:.1f}ms, '
+        f'peak {peak / 2**20:.1f} MiB'
+    )
+
+    assert len(users) == PAGE_SIZE
@@ -0,0 +1,90 @@
+import os
+from statistics import median
+from time import perf_counter
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from financial_app.common.database import tables_registry
+from financial_app.common.serialization import fast_json_response
+from financial_app.users.models import User
+from financial_app.users.rendering import USER_LIST_ADAPTER
+from financial_app.users.repositories import RECORD_COLUMNS, record_from_row
+from financial_app.users.schemas import UserList
+from tests.conftest import UserFactory
+
+PAGE_SIZE = int(os.environ.get('BENCHMARK_PAGE_SIZE', '1000'))
+ROUNDS = 30
+
+
+@pytest.fixture(scope='module')
+def page_session():
+    engine = create_engine(
+        'sqlite:///:memory:',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+    tables_registry.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add_all(UserFactory.build_batch(PAGE_SIZE))
+        session.commit()
+
+        yield session
+
+    engine.dispose()
+
+
+def default_path(session: Session) -> bytes:
+    """ORM instances validated and encoded the way FastAPI does it"""
+
+    users = session.scalars(select(User).limit(PAGE_SIZE)).all()
+    validated = USER_LIST_ADAPTER.validate_python(
+        {'users': users, 'next_cursor': None}, from_attributes=True
+    )
+    content = jsonable_encoder(
+        USER_LIST_ADAPTER.dump_python(validated, mode='json')
+    )
+    session.expunge_all()
+
+    return JSONResponse(content).body
+
+
+def fast_path(session: Session) -> bytes:
+    rows = session.execute(select(*RECORD_COLUMNS).limit(PAGE_SIZE)).all()
+    page = UserList.model_construct(
+        users=[record_from_row(row) for row in rows], next_cursor=None
+    )
+
+    return fast_json_response(USER_LIST_ADAPTER, page).body
+
+
+def measure(path, session: Session) -> float:
+    path(session)
+    timings = []
+
+    for _ in range(ROUNDS):
+        started = perf_counter()
+        path(session)
+        timings.append((perf_counter() - started) * 1000)
+
+    return median(timings)
+
+
+@pytest.mark.benchmark
+def test_users_page_serialization(page_session):
+    assert len(fast_path(page_session)) == len(default_path(page_session))
+
+    default_ms = measure(default_path, page_session)
+    fast_ms = measure(fast_path, page_session)
+
+    print(
+        f'\n{PAGE_SIZE} users: default {default_ms:.2f}ms, '
+        f'fast {fast_ms:.2f}ms ({default_ms / fast_ms:.1f}x)'
+    )
+
+    assert fast_ms < default_ms
@@ -1,15 +1,67 @@
+import json
+from contextlib import contextmanager
+from uuid import uuid4
+
 import factory
 import pytest
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from sqlalchemy import StaticPool, create_engine
+from sqlalchemy import NullPool, StaticPool, create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session
 
-from financial_app.common.database import get_session, tables_registry
-from financial_app.common.security import get_password_hash
-from financial_app.main import app
+from financial_app.auth.tokens import get_token_service, reset_token_service
+from financial_app.common import security
+from financial_app.common.database import (
+    get_async_session,
+    get_read_session,
+    get_session,
+    tables_registry,
+)
+from financial_app.common.metrics import instrument_engine
+from financial_app.common.profiling import (
+    capture_queries,
+    instrument_profiling,
+)
+from financial_app.common.ratelimit import reset_rate_limiter
+from financial_app.common.security import PasswordHasher, get_password_hash
+from financial_app.common.settings import get_settings
+from financial_app.main import create_app
+from financial_app.users import async_routers
+from financial_app.users.cache import reset_user_cache
+from financial_app.users.enums import UserRole
 from financial_app.users.models import User
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        '--benchmark',
+        action='store_true',
+        default=False,
+        help='run benchmarks',
+    )
+    parser.addoption(
+        '--benchmark-update',
+        action='store_true',
+        default=False,
+        help='store benchmark results as the new baselines',
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--benchmark'):
+        return
+
+    skip_benchmark = pytest.mark.skip(reason='use --benchmark to run')
+
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
+AUTH_SECRET_KEYS = {'test': 't' * 32}
+
+
 class UserFactory(factory.Factory):
     class Meta:
         model = User
@@ -21,6 +73,95 @@ class UserFactory(factory.Factory):
     role = 'admin'
 
 
+@pytest.fixture(autouse=True)
+def user_cache():
+    reset_user_cache()
+    yield
+    reset_user_cache()
+
+
+@pytest.fixture(autouse=True)
+def settings_env(monkeypatch):
+    """Set an environment variable and reload the cached settings"""
+
+    def set_env(name: str, value: str):
+        monkeypatch.setenv(name, value)
+        get_settings.cache_clear()
+
+    get_settings.cache_clear()
+    yield set_env
+    get_settings.cache_clear()
+
+
+@pytest.fixture(scope='session')
+def shared_password_hasher():
+    # Production Argon2 costs and a fresh pool per app dominate the suite
+    hasher = PasswordHasher(
+        workers=1,
+        max_queue=32,
+        time_cost=1,
+        memory_cost=1024,
+        parallelism=1,
+    )
+    yield hasher
+    hasher.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def password_hasher(monkeypatch, settings_env, shared_password_hasher):
+    settings_env('PASSWORD_HASH_WORKERS', '1')
+    settings_env('ARGON2_TIME_COST', '1')
+    settings_env('ARGON2_MEMORY_COST', '1024')
+    settings_env('ARGON2_PARALLELISM', '1')
+    # The app lifespan replaces the hasher, which would respawn the pool
+    monkeypatch.setattr(security, '_hasher', shared_password_hasher)
+    monkeypatch.setattr(
+        security,
+        'init_password_hasher',
+        lambda settings: shared_password_hasher,
+    )
+    monkeypatch.setattr(security, 'shutdown_password_hasher', lambda: None)
+    return shared_password_hasher
+
+
+@pytest.fixture(autouse=True)
+def rate_limiter(settings_env):
+    # Tests hammer routes from one client; rate limit tests opt back in
+    settings_env('RATE_LIMIT_BACKEND', 'none')
+    reset_rate_limiter()
+    yield
+    reset_rate_limiter()
+
+
+@pytest.fixture(autouse=True)
+def token_service(settings_env):
+    settings_env('AUTH_SECRET_KEYS', json.dumps(AUTH_SECRET_KEYS))
+    settings_env('AUTH_ACTIVE_KEY_ID', 'test')
+    reset_token_service()
+    yield
+    reset_token_service()
+
+
+def use_marked_settings(request, settings_env):
+    # Apps read their settings once, so tests declare them up front
+    marker = request.node.get_closest_marker('settings')
+
+    for name, value in (marker.kwargs if marker else {}).items():
+        settings_env(name, value)
+
+
+def bearer_headers(role: UserRole = UserRole.admin, user_id=None) -> dict:
+    # Tokens are verified statelessly, so no matching row is needed
+    token = get_token_service().issue(user_id or uuid4(), role)
+
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def admin_headers() -> dict:
+    return bearer_headers()
+
+
 @pytest.fixture
 def session():
     engine = create_engine(
@@ -30,6 +171,8 @@ def session():
     )
 
     tables_registry.metadata.create_all(engine)
+    instrument_engine(engine)
+    instrument_profiling(engine)
 
     with Session(engine) as session:
         yield session
@@ -40,15 +183,68 @@ def session():
 
 
 @pytest.fixture
-def client(session: Session):
+def client(request, session: Session, settings_env, admin_headers: dict):
+    # Background jobs are run explicitly by the tests that need them
+    settings_env('OUTBOX_WORKER_ENABLED', 'false')
+    settings_env('USER_PURGE_ENABLED', 'false')
+    settings_env('IDEMPOTENCY_PURGE_ENABLED', 'false')
+    use_marked_settings(request, settings_env)
+    app = create_app()
+
     def get_test_session():
         return session
 
-    with TestClient(app) as client:
+    with TestClient(app, headers=admin_headers) as client:
         app.dependency_overrides[get_session] = get_test_session
+        app.dependency_overrides[get_read_session] = get_test_session
+        yield client
+
+
+@pytest.fixture
+def async_client(tmp_path, admin_headers: dict):
+    pytest.importorskip('aiosqlite')
+
+    database_path = tmp_path / 'async.db'
+
+    engine = create_engine(f'sqlite:///{database_path}')
+    tables_registry.metadata.create_all(engine)
+
+    async_engine = create_async_engine(
+        f'sqlite+aiosqlite:///{database_path}', poolclass=NullPool
+    )
+    instrument_profiling(async_engine.sync_engine)
+
+    async def get_test_async_session():
+        async with AsyncSession(
+            async_engine, expire_on_commit=False
+        ) as session:
+            yield session
+
+    async_app = FastAPI()
+    async_app.include_router(async_routers.router)
+    async_app.dependency_overrides[get_async_session] = get_test_async_session
+
+    with TestClient(async_app, headers=admin_headers) as client:
         yield client
 
-    app.dependency_overrides.clear()
+    engine.dispose()
+
+
+@pytest.fixture
+def query_budget(session: Session):
+    @contextmanager
+    def budget(max_queries: int):
+        with capture_queries() as profile:
+            yield profile
+
+        statements = '\n'.join(query.statement for query in profile.queries)
+
+        assert len(profile) <= max_queries, (
+            f'{len(profile)} queries issued, budget is {max_queries}:\n'
+            f'{statements}'
+        )
+
+    return budget
 
 
 @pytest.fixture
@@ -0,0 +1,212 @@
+from http import HTTPStatus
+from time import time
+from uuid import uuid4
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from financial_app.auth import tokens
+from financial_app.auth.responses import InvalidToken, RevocationListFull
+from financial_app.auth.tokens import LocalRevocationList, TokenService
+from financial_app.common import security
+from financial_app.users.enums import UserRole
+from financial_app.users.models import User
+from tests.conftest import bearer_headers
+
+SECRET_KEY = 'k' * 32
+
+NEW_SECRET_KEY = 'n' * 32
+
+
+def make_service(keys: dict, active_key_id: str, ttl: int = 60):
+    return TokenService(
+        keys, active_key_id, 'HS256', ttl, LocalRevocationList(10)
+    )
+
+
+def login(client: TestClient, username: str, password: str):
+    return client.post(
+        '/auth/token', data={'username': username, 'password': password}
+    )
+
+
+def test_login_and_use_token(client: TestClient, user: User):
+    client.headers.pop('Authorization')
+
+    response = login(client, user.username, user.clean_password)
+    token = response.json()
+
+    users = client.get(
+        '/users',
+        headers={'Authorization': f'Bearer {token["access_token"]}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert token['token_type'] == 'bearer'
+    assert users.status_code == HTTPStatus.OK
+
+
+@pytest.mark.parametrize(
+    ('username', 'password'),
+    [('test0', 'wrong-password'), ('unknown', 'testtest')],
+)
+def test_login_with_wrong_credentials(
+    client: TestClient, user: User, username: str, password: str
+):
+    response = login(client, username, password)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.headers['WWW-Authenticate'] == 'Bearer'
+
+
+def test_unknown_username_still_verifies_a_password(client: TestClient):
+    login(client, 'unknown', 'testtest')
+    hashes = security.get_password_hasher().stats()['hashes']
+
+    response = login(client, 'unknown', 'testtest')
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert security.get_password_hasher().stats()['hashes'] == hashes + 1
+
+
+def test_deleted_user_cannot_login(client: TestClient, user: User):
+    client.delete(f'/users/{user.id}')
+
+    response = login(client, user.username, user.clean_password)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_protected_route_without_token(client: TestClient):
+    client.headers.pop('Authorization')
+
+    response = client.get('/users')
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+    assert response.json()['detail'] == 'Could not validate credentials'
+
+
+def test_user_role_cannot_use_admin_routes(client: TestClient):
+    headers = bearer_headers(UserRole.user)
+
+    admin = client.get('/admin/pool', headers=headers)
+    bulk_delete = client.post(
+        '/users/bulk-delete', json={'ids': []}, headers=headers
+    )
+
+    assert admin.status_code == HTTPStatus.FORBIDDEN
+    assert bulk_delete.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_user_can_only_update_self(
+    client: TestClient, user: User, other_user: User
+):
+    headers = bearer_headers(UserRole.user, user.id)
+    payload = {
+        'name': 'Self',
+        'username': 'self.user',
+        'email': 'self@user.com',
+        'password': 'self-password',
+        'role': 'user',
+    }
+
+    own = client.put(f'/users/{user.id}', json=payload, headers=headers)
+    other = client.put(
+        f'/users/{other_user.id}', json=payload, headers=headers
+    )
+    promoted = client.put(
+        f'/users/{user.id}', json={**payload, 'role': 'admin'}, headers=headers
+    )
+
+    assert own.status_code == HTTPStatus.OK
+    assert other.status_code == HTTPStatus.FORBIDDEN
+    assert promoted.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_only_admins_create_admins(client: TestClient):
+    client.headers.pop('Authorization')
+    payload = {
+        'name': 'New User',
+        'username': 'new.user',
+        'email': 'new@user.com',
+        'password': 'new-password',
+        'role': 'admin',
+    }
+
+    admin = client.post('/users', json=payload)
+    user = client.post('/users', json={**payload, 'role': 'user'})
+
+    assert admin.status_code == HTTPStatus.FORBIDDEN
+    assert user.status_code == HTTPStatus.CREATED
+
+
+def test_revoked_token_is_rejected(client: TestClient, query_budget):
+    with query_budget(0):
+        revoked = client.post('/auth/revoke')
+
+    response = client.get('/users')
+
+    assert revoked.status_code == HTTPStatus.OK
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_key_rotation_keeps_issued_tokens_valid():
+    token = make_service({'old': SECRET_KEY}, 'old').issue(
+        uuid4(), UserRole.user
+    )
+
+    rotated = make_service({'old': SECRET_KEY, 'new': NEW_SECRET_KEY}, 'new')
+    retired = make_service({'new': NEW_SECRET_KEY}, 'new')
+    new_token = rotated.issue(uuid4(), UserRole.user)
+
+    assert rotated.verify(token).role == UserRole.user
+    assert jwt.get_unverified_header(new_token)['kid'] == 'new'
+
+    with pytest.raises(InvalidToken):
+        retired.verify(token)
+
+
+def test_expired_token_is_rejected():
+    service = make_service({'test': SECRET_KEY}, 'test', ttl=-1)
+
+    with pytest.raises(InvalidToken):
+        service.verify(service.issue(uuid4(), UserRole.admin))
+
+
+def test_revocation_list_forgets_expired_tokens():
+    revocations = LocalRevocationList(max_size=10)
+
+    revocations.revoke('expired', time() - 1)
+    revocations.revoke('live', time() + 60)
+
+    assert not revocations.is_revoked('expired')
+    assert revocations.is_revoked('live')
+
+
+def test_revocation_list_forgets_by_expiry(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(tokens, 'time', lambda: clock[0])
+    revocations = LocalRevocationList(max_size=2)
+
+    revocations.revoke('long', 160)
+    revocations.revoke('short', 110)
+    clock[0] = 120
+    revocations.revoke('next', 180)
+
+    assert revocations.is_revoked('long')
+    assert not revocations.is_revoked('short')
+    assert revocations.is_revoked('next')
+
+
+def test_full_revocation_list_fails_closed(monkeypatch):
+    monkeypatch.setattr(tokens, 'time', lambda: 100.0)
+    revocations = LocalRevocationList(max_size=1)
+    revocations.revoke('live', 130)
+
+    with pytest.raises(RevocationListFull) as error:
+        revocations.revoke('other', 160)
+
+    assert error.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert error.value.headers['Retry-After'] == '30'
+    assert revocations.is_revoked('live')
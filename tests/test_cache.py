@@ -0,0 +1,161 @@
+from http import HTTPStatus
+from time import time
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from financial_app.common.cache import LocalCache, SharedCache
+from financial_app.users.cache import NOT_FOUND, UserCache, get_user_cache
+from financial_app.users.models import User
+
+
+class FakeSharedClient:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, name):
+        return self.values.get(name)
+
+    def set(self, name, value, ex=None):
+        self.values[name] = value.encode()
+
+    def delete(self, *names):
+        for name in names:
+            self.values.pop(name, None)
+
+
+def test_local_cache_expires_entries():
+    cache = LocalCache(max_size=10)
+    cache.set('key', 'value', ttl=-1)
+
+    assert cache.get('key') is None
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(max_size=2)
+    cache.set('first', '1', ttl=60)
+    cache.set('second', '2', ttl=60)
+    cache.get('first')
+    cache.set('third', '3', ttl=60)
+
+    assert cache.get('second') is None
+    assert cache.get('first') == '1'
+    assert cache.stats() == {'size': 2, 'evictions': 1}
+
+
+@pytest.fixture
+def shared_user_cache():
+    client = FakeSharedClient()
+
+    return client, UserCache(SharedCache(client, 'test:'), 60, 5)
+
+
+def test_user_cache_never_stores_password(shared_user_cache, user: User):
+    client, user_cache = shared_user_cache
+
+    user_cache.set_user(user, time())
+
+    assert user_cache.get_by_id(user.id).username == user.username
+    assert user_cache.get_by_username(user.username).id == user.id
+    assert all(user.password.encode() not in v for v in client.values.values())
+
+
+def test_user_cache_ignores_stale_username(shared_user_cache, user: User):
+    _, user_cache = shared_user_cache
+
+    user_cache.set_user(user, time())
+    old_username = user.username
+    user.username = 'renamed'
+    user_cache.set_user(user, time())
+
+    assert user_cache.get_by_username(old_username) is None
+
+
+def test_user_cache_caches_not_found(shared_user_cache):
+    _, user_cache = shared_user_cache
+    user_id = uuid4()
+
+    user_cache.set_id_not_found(user_id, time())
+    user_cache.set_username_not_found('missing', time())
+
+    assert user_cache.get_by_id(user_id) == NOT_FOUND
+    assert user_cache.get_by_username('missing') == NOT_FOUND
+
+
+def test_user_cache_drops_reads_older_than_invalidation(
+    shared_user_cache, user: User
+):
+    _, user_cache = shared_user_cache
+    read_at = time()
+
+    user_cache.invalidate(user.id, user.username)
+    user_cache.set_user(user, read_at)
+
+    assert user_cache.get_by_id(user.id) is None
+    assert user_cache.get_by_username(user.username) is None
+
+
+def test_get_user_by_id_uses_cache(client: TestClient, user: User):
+    client.get('/users', params={'user_id': str(user.id)})
+    response = client.get('/users', params={'user_id': str(user.id)})
+
+    assert response.status_code == HTTPStatus.OK
+    assert get_user_cache().stats()['hits'] == 1
+
+
+def test_update_user_invalidates_cache(client: TestClient, user: User):
+    old_username = user.username
+    client.get('/users', params={'username': old_username})
+
+    client.put(
+        f'/users/{user.id}',
+        json={
+            'name': user.name,
+            'username': 'different.username',
+            'email': user.email,
+            'password': 'different-password',
+            'role': 'user',
+        },
+    )
+
+    by_old_username = client.get('/users', params={'username': old_username})
+    by_id = client.get('/users', params={'user_id': str(user.id)})
+
+    assert by_old_username.status_code == HTTPStatus.NOT_FOUND
+    assert by_id.json()['username'] == 'different.username'
+
+
+def test_create_user_invalidates_not_found(client: TestClient):
+    client.get('/users', params={'username': 'test.user'})
+
+    client.post(
+        '/users',
+        json={
+            'name': 'Test User',
+            'username': 'test.user',
+            'email': 'test@user.com',
+            'password': 'test.password',
+            'role': 'admin',
+        },
+    )
+
+    response = client.get('/users', params={'username': 'test.user'})
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_delete_user_invalidates_cache(client: TestClient, user: User):
+    client.get('/users', params={'user_id': str(user.id)})
+    client.delete(f'/users/{user.id}')
+
+    response = client.get('/users', params={'user_id': str(user.id)})
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_get_admin_cache_status(client: TestClient):
+    response = client.get('/admin/cache')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['hits'] == 0
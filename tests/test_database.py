@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from financial_app.common import database
+from financial_app.common.database import (
+    MonitoredQueuePool,
+    create_async_database_engine,
+    create_database_engine,
+    get_pool_status,
+)
+from financial_app.common.settings import Settings
+
+
+def test_create_database_engine_uses_pool_settings(tmp_path):
+    settings = Settings(
+        DATABASE_URL=f'sqlite:///{tmp_path / "pool.db"}',
+        DATABASE_POOL_SIZE=3,
+        DATABASE_MAX_OVERFLOW=2,
+    )
+
+    engine = create_database_engine(settings)
+
+    assert isinstance(engine.pool, MonitoredQueuePool)
+    assert engine.pool.size() == settings.DATABASE_POOL_SIZE
+
+    engine.dispose()
+
+
+def test_create_database_engine_in_memory_keeps_default_pool():
+    engine = create_database_engine(Settings(DATABASE_URL='sqlite://'))
+
+    assert not isinstance(engine.pool, MonitoredQueuePool)
+    assert set(get_pool_status(engine.pool)) == {'status'}
+
+    engine.dispose()
+
+
+def test_pool_status_counts_checkouts_and_timeouts(tmp_path):
+    settings = Settings(
+        DATABASE_URL=f'sqlite:///{tmp_path / "pool.db"}',
+        DATABASE_POOL_SIZE=1,
+        DATABASE_MAX_OVERFLOW=0,
+        DATABASE_POOL_TIMEOUT=0.01,
+    )
+    engine = create_database_engine(settings)
+
+    with engine.connect():
+        status = get_pool_status(engine.pool)
+
+        assert status['checked_out'] == 1
+
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    status = get_pool_status(engine.pool)
+
+    assert status['checkouts'] == 1
+    assert status['timeouts'] == 1
+    assert status['checked_out'] == 0
+    assert status['wait_time_max'] >= 0
+
+    engine.dispose()
+
+
+def test_get_admin_pool_status(client: TestClient):
+    response = client.get('/admin/pool')
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'status' in response.json()
+    assert response.json()['async_pool'] is None
+
+
+def test_get_admin_pool_status_reports_async_pool(
+    client: TestClient, tmp_path, monkeypatch
+):
+    pytest.importorskip('aiosqlite')
+
+    settings = Settings(
+        DATABASE_URL=f'sqlite:///{tmp_path / "pool.db"}',
+        ASYNC_DATABASE_URL=f'sqlite+aiosqlite:///{tmp_path / "pool.db"}',
+        DATABASE_POOL_SIZE=3,
+    )
+    async_engine = create_async_database_engine(settings)
+    monkeypatch.setattr(database, 'async_engine', async_engine)
+
+    pool = client.get('/admin/pool').json()
+    metrics = client.get('/metrics').text
+
+    assert pool['async_pool']['size'] == settings.DATABASE_POOL_SIZE
+    assert 'db_async_pool{stat="size"} 3' in metrics
+
+    async_engine.sync_engine.dispose()
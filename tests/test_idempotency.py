@@ -0,0 +1,272 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from http import HTTPStatus
+from threading import Event
+from time import sleep
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from financial_app.common import security
+from financial_app.common.database import tables_registry, utcnow
+from financial_app.common.responses import HashingUnavailable
+from financial_app.idempotency import guard
+from financial_app.idempotency.models import IdempotencyKey
+from financial_app.idempotency.repositories import purge_expired_keys
+from financial_app.main import create_app
+from financial_app.users import repositories
+from financial_app.users.models import User
+from financial_app.users.schemas import UserSchema
+from tests.conftest import bearer_headers, use_marked_settings
+
+USER_PAYLOAD = {
+    'name': 'Test User',
+    'username': 'test.user',
+    'email': 'test@user.com',
+    'password': 'test.password',
+    'role': 'user',
+}
+
+KEY = {'Idempotency-Key': 'signup-1'}
+
+
+def count_users(session: Session) -> int:
+    return session.scalar(select(func.count()).select_from(User))
+
+
+def test_retry_replays_stored_response(client: TestClient, session: Session):
+    created = client.post('/users', json=USER_PAYLOAD, headers=KEY)
+    hashes = security.get_password_hasher().stats()['hashes']
+
+    replayed = client.post('/users', json=USER_PAYLOAD, headers=KEY)
+
+    assert created.status_code == replayed.status_code == HTTPStatus.CREATED
+    assert replayed.json() == created.json()
+    assert replayed.headers['Idempotent-Replayed'] == 'true'
+    assert 'Idempotent-Replayed' not in created.headers
+    assert security.get_password_hasher().stats()['hashes'] == hashes
+    assert count_users(session) == 1
+
+
+def test_key_completes_with_the_user_insert(
+    client: TestClient, session: Session, monkeypatch
+):
+    # A crash after the insert must not leave the key claimed but empty
+    def crash(*args):
+        raise RuntimeError('crashed after commit')
+
+    monkeypatch.setattr(guard, 'complete_key', crash)
+
+    created = client.post('/users', json=USER_PAYLOAD, headers=KEY)
+    record = session.scalar(select(IdempotencyKey))
+
+    assert created.status_code == HTTPStatus.CREATED
+    assert record.status == HTTPStatus.CREATED
+    assert record.response == created.json()
+
+
+@pytest.mark.parametrize(
+    'change', [{'username': 'other.user'}, {'password': 'other.password'}]
+)
+def test_key_reused_for_different_request(client: TestClient, change: dict):
+    client.post('/users', json=USER_PAYLOAD, headers=KEY)
+
+    response = client.post(
+        '/users', json={**USER_PAYLOAD, **change}, headers=KEY
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_fingerprint_is_keyed(client: TestClient, session: Session):
+    client.post('/users', json=USER_PAYLOAD, headers=KEY)
+    fingerprint = session.scalar(select(IdempotencyKey.fingerprint))
+
+    plain = guard.sha256(
+        f'POST /users\n{UserSchema(**USER_PAYLOAD).model_dump_json()}'.encode()
+    ).hexdigest()
+
+    assert fingerprint != plain
+
+
+def test_keys_are_scoped_per_caller(client: TestClient, session: Session):
+    first = client.post('/users', json=USER_PAYLOAD, headers=KEY)
+    other = client.post(
+        '/users',
+        json={**USER_PAYLOAD, 'username': 'other.user', 'email': 'o@user.com'},
+        headers={**bearer_headers(), **KEY},
+    )
+
+    assert first.status_code == other.status_code == HTTPStatus.CREATED
+    assert 'Idempotent-Replayed' not in other.headers
+    assert count_users(session) == len([first, other])
+
+
+def test_client_error_is_replayed(client: TestClient, user: User):
+    payload = {**USER_PAYLOAD, 'username': user.username}
+
+    first = client.post('/users', json=payload, headers=KEY)
+    replayed = client.post('/users', json=payload, headers=KEY)
+
+    assert first.status_code == replayed.status_code == HTTPStatus.BAD_REQUEST
+    assert replayed.json() == {'detail': 'Username already exists'}
+    assert replayed.headers['Idempotent-Replayed'] == 'true'
+
+
+def test_server_error_releases_key(client: TestClient, monkeypatch):
+    def busy(password):
+        raise HashingUnavailable()
+
+    with monkeypatch.context() as patch:
+        patch.setattr(repositories, 'get_password_hash', busy)
+        failed = client.post('/users', json=USER_PAYLOAD, headers=KEY)
+
+    retried = client.post('/users', json=USER_PAYLOAD, headers=KEY)
+
+    assert failed.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert retried.status_code == HTTPStatus.CREATED
+    assert 'Idempotent-Replayed' not in retried.headers
+
+
+def test_expired_key_is_taken_over(client: TestClient, session: Session):
+    user_id = uuid4()
+    session.add(
+        IdempotencyKey(
+            key=f'user:{user_id} {KEY["Idempotency-Key"]}',
+            fingerprint='stale',
+            lockedUntil=utcnow(),
+            expiresAt=utcnow() - timedelta(seconds=1),
+        )
+    )
+    session.commit()
+
+    response = client.post(
+        '/users',
+        json=USER_PAYLOAD,
+        headers={**bearer_headers(user_id=user_id), **KEY},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert session.scalar(select(IdempotencyKey.status)) == HTTPStatus.CREATED
+
+
+@pytest.fixture
+def file_client(request, tmp_path, settings_env):
+    # Concurrent requests need sessions of their own
+    database_url = f'sqlite:///{tmp_path / "idempotency.db"}'
+    engine = create_engine(database_url)
+    tables_registry.metadata.create_all(engine)
+
+    settings_env('DATABASE_URL', database_url)
+    settings_env('OUTBOX_WORKER_ENABLED', 'false')
+    settings_env('USER_PURGE_ENABLED', 'false')
+    settings_env('IDEMPOTENCY_PURGE_ENABLED', 'false')
+    use_marked_settings(request, settings_env)
+
+    with TestClient(create_app(), headers=bearer_headers()) as client:
+        yield client, engine
+
+    engine.dispose()
+
+
+def hold_signup(monkeypatch) -> tuple[Event, Event]:
+    started = Event()
+    release = Event()
+    create_user = repositories.create_user
+
+    def held(*args, **kwargs):
+        started.set()
+        release.wait(10)
+        return create_user(*args, **kwargs)
+
+    monkeypatch.setattr(repositories, 'create_user', held)
+
+    return started, release
+
+
+def test_concurrent_duplicate_waits_for_first(file_client, monkeypatch):
+    client, engine = file_client
+    started, release = hold_signup(monkeypatch)
+    waiting = Event()
+
+    def poll(seconds):
+        waiting.set()
+        sleep(seconds)
+
+    monkeypatch.setattr(guard, 'sleep', poll)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(
+            client.post, '/users', json=USER_PAYLOAD, headers=KEY
+        )
+        started.wait(10)
+        duplicate = executor.submit(
+            client.post, '/users', json=USER_PAYLOAD, headers=KEY
+        )
+        waiting.wait(10)
+        release.set()
+
+    with Session(engine) as session:
+        users = count_users(session)
+
+    assert first.result().status_code == HTTPStatus.CREATED
+    assert waiting.is_set()
+    assert duplicate.result().json() == first.result().json()
+    assert duplicate.result().headers['Idempotent-Replayed'] == 'true'
+    assert users == 1
+
+
+@pytest.mark.settings(IDEMPOTENCY_WAIT_TIMEOUT='0')
+def test_concurrent_duplicate_gives_up_waiting(file_client, monkeypatch):
+    client, _ = file_client
+    started, release = hold_signup(monkeypatch)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        first = executor.submit(
+            client.post, '/users', json=USER_PAYLOAD, headers=KEY
+        )
+        started.wait(10)
+        duplicate = client.post('/users', json=USER_PAYLOAD, headers=KEY)
+        release.set()
+
+    assert duplicate.status_code == HTTPStatus.CONFLICT
+    assert first.result().status_code == HTTPStatus.CREATED
+
+
+def test_purge_expired_keys(session: Session):
+    now = utcnow()
+    session.add_all([
+        IdempotencyKey(
+            key=f'expired-{number}',
+            fingerprint='',
+            lockedUntil=now,
+            expiresAt=now - timedelta(hours=1),
+        )
+        for number in range(3)
+    ])
+    session.add(
+        IdempotencyKey(
+            key='live',
+            fingerprint='',
+            lockedUntil=now,
+            expiresAt=now + timedelta(hours=1),
+        )
+    )
+    session.commit()
+
+    purged = purge_expired_keys(session, now, batch_size=2)
+
+    assert purged == len(['expired-0', 'expired-1', 'expired-2'])
+    assert session.scalars(select(IdempotencyKey.key)).all() == ['live']
+
+
+def test_async_retry_replays_stored_response(async_client: TestClient):
+    created = async_client.post('/users', json=USER_PAYLOAD, headers=KEY)
+    replayed = async_client.post('/users', json=USER_PAYLOAD, headers=KEY)
+
+    assert created.status_code == HTTPStatus.CREATED
+    assert replayed.json() == created.json()
+    assert replayed.headers['Idempotent-Replayed'] == 'true'
@@ -0,0 +1,86 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from financial_app.common import security
+from financial_app.common.metrics import Counter, Histogram
+from financial_app.users.models import User
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('latency', 'Latency', ('route',), (0.1, 1.0))
+
+    histogram.observe('/users', value=0.05)
+    histogram.observe('/users', value=0.5)
+    histogram.observe('/users', value=5)
+
+    assert histogram.render().splitlines()[2:] == [
+        'latency_bucket{route="/users",le="0.1"} 1',
+        'latency_bucket{route="/users",le="1.0"} 2',
+        'latency_bucket{route="/users",le="+Inf"} 3',
+        'latency_sum{route="/users"} 5.55',
+        'latency_count{route="/users"} 3',
+    ]
+
+
+def test_counter_escapes_label_values():
+    counter = Counter('requests', 'Requests', ('route',))
+
+    counter.inc('say "hi"')
+
+    assert counter.samples() == ['requests{route="say \\"hi\\""} 1']
+
+
+def test_server_timing_header(client: TestClient, user: User):
+    response = client.get('/users', params={'user_id': str(user.id)})
+
+    server_timing = response.headers['server-timing']
+    queries = re.search(r'desc="(\d+) queries"', server_timing).group(1)
+
+    assert response.status_code == HTTPStatus.OK
+    assert int(queries) == 1
+    assert {'db', 'hash', 'render', 'total'} == {
+        metric.split(';')[0] for metric in server_timing.split(', ')
+    }
+
+
+def test_failed_statement_is_not_timed_into_the_next(session: Session):
+    connection = session.connection()
+
+    with pytest.raises(OperationalError):
+        connection.execute(text('SELECT * FROM missing'))
+
+    assert connection.info['query_started'] == []
+
+
+def test_get_metrics(client: TestClient, user: User):
+    client.get('/users', params={'user_id': str(user.id)})
+
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert (
+        'http_requests_total{method="GET",route="/users/",status="200"}'
+        in response.text
+    )
+    assert 'http_request_db_queries_bucket' in response.text
+    assert 'db_pool{stat="status"}' not in response.text
+    assert 'user_cache{stat="misses"} 1' in response.text
+    assert 'password_hashing{stat="workers"} 1' in response.text
+
+
+def test_get_metrics_does_not_start_password_hasher(
+    client: TestClient, monkeypatch
+):
+    monkeypatch.setattr(security, '_hasher', None)
+
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'password_hashing' not in response.text
+    assert security.peek_password_hasher() is None
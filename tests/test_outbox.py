@@ -0,0 +1,120 @@
+import asyncio
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from financial_app.common.database import utcnow
+from financial_app.outbox.models import OutboxEvent
+from financial_app.outbox.sinks import USER_CREATED, FakeSink
+from financial_app.outbox.worker import OutboxWorker
+
+USER_PAYLOAD = {
+    'name': 'Test User',
+    'username': 'test.user',
+    'email': 'test@user.com',
+    'password': 'test.password',
+    'role': 'admin',
+}
+
+
+def make_worker(session: Session, *sinks: FakeSink, **options):
+    return OutboxWorker(
+        lambda: Session(session.get_bind()),
+        {USER_CREATED: list(sinks)},
+        **options,
+    )
+
+
+def test_create_user_writes_one_outbox_event(
+    client: TestClient, session: Session
+):
+    created = client.post('/users', json=USER_PAYLOAD).json()
+
+    events = session.scalars(select(OutboxEvent)).all()
+
+    assert len(events) == 1
+    assert events[0].topic == USER_CREATED
+    assert events[0].payload == created
+
+
+def test_failed_signup_writes_no_outbox_event(
+    client: TestClient, session: Session
+):
+    client.post('/users', json=USER_PAYLOAD)
+    client.post('/users', json=USER_PAYLOAD)
+
+    assert len(session.scalars(select(OutboxEvent)).all()) == 1
+
+
+def test_worker_delivers_batch_to_every_sink(
+    client: TestClient, session: Session
+):
+    for number in range(3):
+        client.post(
+            '/users',
+            json={
+                **USER_PAYLOAD,
+                'username': f'user{number}',
+                'email': f'user{number}@test.com',
+            },
+        )
+
+    audit, email = FakeSink(), FakeSink()
+    worker = make_worker(session, audit, email, batch_size=2)
+
+    processed = [asyncio.run(worker.run_once()) for _ in range(3)]
+    pending = session.scalars(
+        select(OutboxEvent).where(OutboxEvent.processedAt.is_(None))
+    ).all()
+
+    assert processed == [2, 1, 0]
+    assert [event.payload['username'] for event in audit.events] == [
+        'user0',
+        'user1',
+        'user2',
+    ]
+    assert len(email.events) == len(audit.events)
+    assert not pending
+
+
+def test_worker_retries_failed_delivery(client: TestClient, session: Session):
+    client.post('/users', json=USER_PAYLOAD)
+
+    sink = FakeSink(failures=1)
+    worker = make_worker(session, sink)
+
+    asyncio.run(worker.run_once())
+    event = session.scalar(select(OutboxEvent))
+
+    assert event.attempts == 1
+    assert event.lastError == 'Fake sink failure'
+    assert event.processedAt is None
+    assert not sink.events
+
+    # Skip the backoff delay
+    session.execute(
+        update(OutboxEvent).values(availableAt=utcnow() - timedelta(1))
+    )
+    session.commit()
+    asyncio.run(worker.run_once())
+    session.refresh(event)
+
+    assert event.processedAt is not None
+    assert len(sink.events) == 1
+
+
+def test_worker_gives_up_after_max_attempts(
+    client: TestClient, session: Session
+):
+    client.post('/users', json=USER_PAYLOAD)
+
+    session.execute(update(OutboxEvent).values(attempts=5))
+    session.commit()
+
+    sink = FakeSink()
+    worker = make_worker(session, sink, max_attempts=5)
+
+    assert asyncio.run(worker.run_once()) == 0
+    assert not sink.events
@@ -0,0 +1,112 @@
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from financial_app.common import profiling
+from financial_app.common.profiling import (
+    ProfiledQuery,
+    QueryProfile,
+    report_repeated_queries,
+)
+from financial_app.users.models import User
+from tests.conftest import UserFactory
+
+
+@pytest.fixture
+def profiling_enabled(monkeypatch):
+    monkeypatch.setattr(profiling.config, 'enabled', True)
+    monkeypatch.setattr(profiling.config, 'slow_query_threshold', 0)
+    monkeypatch.setattr(profiling.config, 'repeated_query_threshold', 2)
+
+
+def test_query_budget_within_budget(
+    client: TestClient, user: User, query_budget
+):
+    with query_budget(1) as profile:
+        client.get('/users', params={'user_id': str(user.id)})
+
+    assert len(profile) == 1
+
+
+def test_query_budget_exceeded(client: TestClient, user: User, query_budget):
+    with pytest.raises(AssertionError, match='budget is 0'):
+        with query_budget(0):
+            client.get('/users')
+
+
+def test_slow_query_is_logged_with_plan(
+    session: Session, profiling_enabled, caplog
+):
+    with caplog.at_level(logging.WARNING, logger=profiling.__name__):
+        session.scalars(
+            select(User).where(
+                User.username == 'slow', User.deletedAt.is_(None)
+            )
+        ).all()
+
+    assert 'Slow query' in caplog.text
+    assert "('slow',)" in caplog.text
+    assert 'SEARCH users USING INDEX' in caplog.text
+
+
+def test_slow_query_log_redacts_password_hashes(
+    session: Session, profiling_enabled, caplog
+):
+    user = UserFactory(password='$argon2id$secret-hash')
+
+    with caplog.at_level(logging.WARNING, logger=profiling.__name__):
+        session.add(user)
+        session.commit()
+
+    assert 'INSERT INTO users' in caplog.text
+    assert '$argon2id$secret-hash' not in caplog.text
+    assert profiling.REDACTED in caplog.text
+    assert user.username in caplog.text
+
+
+def test_explain_runs_in_a_savepoint(
+    session: Session, profiling_enabled, monkeypatch
+):
+    monkeypatch.setattr(profiling, 'SAVEPOINT_FREE_DIALECTS', set())
+    connection = session.connection()
+    statements = []
+    event.listen(
+        connection,
+        'before_cursor_execute',
+        lambda *args: statements.append(args[2]),
+    )
+
+    plan = profiling._explain(connection, 'SELECT * FROM missing', ())
+
+    assert plan.startswith('EXPLAIN failed')
+    assert statements[0].startswith('SAVEPOINT')
+    assert statements[-1].startswith('ROLLBACK TO SAVEPOINT')
+    assert session.scalars(select(User)).all() == []
+
+
+def test_failed_statement_does_not_leave_its_start_time(session: Session):
+    connection = session.connection()
+
+    with pytest.raises(OperationalError):
+        connection.execute(text('SELECT * FROM missing'))
+
+    assert connection.info['profile_started'] == []
+
+
+def test_repeated_queries_are_reported(profiling_enabled, caplog):
+    profile = QueryProfile([
+        ProfiledQuery('SELECT 1', (), 0.0),
+        ProfiledQuery('SELECT 1', (), 0.0),
+        ProfiledQuery('SELECT 2', (), 0.0),
+    ])
+
+    with caplog.at_level(logging.WARNING, logger=profiling.__name__):
+        report_repeated_queries(profile, 'GET /users/')
+
+    assert caplog.messages == [
+        'Possible N+1 on GET /users/: statement ran 2 times: SELECT 1'
+    ]
@@ -0,0 +1,163 @@
+from http import HTTPStatus
+from math import ceil
+from uuid import uuid4
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+from financial_app.common import ratelimit
+from financial_app.common.ratelimit import (
+    LocalBucketStore,
+    caller_key,
+    get_rate_limiter,
+)
+from financial_app.common.settings import Settings, get_settings
+from financial_app.main import create_app
+from tests.conftest import bearer_headers
+
+WRITE_RATE = 0.01
+
+
+def user_payload(number: int) -> dict:
+    return {
+        'name': 'Test User',
+        'username': f'test.user{number}',
+        'email': f'test{number}@user.com',
+        'password': 'test.password',
+        'role': 'admin',
+    }
+
+
+@pytest.mark.settings(
+    RATE_LIMIT_BACKEND='local',
+    RATE_LIMIT_WRITE_RATE=str(WRITE_RATE),
+    RATE_LIMIT_WRITE_BURST='2',
+)
+def test_write_rate_limit(client: TestClient):
+
+    responses = [
+        client.post('/users', json=user_payload(number)) for number in range(3)
+    ]
+
+    assert [response.status_code for response in responses] == [
+        HTTPStatus.CREATED,
+        HTTPStatus.CREATED,
+        HTTPStatus.TOO_MANY_REQUESTS,
+    ]
+    retry_after = int(responses[-1].headers['Retry-After'])
+
+    assert 1 < retry_after <= ceil(1 / WRITE_RATE)
+
+
+@pytest.mark.settings(RATE_LIMIT_BACKEND='local', RATE_LIMIT_READ_BURST='1')
+def test_read_rate_limit_is_per_route(client: TestClient):
+
+    first = client.get('/users')
+    limited = client.get('/users')
+    other_route = client.get('/users/search', params={'q': 'a'})
+
+    assert first.status_code == HTTPStatus.OK
+    assert limited.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert other_route.status_code == HTTPStatus.OK
+    assert get_rate_limiter().stats()['limited'] == 1
+
+
+@pytest.mark.settings(RATE_LIMIT_BACKEND='local', RATE_LIMIT_READ_BURST='1')
+def test_read_rate_limit_is_per_user(client: TestClient):
+    # Both users share the test client's address
+    first = client.get('/users')
+    limited = client.get('/users')
+    other_user = client.get('/users', headers=bearer_headers())
+
+    assert first.status_code == HTTPStatus.OK
+    assert limited.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert other_user.status_code == HTTPStatus.OK
+
+
+@pytest.mark.parametrize(
+    ('trusted_proxies', 'forwarded', 'expected'),
+    [
+        ([], '203.0.113.7', 'testclient'),
+        (['testclient'], '203.0.113.7', '203.0.113.7'),
+        (['testclient'], 'spoofed, 203.0.113.7', '203.0.113.7'),
+        (['testclient', '10.0.0.2'], '203.0.113.7, 10.0.0.2', '203.0.113.7'),
+        (['testclient'], '', 'testclient'),
+    ],
+)
+def test_anonymous_caller_key_uses_trusted_forwarded_address(
+    trusted_proxies: list[str], forwarded: str, expected: str
+):
+    request = Request({
+        'type': 'http',
+        'headers': [(b'x-forwarded-for', forwarded.encode())],
+        'client': ('testclient', 50000),
+    })
+    settings = Settings(
+        DATABASE_URL='sqlite://', TRUSTED_PROXIES=trusted_proxies
+    )
+
+    assert caller_key(request, settings) == expected
+
+
+def test_caller_key_prefers_the_token_user():
+    user_id = uuid4()
+    headers = bearer_headers(user_id=user_id)
+    request = Request({
+        'type': 'http',
+        'headers': [(b'authorization', headers['Authorization'].encode())],
+        'client': ('testclient', 50000),
+    })
+
+    assert caller_key(request, get_settings()) == f'user:{user_id}'
+
+
+@pytest.mark.settings(WRITE_CONCURRENCY_LIMIT='1')
+def test_write_concurrency_limit(client: TestClient):
+
+    writes = get_rate_limiter().writes
+    writes.try_acquire()
+
+    busy = client.post('/users', json=user_payload(1))
+    writes.release()
+    admitted = client.post('/users', json=user_payload(1))
+
+    assert busy.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert busy.headers['Retry-After'] == '1'
+    assert admitted.status_code == HTTPStatus.CREATED
+    assert writes.active == 0
+    assert writes.rejected == 1
+
+
+def test_local_bucket_store_refills(monkeypatch):
+    rate = 2
+    clock = [100.0]
+    monkeypatch.setattr(ratelimit, 'monotonic', lambda: clock[0])
+
+    store = LocalBucketStore(max_keys=1)
+
+    assert store.take('a', rate, burst=1) == 0
+    assert store.take('a', rate, burst=1) == 1 / rate
+
+    clock[0] += 1 / rate
+
+    assert store.take('a', rate, burst=1) == 0
+    assert store.take('b', rate, burst=1) == 0
+    assert store.stats() == {'keys': 1}
+
+
+def test_create_app_settings_reach_the_rate_limiter():
+    settings = get_settings().model_copy(
+        update={
+            'RATE_LIMIT_READ_BURST': 1,
+            'OUTBOX_WORKER_ENABLED': False,
+            'USER_PURGE_ENABLED': False,
+            'IDEMPOTENCY_PURGE_ENABLED': False,
+        }
+    )
+
+    with TestClient(create_app(settings)):
+        assert get_rate_limiter().read_limit == (
+            settings.RATE_LIMIT_READ_RATE,
+            1,
+        )
@@ -0,0 +1,156 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session
+
+from financial_app.common.database import ReadOnlySession, tables_registry
+from financial_app.common.replicas import ReplicaSet
+from financial_app.common.settings import Settings
+from financial_app.main import create_app
+from tests.conftest import UserFactory, bearer_headers
+
+USER_PAYLOAD = {
+    'name': 'Test User',
+    'username': 'primary.user',
+    'email': 'primary@user.com',
+    'password': 'test.password',
+    'role': 'admin',
+}
+
+
+def create_database(url: str):
+    engine = create_engine(url)
+    tables_registry.metadata.create_all(engine)
+    engine.dispose()
+
+
+def list_usernames(client: TestClient) -> list[str]:
+    response = client.get('/users')
+
+    assert response.status_code == HTTPStatus.OK
+
+    return [user['username'] for user in response.json()['users']]
+
+
+@pytest.fixture
+def replica_urls(tmp_path):
+    primary_url = f'sqlite:///{tmp_path / "primary.db"}'
+    replica_url = f'sqlite:///{tmp_path / "replica.db"}'
+
+    create_database(primary_url)
+    create_database(replica_url)
+
+    engine = create_engine(replica_url)
+
+    with Session(engine) as session:
+        session.add(UserFactory(username='replica.user'))
+        session.commit()
+
+    engine.dispose()
+
+    return primary_url, replica_url
+
+
+def make_client(replica_urls, **settings) -> TestClient:
+    primary_url, replica_url = replica_urls
+
+    return TestClient(
+        create_app(
+            Settings(
+                DATABASE_URL=primary_url,
+                DATABASE_REPLICA_URLS=[replica_url],
+                OUTBOX_WORKER_ENABLED=False,
+                USER_PURGE_ENABLED=False,
+                IDEMPOTENCY_PURGE_ENABLED=False,
+                **settings,
+            )
+        ),
+        headers=bearer_headers(),
+    )
+
+
+def test_reads_go_to_replica_until_client_writes(replica_urls):
+    with make_client(replica_urls) as client:
+        before_write = list_usernames(client)
+        created = client.post('/users', json=USER_PAYLOAD)
+        after_write = list_usernames(client)
+
+    assert before_write == ['replica.user']
+    assert created.status_code == HTTPStatus.CREATED
+    assert after_write == ['primary.user']
+
+
+def test_read_your_writes_follows_the_user(replica_urls):
+    # Both users share the test client's address
+    writer = bearer_headers()
+    other = bearer_headers()
+
+    with make_client(replica_urls) as client:
+        client.post('/users', json=USER_PAYLOAD, headers=writer)
+        client.headers.update(other)
+        other_reads = list_usernames(client)
+        client.headers.update(writer)
+        writer_reads = list_usernames(client)
+
+    assert other_reads == ['replica.user']
+    assert writer_reads == ['primary.user']
+
+
+def test_reads_return_to_replica_after_window(replica_urls):
+    with make_client(replica_urls, READ_YOUR_WRITES_WINDOW=0) as client:
+        client.post('/users', json=USER_PAYLOAD)
+
+        assert list_usernames(client) == ['replica.user']
+
+
+def test_round_robin_and_least_connections(tmp_path):
+    engines = [create_engine(f'sqlite:///{tmp_path / name}') for name in 'ab']
+
+    round_robin = ReplicaSet(engines, 'round_robin', retry_interval=10)
+    least_connections = ReplicaSet(
+        engines, 'least_connections', retry_interval=10
+    )
+
+    with engines[0].connect():
+        busiest_free = least_connections.choose()
+
+    assert [round_robin.choose() for _ in range(4)] == engines * 2
+    assert busiest_free is engines[1]
+
+
+def test_unreachable_replica_is_evicted(tmp_path):
+    good = create_engine(f'sqlite:///{tmp_path / "good.db"}')
+    bad = create_engine('sqlite:////nonexistent/directory/bad.db')
+
+    replicas = ReplicaSet([bad, good], 'round_robin', retry_interval=0)
+
+    assert not replicas.probe(bad)
+    assert [replicas.choose() for _ in range(3)] == [good] * 3
+    assert replicas.stats() == {
+        'strategy': 'round_robin',
+        'replicas': 2,
+        'evicted': 1,
+        'evictions': 1,
+    }
+
+
+def test_all_replicas_evicted_falls_back_to_primary():
+    bad = create_engine('sqlite:////nonexistent/directory/bad.db')
+
+    replicas = ReplicaSet([bad], 'round_robin', retry_interval=60)
+    replicas.probe(bad)
+
+    assert replicas.choose() is None
+
+
+def test_replica_session_is_read_only(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "replica.db"}')
+
+    with ReadOnlySession(engine) as session:
+        session.add(UserFactory())
+
+        with pytest.raises(InvalidRequestError):
+            session.flush()
@@ -0,0 +1,88 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from pwdlib import PasswordHash
+
+from financial_app.common import security
+from financial_app.common.responses import HashingUnavailable
+from financial_app.common.security import PasswordHasher
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(
+        workers=1, max_queue=0, time_cost=1, memory_cost=1024, parallelism=1
+    )
+
+    yield hasher
+
+    hasher.shutdown()
+
+
+def test_password_hasher_hash(hasher: PasswordHasher):
+    password_hash = hasher.hash('secret')
+
+    assert PasswordHash.recommended().verify('secret', password_hash)
+    assert hasher.stats()['hashes'] == 1
+    assert hasher.stats()['in_flight'] == 0
+
+
+def test_password_hasher_hash_async(hasher: PasswordHasher):
+    password_hash = asyncio.run(hasher.hash_async('secret'))
+
+    assert PasswordHash.recommended().verify('secret', password_hash)
+
+
+def test_password_hasher_hash_many_async_waits_for_slots(
+    hasher: PasswordHasher,
+):
+    passwords = [f'secret{number}' for number in range(3)]
+
+    password_hashes = asyncio.run(hasher.hash_many_async(passwords))
+
+    assert all(
+        PasswordHash.recommended().verify(password, password_hash)
+        for password, password_hash in zip(passwords, password_hashes)
+    )
+    assert hasher.stats()['hashes'] == len(passwords)
+    assert hasher.stats()['in_flight'] == 0
+    assert hasher.stats()['rejected'] == 0
+
+
+def test_password_hasher_rejects_when_full(hasher: PasswordHasher):
+    hasher._acquire()
+
+    with pytest.raises(HashingUnavailable):
+        hasher.hash('secret')
+
+    assert hasher.stats()['rejected'] == 1
+
+
+def test_create_user_when_hashing_is_full(
+    client: TestClient, hasher: PasswordHasher, monkeypatch
+):
+    monkeypatch.setattr(security, 'get_password_hasher', lambda: hasher)
+    hasher._acquire()
+
+    response = client.post(
+        '/users',
+        json={
+            'name': 'Test User',
+            'username': 'test.user',
+            'email': 'test@user.com',
+            'password': 'test.password',
+            'role': 'admin',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_get_admin_hashing_status(client: TestClient):
+    response = client.get('/admin/hashing')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['rejected'] == 0
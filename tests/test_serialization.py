@@ -0,0 +1,46 @@
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from financial_app.common import serialization
+from financial_app.users.enums import UserRole
+from financial_app.users.models import User
+
+
+@pytest.mark.parametrize('path', ['/users', '/users/search?q=test'])
+def test_fast_json_matches_default_encoding(
+    client: TestClient, user: User, other_user: User, path
+):
+    default = client.get(path)
+
+    client.app.state.settings = client.app.state.settings.model_copy(
+        update={'FAST_JSON_RESPONSES': True}
+    )
+    fast = client.get(path)
+
+    assert fast.json() == default.json()
+    assert fast.headers['ETag'] == default.headers['ETag']
+
+
+@pytest.mark.settings(FAST_JSON_RESPONSES='true')
+def test_fast_json_single_user_hides_record_fields(
+    client: TestClient, user: User
+):
+    response = client.get('/users', params={'username': user.username})
+
+    assert response.json() == {
+        'id': str(user.id),
+        'username': user.username,
+        'email': user.email,
+        'role': user.role,
+    }
+
+
+def test_dumps_without_orjson(monkeypatch):
+    content = {'id': uuid4(), 'role': UserRole.admin}
+    expected = serialization.dumps(content)
+
+    monkeypatch.setattr(serialization, 'orjson', None)
+
+    assert serialization.dumps(content).replace(b' ', b'') == expected
@@ -0,0 +1,207 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from threading import Event
+from time import monotonic, sleep
+
+import anyio
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from financial_app.common import singleflight
+from financial_app.common.profiling import capture_queries
+from financial_app.common.singleflight import AsyncSingleFlight, SingleFlight
+from financial_app.users import async_repositories, repositories
+from financial_app.users.models import User
+from tests.conftest import UserFactory
+
+REQUESTS = 100
+
+USER_PAYLOAD = {
+    'name': 'Test User',
+    'username': 'test.user',
+    'email': 'test@user.com',
+    'password': 'test.password',
+    'role': 'admin',
+}
+
+
+@pytest.fixture(autouse=True)
+def flights(monkeypatch, settings_env):
+    # Without the user cache every request that is not coalesced queries
+    settings_env('USER_CACHE_BACKEND', 'none')
+    monkeypatch.setattr(singleflight, 'read_flights', SingleFlight())
+    monkeypatch.setattr(
+        singleflight, 'async_read_flights', AsyncSingleFlight()
+    )
+
+
+def wait_for_followers(flight, timeout: float = 10):
+    deadline = monotonic() + timeout
+
+    while flight.shared < REQUESTS - 1 and monotonic() < deadline:
+        sleep(0.01)
+
+
+def hold_until_followers_join(monkeypatch, module, name: str):
+    # The first caller waits for the others so that all of them overlap
+    function = getattr(module, name)
+
+    def held(*args):
+        wait_for_followers(singleflight.read_flights)
+        return function(*args)
+
+    monkeypatch.setattr(module, name, held)
+
+
+def raise_thread_limit(client: TestClient):
+    def set_limit():
+        anyio.to_thread.current_default_thread_limiter().total_tokens = (
+            REQUESTS + 1
+        )
+
+    client.portal.call(set_limit)
+
+
+def fire(client: TestClient, params: dict) -> list:
+    with ThreadPoolExecutor(max_workers=REQUESTS) as executor:
+        return list(
+            executor.map(
+                lambda _: client.get('/users', params=params),
+                range(REQUESTS),
+            )
+        )
+
+
+@pytest.mark.parametrize(
+    ('name', 'params'),
+    [
+        ('get_user_by_id', lambda user: {'user_id': str(user.id)}),
+        ('get_user_by_username', lambda user: {'username': user.username}),
+        ('get_all_users', lambda user: {'limit': 5}),
+    ],
+)
+def test_concurrent_identical_reads_share_one_query(
+    client: TestClient, user: User, monkeypatch, name, params
+):
+    request_params = params(user)
+    hold_until_followers_join(monkeypatch, repositories, name)
+    raise_thread_limit(client)
+
+    with capture_queries() as profile:
+        responses = fire(client, request_params)
+
+    assert {response.status_code for response in responses} == {HTTPStatus.OK}
+    assert len({response.text for response in responses}) == 1
+    assert len(profile) == 1
+    assert client.get('/admin/coalescing').json() == {
+        'calls': 1,
+        'shared': REQUESTS - 1,
+    }
+
+
+def test_read_after_commit_does_not_join_earlier_flight(session: Session):
+    # It would get data read before the write it must see
+    started = Event()
+    release = Event()
+
+    def slow_read(session, value):
+        started.set()
+        release.wait(10)
+        return value
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        before = executor.submit(
+            singleflight.coalesce_read, session, slow_read, 'key'
+        )
+        started.wait(10)
+        session.add(UserFactory())
+        session.commit()
+        after = executor.submit(
+            singleflight.coalesce_read, session, slow_read, 'key'
+        )
+        release.set()
+
+    assert before.result() == after.result() == 'key'
+    assert singleflight.read_flights.stats() == {'calls': 2, 'shared': 0}
+
+
+def test_async_concurrent_identical_reads_share_one_query(
+    async_client: TestClient, monkeypatch
+):
+    user_id = async_client.post('/users', json=USER_PAYLOAD).json()['id']
+    get_user_by_id = async_repositories.get_user_by_id
+
+    async def held(*args):
+        while singleflight.async_read_flights.shared < REQUESTS - 1:
+            await asyncio.sleep(0.01)
+
+        return await get_user_by_id(*args)
+
+    monkeypatch.setattr(async_repositories, 'get_user_by_id', held)
+
+    with capture_queries() as profile:
+        responses = fire(async_client, {'user_id': user_id})
+
+    assert {response.status_code for response in responses} == {HTTPStatus.OK}
+    assert len(profile) == 1
+    assert singleflight.async_read_flights.stats() == {
+        'calls': 1,
+        'shared': REQUESTS - 1,
+    }
+
+
+def test_single_flight_shares_exceptions():
+    flight = SingleFlight()
+    started = Event()
+    release = Event()
+
+    def failing():
+        started.set()
+        release.wait()
+        raise ValueError('boom')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, 'key', failing)
+        started.wait()
+        follower = executor.submit(flight.do, 'key', failing)
+
+        while flight.shared == 0:
+            sleep(0.01)
+
+        release.set()
+
+    for future in (leader, follower):
+        with pytest.raises(ValueError, match='boom'):
+            future.result()
+
+    assert flight.stats() == {'calls': 1, 'shared': 1}
+    assert flight.do('key', lambda: 'again') == 'again'
+
+
+def test_async_single_flight_survives_leader_cancellation():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def read(name: str):
+        calls.append(name)
+        await asyncio.sleep(0.05)
+        return name
+
+    async def run():
+        leader = asyncio.create_task(flight.do('key', read, 'leader'))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do('key', read, 'follower'))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+        return await follower
+
+    assert asyncio.run(run()) == 'follower'
+    assert calls == ['leader', 'follower']
+    assert flight.stats() == {'calls': 2, 'shared': 1}
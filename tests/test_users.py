@@ -1,9 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
+from types import SimpleNamespace
 from uuid import uuid4
 
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 
+from financial_app.common import security
+from financial_app.common.database import tables_registry
+from financial_app.users import repositories
 from financial_app.users.models import User
+from financial_app.users.responses import (
+    EmailAlreadyExists,
+    UsernameAlreadyExists,
+)
+from financial_app.users.schemas import UserSchema
+from tests.conftest import UserFactory
 
 
 def test_create_user(client: TestClient):
@@ -95,7 +110,8 @@ def test_get_all_users(client: TestClient, user: User):
                 'email': user.email,
                 'role': user.role,
             }
-        ]
+        ],
+        'next_cursor': None,
     }
 
 
@@ -103,7 +119,42 @@ def test_get_all_users_without_users(client: TestClient):
     response = client.get('/users')
 
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': []}
+    assert response.json() == {'users': [], 'next_cursor': None}
+
+
+def test_get_all_users_with_cursor(client: TestClient, session: Session):
+    users = UserFactory.create_batch(3)
+    session.add_all(users)
+    session.commit()
+
+    first_page = client.get('/users', params={'limit': 2}).json()
+    second_page = client.get(
+        '/users', params={'limit': 2, 'cursor': first_page['next_cursor']}
+    ).json()
+
+    ids = [user['id'] for user in first_page['users'] + second_page['users']]
+
+    assert first_page['next_cursor'] is not None
+    assert second_page['next_cursor'] is None
+    assert sorted(ids) == sorted(str(user.id) for user in users)
+
+
+def test_get_all_users_with_invalid_cursor(client: TestClient):
+    response = client.get('/users', params={'cursor': 'invalid.cursor'})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()['detail'] == 'Cursor is not valid'
+
+
+def test_get_all_users_caps_limit(
+    client: TestClient, user: User, other_user: User, monkeypatch
+):
+    monkeypatch.setattr(repositories, 'MAX_PAGE_LIMIT', 1)
+
+    response = client.get('/users', params={'limit': 1000})
+
+    assert len(response.json()['users']) == 1
+    assert response.json()['next_cursor'] is not None
 
 
 def test_get_user_by_id(client: TestClient, user: User):
@@ -239,3 +290,164 @@ def test_delete_user_with_wrong_uuid_format(client: TestClient):
 
     assert response.status_code == HTTPStatus.BAD_REQUEST
     assert response.json()['detail'] == 'User Id is not valid'
+
+
+class PostgresUniqueViolation(Exception):
+    def __init__(self, constraint_name: str):
+        super().__init__(
+            'duplicate key value violates unique constraint\n'
+            'DETAIL:  Key (email)=(myusername@x.com) already exists.'
+        )
+        self.diag = SimpleNamespace(constraint_name=constraint_name)
+
+
+def test_unique_violation_is_told_by_index_name(session: Session):
+    error = IntegrityError(
+        'INSERT', {}, PostgresUniqueViolation('ix_users_email')
+    )
+
+    with pytest.raises(EmailAlreadyExists):
+        repositories.raise_unique_violation(session, error, 'myusername')
+
+
+def test_update_user_with_same_email(
+    client: TestClient, user: User, other_user: User
+):
+    response = client.put(
+        f'/users/{str(user.id)}',
+        json={
+            'name': user.name,
+            'username': user.username,
+            'email': other_user.email,
+            'password': 'different-password',
+            'role': 'user',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()['detail'] == 'Email already exists'
+
+
+def test_update_user_with_same_username(
+    client: TestClient, user: User, other_user: User
+):
+    response = client.put(
+        f'/users/{str(user.id)}',
+        json={
+            'name': user.name,
+            'username': other_user.username,
+            'email': other_user.email,
+            'password': 'different-password',
+            'role': 'user',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()['detail'] == 'Username already exists'
+
+
+def test_update_user_changes_name(
+    client: TestClient, session: Session, user: User
+):
+    client.put(
+        f'/users/{str(user.id)}',
+        json={
+            'name': 'Different Name',
+            'username': user.username,
+            'email': user.email,
+            'password': 'different-password',
+            'role': 'user',
+        },
+    )
+
+    session.refresh(user)
+
+    assert user.name == 'Different Name'
+
+
+def test_patch_user_writes_only_given_fields(
+    client: TestClient, session: Session, user: User, query_budget
+):
+    password = user.password
+    hashes = security.get_password_hasher().stats()['hashes']
+
+    with query_budget(1):
+        response = client.patch(
+            f'/users/{user.id}', json={'email': 'patched@email.com'}
+        )
+
+    session.refresh(user)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['email'] == 'patched@email.com'
+    assert user.password == password
+    assert user.name.endswith('+name')
+    assert security.get_password_hasher().stats()['hashes'] == hashes
+
+
+def test_patch_user_rehashes_new_password(
+    client: TestClient, session: Session, user: User
+):
+    password = user.password
+
+    response = client.patch(
+        f'/users/{user.id}', json={'password': 'patched-password'}
+    )
+
+    session.refresh(user)
+
+    assert response.status_code == HTTPStatus.OK
+    assert user.password not in {password, 'patched-password'}
+
+
+def test_patch_user_without_fields(client: TestClient, user: User):
+    response = client.patch(f'/users/{user.id}', json={'name': None})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_patch_user_with_same_username(
+    client: TestClient, user: User, other_user: User
+):
+    response = client.patch(
+        f'/users/{user.id}', json={'username': other_user.username}
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()['detail'] == 'Username already exists'
+
+
+def test_patch_inexistent_user(client: TestClient):
+    response = client.patch(f'/users/{uuid4()}', json={'name': 'Nobody'})
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_create_user_concurrently_with_same_username(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "concurrency.db"}')
+    tables_registry.metadata.create_all(engine)
+
+    user_schema = UserSchema(
+        name='Test User',
+        username='test.user',
+        email='test@user.com',
+        password='test.password',
+        role='admin',
+    )
+
+    def create_user(_):
+        with Session(engine) as session:
+            try:
+                repositories.create_user(session, user_schema, 'hash')
+                return 'created'
+
+            except UsernameAlreadyExists:
+                return 'conflict'
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(create_user, range(50)))
+
+    engine.dispose()
+
+    assert results.count('created') == 1
+    assert results.count('conflict') == len(results) - 1
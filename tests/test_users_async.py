@@ -0,0 +1,152 @@
+import asyncio
+import json
+from http import HTTPStatus
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from financial_app.common.cache import LocalCache
+from financial_app.users.cache import get_user_cache
+
+USER_PAYLOAD = {
+    'name': 'Test User',
+    'username': 'test.user',
+    'email': 'test@user.com',
+    'password': 'test.password',
+    'role': 'admin',
+}
+
+
+def test_async_create_and_get_user(async_client: TestClient):
+    created = async_client.post('/users', json=USER_PAYLOAD)
+
+    assert created.status_code == HTTPStatus.CREATED
+
+    user_id = created.json()['id']
+
+    by_id = async_client.get('/users', params={'user_id': user_id})
+    by_username = async_client.get(
+        '/users', params={'username': USER_PAYLOAD['username']}
+    )
+    all_users = async_client.get('/users')
+
+    assert by_id.json() == created.json()
+    assert by_username.json() == created.json()
+    assert all_users.json() == {
+        'users': [created.json()],
+        'next_cursor': None,
+    }
+
+
+class LoopCheckingCache(LocalCache):
+    """Records calls made from an event loop thread, where it would block"""
+
+    def __init__(self):
+        super().__init__(max_size=100)
+        self.calls_on_loop = []
+
+    def _check(self, name: str):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self.calls_on_loop.append(name)
+
+    def get(self, key: str) -> str | None:
+        self._check('get')
+        return super().get(key)
+
+    def set(self, key: str, value: str, ttl: float):
+        self._check('set')
+        super().set(key, value, ttl)
+
+    def delete(self, *keys: str):
+        self._check('delete')
+        super().delete(*keys)
+
+
+def test_async_cache_calls_stay_off_the_event_loop(async_client: TestClient):
+    backend = get_user_cache().backend = LoopCheckingCache()
+
+    user_id = async_client.post('/users', json=USER_PAYLOAD).json()['id']
+    async_client.get('/users', params={'user_id': user_id})
+    async_client.get('/users', params={'username': 'missing'})
+    async_client.delete(f'/users/{user_id}')
+
+    assert backend.stats()['size'] > 0
+    assert backend.calls_on_loop == []
+
+
+def test_async_create_user_with_same_username(async_client: TestClient):
+    async_client.post('/users', json=USER_PAYLOAD)
+
+    response = async_client.post('/users', json=USER_PAYLOAD)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()['detail'] == 'Username already exists'
+
+
+def test_async_update_user(async_client: TestClient):
+    user_id = async_client.post('/users', json=USER_PAYLOAD).json()['id']
+
+    response = async_client.put(
+        f'/users/{user_id}',
+        json={**USER_PAYLOAD, 'username': 'different.username'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['username'] == 'different.username'
+
+
+def test_async_patch_user(async_client: TestClient):
+    user_id = async_client.post('/users', json=USER_PAYLOAD).json()['id']
+
+    response = async_client.patch(
+        f'/users/{user_id}', json={'email': 'patched@user.com'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['email'] == 'patched@user.com'
+    assert response.json()['username'] == USER_PAYLOAD['username']
+
+
+def test_async_lookup_users(async_client: TestClient):
+    created = async_client.post('/users', json=USER_PAYLOAD).json()
+
+    response = async_client.get(
+        '/users/lookup',
+        params={'user_id': created['id'], 'username': 'missing'},
+    )
+
+    assert response.json() == {
+        'by_id': {created['id']: created},
+        'by_username': {'missing': None},
+    }
+
+
+def test_async_delete_user(async_client: TestClient):
+    user_id = async_client.post('/users', json=USER_PAYLOAD).json()['id']
+
+    response = async_client.delete(f'/users/{user_id}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['message'] == 'User successfuly deleted'
+
+
+def test_async_get_user_by_id_with_wrong_id(async_client: TestClient):
+    response = async_client.get('/users', params={'user_id': str(uuid4())})
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json()['detail'] == 'User not found'
+
+
+def test_async_export_users(async_client: TestClient):
+    created = async_client.post('/users', json=USER_PAYLOAD).json()
+
+    response = async_client.get('/users/export')
+    row = json.loads(response.text)
+
+    assert response.status_code == HTTPStatus.OK
+    assert row['id'] == created['id']
+    assert row['cursor']
@@ -0,0 +1,106 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from financial_app.users.models import User
+
+
+def make_user(number: int) -> dict:
+    return {
+        'name': f'Bulk User {number}',
+        'username': f'bulk.user{number}',
+        'email': f'bulk{number}@user.com',
+        'password': 'bulk.password',
+        'role': 'user',
+    }
+
+
+@pytest.mark.settings(BULK_IMPORT_BATCH_SIZE='2')
+def test_import_users_from_ndjson(
+    client: TestClient, session: Session, user: User
+):
+    rows = [
+        make_user(1),
+        make_user(2),
+        {**make_user(3), 'username': user.username},
+        {**make_user(4), 'role': 'wrong role'},
+        make_user(5),
+    ]
+    body = '\n'.join(json.dumps(row) for row in rows) + '\n{invalid json\n'
+
+    response = client.post(
+        '/users/bulk',
+        content=body,
+        headers={'Content-Type': 'application/x-ndjson'},
+    )
+
+    report = response.json()
+    imported = session.scalars(
+        select(User.username).where(User.username.startswith('bulk.'))
+    ).all()
+
+    assert response.status_code == HTTPStatus.OK
+    assert report['imported'] == len(imported)
+    assert sorted(imported) == ['bulk.user1', 'bulk.user2', 'bulk.user5']
+    assert [error['row'] for error in report['errors']] == [3, 4, 6]
+    assert report['errors'][0]['detail'] == 'Username already exists'
+
+
+def test_import_users_from_csv(client: TestClient, session: Session):
+    header = 'name,username,email,password,role'
+    lines = [','.join(make_user(number).values()) for number in range(1, 4)]
+
+    response = client.post(
+        '/users/bulk',
+        content='\r\n'.join([header, *lines]),
+        headers={'Content-Type': 'text/csv'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    email = session.scalar(
+        select(User.email).where(User.username == 'bulk.user2')
+    )
+
+    assert response.json() == {'imported': 3, 'errors': []}
+    assert email == 'bulk2@user.com'
+
+
+def test_import_users_with_unsupported_media_type(client: TestClient):
+    response = client.post(
+        '/users/bulk',
+        content='username\n',
+        headers={'Content-Type': 'text/plain'},
+    )
+
+    assert response.status_code == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+
+@pytest.mark.settings(BULK_IMPORT_MAX_LINE_BYTES='512')
+def test_import_users_reports_oversized_lines(client: TestClient):
+    rows = [
+        make_user(1),
+        {**make_user(2), 'name': 'x' * 2048},
+        make_user(3),
+    ]
+
+    def chunks():
+        # Split mid-line so the oversized row spans several chunks
+        body = ''.join(json.dumps(row) + '\n' for row in rows).encode()
+        for start in range(0, len(body), 100):
+            yield body[start : start + 100]
+
+    response = client.post(
+        '/users/bulk',
+        content=chunks(),
+        headers={'Content-Type': 'application/x-ndjson'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'imported': 2,
+        'errors': [{'row': 2, 'detail': 'Line longer than 512 bytes'}],
+    }
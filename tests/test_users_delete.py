@@ -0,0 +1,162 @@
+from datetime import timedelta
+from http import HTTPStatus
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text, update
+from sqlalchemy.orm import Session
+
+from financial_app.common.database import utcnow
+from financial_app.users.models import ArchivedUser, User
+from financial_app.users.purge import purge_deleted_users, purge_query
+from tests.conftest import UserFactory
+
+
+def test_deleted_user_is_hidden_from_reads(
+    client: TestClient, user: User, other_user: User
+):
+    client.delete(f'/users/{user.id}')
+
+    listed = client.get('/users').json()['users']
+    searched = client.get('/users/search', params={'q': 'test'}).json()
+
+    assert [item['id'] for item in listed] == [str(other_user.id)]
+    assert [item['id'] for item in searched['users']] == [str(other_user.id)]
+
+
+def test_deleted_user_frees_username_and_email(client: TestClient, user: User):
+    client.delete(f'/users/{user.id}')
+
+    response = client.post(
+        '/users',
+        json={
+            'name': 'New Owner',
+            'username': user.username,
+            'email': user.email,
+            'password': 'new.password',
+            'role': 'user',
+        },
+    )
+    clash = client.post(
+        '/users',
+        json={
+            'name': 'Late Comer',
+            'username': user.username,
+            'email': 'late@comer.com',
+            'password': 'late.password',
+            'role': 'user',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json()['id'] != str(user.id)
+    assert clash.status_code == HTTPStatus.BAD_REQUEST
+    assert clash.json() == {'detail': 'Username already exists'}
+
+
+def test_delete_user_twice(client: TestClient, session: Session, user: User):
+    client.delete(f'/users/{user.id}')
+
+    response = client.delete(f'/users/{user.id}')
+
+    session.refresh(user)
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert user.deletedAt is not None
+
+
+def test_delete_user_with_stale_version(client: TestClient, user: User):
+    response = client.delete(
+        f'/users/{user.id}', headers={'If-Match': f'"{user.id}-7"'}
+    )
+
+    listed = client.get('/users').json()['users']
+
+    assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+    assert [item['id'] for item in listed] == [str(user.id)]
+
+
+def test_bulk_delete_users(client: TestClient, user: User, other_user: User):
+    missing = str(uuid4())
+    client.delete(f'/users/{other_user.id}')
+
+    response = client.post(
+        '/users/bulk-delete',
+        json={'ids': [str(user.id), str(other_user.id), missing]},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'deleted': [str(user.id)],
+        'not_found': sorted([str(other_user.id), missing]),
+    }
+
+
+def test_bulk_delete_without_ids(client: TestClient):
+    response = client.post('/users/bulk-delete', json={'ids': []})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_purge_archives_old_deleted_users(
+    client: TestClient, session: Session, user: User, other_user: User
+):
+    username = user.username
+    client.delete(f'/users/{user.id}')
+    client.delete(f'/users/{other_user.id}')
+    session.execute(
+        update(User)
+        .where(User.id == user.id)
+        .values(deletedAt=utcnow() - timedelta(days=40))
+    )
+    session.commit()
+
+    purged = purge_deleted_users(
+        session, utcnow() - timedelta(days=30), batch_size=1
+    )
+
+    archived = session.scalars(select(ArchivedUser)).all()
+    remaining = session.scalars(select(User.id)).all()
+
+    assert purged == 1
+    assert [row.username for row in archived] == [username]
+    assert remaining == [other_user.id]
+
+
+def test_purge_runs_in_batches(
+    client: TestClient, session: Session, user: User, other_user: User
+):
+    user_ids = [user.id, other_user.id]
+    client.post(
+        '/users/bulk-delete',
+        json={'ids': [str(user_id) for user_id in user_ids]},
+    )
+
+    purged = purge_deleted_users(
+        session, utcnow() + timedelta(seconds=1), batch_size=1
+    )
+
+    archived = session.scalars(select(ArchivedUser.id)).all()
+
+    assert purged == len(archived)
+    assert sorted(archived) == sorted(user_ids)
+    assert session.scalars(select(User.id)).all() == []
+
+
+def test_purge_query_uses_deleted_at_index(session: Session):
+    session.add_all(UserFactory.create_batch(50))
+    session.commit()
+    session.execute(text('ANALYZE'))
+
+    compiled = purge_query(utcnow(), batch_size=10).compile(
+        session.get_bind(), compile_kwargs={'literal_binds': True}
+    )
+    plan = '\n'.join(
+        row[-1]
+        for row in session.connection().exec_driver_sql(
+            f'EXPLAIN QUERY PLAN {compiled}'
+        )
+    )
+
+    assert 'USING INDEX ix_users_deletedAt' in plan
+    assert 'TEMP B-TREE' not in plan
@@ -0,0 +1,116 @@
+from http import HTTPStatus
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from financial_app.common.conditional import etag_matches
+from financial_app.users.models import User
+
+
+def update_payload(user: User, username: str) -> dict:
+    return {
+        'name': user.name,
+        'username': username,
+        'email': user.email,
+        'password': 'new.password',
+        'role': user.role,
+    }
+
+
+def test_get_user_sets_etag_and_last_modified(client: TestClient, user: User):
+    response = client.get('/users', params={'user_id': str(user.id)})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag'] == f'"{user.id}-1"'
+    assert response.headers['Last-Modified'].endswith(' GMT')
+
+
+def test_get_user_not_modified(client: TestClient, user: User):
+    etag = client.get('/users', params={'user_id': str(user.id)}).headers[
+        'ETag'
+    ]
+
+    response = client.get(
+        '/users',
+        params={'user_id': str(user.id)},
+        headers={'If-None-Match': f'"other", {etag}'},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+    assert not response.content
+
+
+def test_users_page_etag_changes_with_content(
+    client: TestClient, user: User, other_user: User
+):
+    etag = client.get('/users').headers['ETag']
+
+    not_modified = client.get('/users', headers={'If-None-Match': etag})
+    client.put(f'/users/{user.id}', json=update_payload(user, 'renamed'))
+    modified = client.get('/users', headers={'If-None-Match': etag})
+
+    assert etag.startswith('W/')
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    assert modified.status_code == HTTPStatus.OK
+    assert modified.headers['ETag'] != etag
+
+
+def test_update_user_bumps_version(
+    client: TestClient, session: Session, user: User
+):
+    response = client.put(
+        f'/users/{user.id}',
+        json=update_payload(user, 'renamed'),
+        headers={'If-Match': f'"{user.id}-1"'},
+    )
+
+    session.refresh(user)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag'] == f'"{user.id}-2"'
+    assert user.version == 2  # noqa: PLR2004
+
+
+def test_update_user_with_stale_if_match(client: TestClient, user: User):
+    client.put(f'/users/{user.id}', json=update_payload(user, 'first'))
+
+    response = client.put(
+        f'/users/{user.id}',
+        json=update_payload(user, 'second'),
+        headers={'If-Match': f'"{user.id}-1"'},
+    )
+
+    assert response.status_code == HTTPStatus.PRECONDITION_FAILED
+    assert response.json()['detail'] == 'User was modified by another request'
+
+
+def test_update_missing_user_with_if_match(client: TestClient, user: User):
+    user_id = '00000000-0000-0000-0000-000000000000'
+
+    response = client.put(
+        f'/users/{user_id}',
+        json=update_payload(user, 'renamed'),
+        headers={'If-Match': f'"{user_id}-1"'},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_delete_user_with_if_match(client: TestClient, user: User):
+    stale = client.delete(
+        f'/users/{user.id}', headers={'If-Match': f'"{user.id}-7"'}
+    )
+    current = client.delete(
+        f'/users/{user.id}', headers={'If-Match': f'"{user.id}-1"'}
+    )
+
+    assert stale.status_code == HTTPStatus.PRECONDITION_FAILED
+    assert current.status_code == HTTPStatus.OK
+
+
+def test_etag_matches_weak_and_wildcard():
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('*', '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
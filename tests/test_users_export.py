@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from tests.conftest import UserFactory
+
+
+def test_export_users_as_ndjson(client: TestClient, session: Session):
+    users = UserFactory.create_batch(3)
+    session.add_all(users)
+    session.commit()
+
+    response = client.get('/users/export')
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert sorted(row['id'] for row in rows) == sorted(
+        str(user.id) for user in users
+    )
+
+
+def test_export_users_as_csv(client: TestClient, session: Session):
+    users = UserFactory.create_batch(2)
+    session.add_all(users)
+    session.commit()
+
+    response = client.get('/users/export', params={'format': 'csv'})
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    assert {row['username'] for row in rows} == {
+        user.username for user in users
+    }
+
+
+@pytest.mark.settings(EXPORT_BATCH_SIZE='2')
+def test_export_users_resumes_from_cursor(
+    client: TestClient, session: Session
+):
+    session.add_all(UserFactory.create_batch(5))
+    session.commit()
+
+    rows = [
+        json.loads(line)
+        for line in client.get('/users/export').text.splitlines()
+    ]
+    resumed = [
+        json.loads(line)
+        for line in client.get(
+            '/users/export', params={'cursor': rows[1]['cursor']}
+        ).text.splitlines()
+    ]
+
+    assert resumed == rows[2:]
+
+
+def test_export_users_with_invalid_cursor(client: TestClient):
+    response = client.get('/users/export', params={'cursor': 'invalid'})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,58 @@
+from http import HTTPStatus
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from financial_app.users.models import User
+
+
+def test_lookup_users_in_one_query(
+    client: TestClient, user: User, other_user: User, query_budget
+):
+    missing_id = str(uuid4())
+    params = {
+        'user_id': [str(user.id), missing_id],
+        'username': [other_user.username, 'missing'],
+    }
+
+    with query_budget(1):
+        response = client.get('/users/lookup', params=params)
+
+    result = response.json()
+
+    assert response.status_code == HTTPStatus.OK
+    assert result['by_id'][str(user.id)]['username'] == user.username
+    assert result['by_id'][missing_id] is None
+    assert result['by_username'][other_user.username]['id'] == str(
+        other_user.id
+    )
+    assert result['by_username']['missing'] is None
+
+
+def test_lookup_skips_deleted_users(client: TestClient, user: User):
+    client.delete(f'/users/{user.id}')
+
+    response = client.get('/users/lookup', params={'user_id': str(user.id)})
+
+    assert response.json()['by_id'] == {str(user.id): None}
+
+
+def test_lookup_with_invalid_id(client: TestClient):
+    response = client.get('/users/lookup', params={'user_id': 'invalid.id'})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()['detail'] == 'User Id is not valid'
+
+
+def test_lookup_without_keys(client: TestClient):
+    response = client.get('/users/lookup')
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_lookup_with_too_many_keys(client: TestClient):
+    usernames = [f'user{number}' for number in range(101)]
+
+    response = client.get('/users/lookup', params={'username': usernames})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
@@ -0,0 +1,168 @@
+from datetime import UTC, datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+from financial_app.users.models import User
+from financial_app.users.repositories import search_query
+from financial_app.users.schemas import UserSearch
+from tests.conftest import UserFactory
+
+
+@pytest.fixture
+def search_users(session: Session):
+    users = [
+        UserFactory(
+            name='Alice Smith', username='alice', email='alice@bank.com'
+        ),
+        UserFactory(
+            name='Bob Alison',
+            username='bob',
+            email='bob@bank.com',
+            role='user',
+        ),
+        UserFactory(name='Carol', username='carol', email='al@carol.com'),
+    ]
+    session.add_all(users)
+    session.commit()
+
+    return users
+
+
+def search(client: TestClient, **params) -> list[str]:
+    response = client.get('/users/search', params=params)
+
+    assert response.status_code == HTTPStatus.OK
+
+    return sorted(user['username'] for user in response.json()['users'])
+
+
+@pytest.fixture
+def analyzed(session: Session):
+    # Without statistics the planner walks the page order index instead
+    session.add_all(UserFactory.create_batch(50))
+    session.commit()
+    session.execute(text('ANALYZE'))
+
+
+def explain(session: Session, search: UserSearch) -> str:
+    compiled = search_query(search).compile(
+        session.get_bind(), compile_kwargs={'literal_binds': True}
+    )
+    plan = session.connection().exec_driver_sql(
+        f'EXPLAIN QUERY PLAN {compiled}'
+    )
+
+    return '\n'.join(row[-1] for row in plan)
+
+
+def test_search_users_by_prefix(client: TestClient, search_users):
+    assert search(client, q='AL') == ['alice', 'carol']
+
+
+def test_search_users_by_field(client: TestClient, search_users):
+    assert search(client, q='al', field='username') == ['alice']
+
+
+@pytest.mark.parametrize(
+    ('q', 'username'),
+    [
+        ('\U0010ffff', '\U0010ffff'),
+        ('max\U0010ffff', 'max\U0010ffffend'),
+        ('hangul\ud7ff', 'hangul\ud7ffend'),
+    ],
+)
+def test_search_users_by_prefix_at_code_point_limits(
+    client: TestClient, session: Session, q: str, username: str
+):
+    session.add(UserFactory(username=username))
+    session.commit()
+
+    assert search(client, q=q) == [username]
+
+
+def test_search_users_contains(client: TestClient, search_users):
+    assert search(client, q='alis', contains=True) == ['bob']
+
+
+def test_search_users_by_role(client: TestClient, search_users):
+    assert search(client, q='b', role='user') == ['bob']
+
+
+def test_search_users_by_created_at(client: TestClient, search_users):
+    now = datetime.now(UTC).replace(tzinfo=None)
+
+    assert search(
+        client,
+        q='a',
+        created_after=(now - timedelta(days=1)).isoformat(),
+        created_before=(now + timedelta(days=1)).isoformat(),
+    ) == ['alice', 'carol']
+    assert search(client, q='a', created_after=now + timedelta(days=1)) == []
+
+
+def test_search_users_without_term(client: TestClient):
+    response = client.get('/users/search', params={'q': ''})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_search_by_field_uses_index(session: Session, analyzed):
+    plan = explain(session, UserSearch(q='al', field='username'))
+
+    assert 'USING INDEX ix_users_lower_username' in plan
+    assert 'SCAN users' not in plan
+
+
+def test_search_all_fields_uses_indexes(session: Session, analyzed):
+    plan = explain(session, UserSearch(q='al', role='admin'))
+
+    assert 'MULTI-INDEX OR' in plan
+    assert 'SCAN users' not in plan
+    assert all(
+        f'USING INDEX ix_users_lower_{column}' in plan
+        for column in ('name', 'email', 'username')
+    )
+
+
+def test_postgresql_prefix_search_compares_by_code_point():
+    # Locale collations do not order "starts with" as one range
+    dialect = postgresql.dialect()
+    query = str(
+        search_query(UserSearch(q='al', field='username')).compile(
+            dialect=dialect
+        )
+    )
+    index = next(
+        index
+        for index in User.__table__.indexes
+        if index.name == 'ix_users_lower_username'
+    )
+
+    assert 'lower(users.username) COLLATE "C" >= ' in query
+    assert 'lower(users.username) COLLATE "C" < ' in query
+    assert str(CreateIndex(index).compile(dialect=dialect)).endswith(
+        '(lower(username) COLLATE "C")'
+    )
+
+
+def test_trigram_indexes_are_declared_for_postgresql():
+    dialect = postgresql.dialect()
+    indexes = {
+        index.name: str(CreateIndex(index).compile(dialect=dialect))
+        for index in User.__table__.indexes
+        if index.name.endswith('_trgm')
+    }
+
+    assert indexes == {
+        f'ix_users_lower_{column}_trgm': (
+            f'CREATE INDEX ix_users_lower_{column}_trgm ON users '
+            f'USING gin (lower({column}) gin_trgm_ops)'
+        )
+        for column in ('name', 'email', 'username')
+    }